@@ -0,0 +1,82 @@
+from tkinter import messagebox
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.db_operations import resolve_clients_batch, delete_clients_batch
+from utils.db_executor import DbTaskMixin
+from utils.identifier_resolver import parse_identifiers
+from utils.batch_lookup import format_batch_result, summarize_batch, found_client_ids
+from batch.client_batch_gui import ClientBatchGUI
+import customtkinter as ctk # Keep ctk for the mainloop at the end
+from utils.logger import log_activity
+
+class ClientBatchApp(DbTaskMixin, ClientBatchGUI):
+    def __init__(self, root=None):
+        super().__init__(root)
+        # The GUI setup is now handled by ClientBatchGUI's __init__
+        self.found_ids = [] # XCLIENTES encontrados na última busca, candidatos ao delete
+
+    def handle_lookup(self):
+        identifiers = parse_identifiers(self.get_identifiers_text())
+        if not identifiers:
+            messagebox.showerror("Input Error", "Please enter at least one XCLIENTES, CGC, Name, or Inscrição.")
+            return
+
+        self.found_ids = []
+        # Todos os identificadores em poucas consultas, fora da thread do Tk
+        self.run_db_task(resolve_clients_batch, identifiers, on_success=self.show_lookup_result, key="batch")
+
+    def show_lookup_result(self, results):
+        if results is None:
+            return # O erro já foi mostrado pelo db_operations
+        self.found_ids = found_client_ids(results)
+        self.show_results_text([format_batch_result(*result) for result in results], summarize_batch(results))
+
+    def handle_delete_found(self):
+        if not self.found_ids:
+            messagebox.showerror("Error", "No clients found to delete. Run a lookup first.")
+            return
+        if not messagebox.askyesno("Confirm Delete", f"Delete {len(self.found_ids)} clients? This cannot be undone."):
+            return
+
+        client_ids = list(self.found_ids)
+        self.run_db_task(
+            delete_clients_batch, client_ids,
+            on_success=lambda deleted: self.show_delete_result(deleted, client_ids),
+            key="batch",
+            write=True
+        )
+
+    def show_delete_result(self, deleted, client_ids):
+        if deleted is False:
+            messagebox.showerror("Error", "Failed to delete clients. Nothing was deleted.")
+            log_activity(
+                action="Client Batch Delete - Failed",
+                user_data_before={"identifiers": client_ids},
+                user_data_after={"status": "failed to delete"},
+                user_id=", ".join(client_ids)
+            )
+            return
+
+        self.found_ids = []
+        # Um único registro de auditoria para o lote inteiro
+        log_activity(
+            action="Client Batch Delete",
+            user_data_before={result.client_id: result.before for result in deleted},
+            user_data_after={"status": "deleted", "count": len(deleted)},
+            user_id=", ".join(str(result.client_id) for result in deleted)
+        )
+        missing = len(client_ids) - len(deleted)
+        message = f"{len(deleted)} clients deleted successfully!"
+        if missing:
+            message += f" {missing} no longer existed."
+        messagebox.showinfo("Success", message)
+
+if __name__ == "__main__":
+    root = ctk.CTk()
+    root.withdraw()
+    app = ClientBatchApp(root)
+    root.mainloop()
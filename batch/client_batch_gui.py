@@ -0,0 +1,67 @@
+import customtkinter as ctk
+from tkinter import messagebox
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.centerWindow import centerWindow
+from utils.config_manager import ConfigManager # Import the class
+from utils.log_viewer_app import LogViewerApp
+
+class ClientBatchGUI(ctk.CTkToplevel):
+    def __init__(self, root=None):
+        super().__init__(root)
+        self.config_manager = ConfigManager() # Get the singleton instance
+        self.title("Batch Lookup / Delete")
+        self.geometry(centerWindow.center_window(self, root, self.config_manager.APP_SETTINGS["APP_WIDTH"], self.config_manager.APP_SETTINGS["APP_HEIGHT"]))
+        self.grab_set()
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(3, weight=1)
+        self.setup_gui_elements()
+
+    def setup_gui_elements(self):
+        for widget in self.winfo_children():
+            widget.destroy()
+
+        ctk.CTkLabel(self, text="XCLIENTES, CGC, Name, or Inscrição (one per line or separated by ';'):").grid(row=0, column=0, padx=10, pady=5, sticky=ctk.W)
+        self.identifiers_text = ctk.CTkTextbox(self, height=150)
+        self.identifiers_text.grid(row=1, column=0, padx=10, pady=5, sticky=ctk.NSEW)
+
+        self.summary_label = ctk.CTkLabel(self, text="")
+        self.summary_label.grid(row=2, column=0, padx=10, pady=5, sticky=ctk.W)
+
+        # Encontrados e não encontrados, um por linha
+        self.results_text = ctk.CTkTextbox(self, state="disabled")
+        self.results_text.grid(row=3, column=0, padx=10, pady=5, sticky=ctk.NSEW)
+
+        button_frame = ctk.CTkFrame(self)
+        button_frame.grid(row=4, column=0, pady=20, sticky="nsew")
+        for column in range(3):
+            button_frame.columnconfigure(column, weight=1)
+
+        btn_lookup = ctk.CTkButton(button_frame, text="Lookup", command=self.handle_lookup)
+        btn_lookup.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
+
+        btn_delete = ctk.CTkButton(button_frame, text="Delete Found", command=self.handle_delete_found, fg_color="#A51F1F", hover_color="#701414")
+        btn_delete.grid(row=0, column=1, padx=10, pady=10, sticky="nsew")
+
+        btn_view_logs = ctk.CTkButton(button_frame, text="Ver Logs", command=self.open_log_viewer_screen)
+        btn_view_logs.grid(row=0, column=2, padx=10, pady=10, sticky="nsew")
+
+    def get_identifiers_text(self):
+        return self.identifiers_text.get("1.0", ctk.END)
+
+    def show_results_text(self, lines, summary):
+        self.summary_label.configure(text=summary)
+        self.results_text.configure(state="normal")
+        self.results_text.delete("1.0", ctk.END)
+        self.results_text.insert("1.0", "\n".join(lines))
+        self.results_text.configure(state="disabled")
+
+    def open_log_viewer_screen(self):
+        # Open the log viewer screen as a Toplevel window
+        log_viewer_app = LogViewerApp(self)
+        log_viewer_app.grab_set() # Make it modal
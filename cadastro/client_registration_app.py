@@ -5,13 +5,15 @@ import os
 # Add the parent directory to the Python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils.db_operations import connect_to_database, insert_client_data
+from utils.db_operations import insert_client_data, get_write_journal, QueuedWrite
+from utils.id_allocator import get_xclientes_allocator
+from utils.db_executor import DbTaskMixin, call_on_ui
 from utils.validation_utils import validate_fields
 from utils.config_manager import INTERNAL_DEFAULT_FIELDS
 from cadastro.client_registration_gui import ClientRegistrationGUI
 import customtkinter as ctk # Keep ctk for the mainloop at the end
 
-class ClientRegistrationApp(ClientRegistrationGUI):
+class ClientRegistrationApp(DbTaskMixin, ClientRegistrationGUI):
     def __init__(self, master=None):
         super().__init__(master)
         # The GUI setup is now handled by ClientRegistrationGUI's __init__
@@ -19,21 +21,13 @@ class ClientRegistrationApp(ClientRegistrationGUI):
         # These commands are defined in this class (business logic)
 
     def get_next_xclientes(self):
-        """Retorna o próximo valor de XCLIENTES baseado no maior existente no banco."""
-        conn = connect_to_database()
-        if conn is None:
-            return None
+        """Retorna o próximo XCLIENTES reservado pelo alocador de ids (único mesmo com vários operadores)."""
         try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT MAX(CAST(XCLIENTES AS INT)) FROM SM11_PROD.dbo.FBCLIENTES")
-            result = cursor.fetchone()[0]
-            return str((int(result) + 1) if result is not None else 1)
+            return get_xclientes_allocator().next_id()
         except Exception as e:
-            messagebox.showerror("Database Error", f"Error fetching next XCLIENTES: {e}")
+            if get_write_journal() is None: # Com o diário offline o cadastro vai para a fila sem id
+                call_on_ui(messagebox.showerror, "Database Error", f"Error fetching next XCLIENTES: {e}")
             return None
-        finally:
-            if conn:
-                conn.close()
 
     def handle_insert_client(self):
         """
@@ -41,17 +35,34 @@ class ClientRegistrationApp(ClientRegistrationGUI):
         """
         # Access INTERNAL_DEFAULT_FIELDS directly from the module
         current_internal_defaults = INTERNAL_DEFAULT_FIELDS.copy()
-        current_internal_defaults["XCLIENTES"] = self.get_next_xclientes()
 
         client_data = {field: self.entry_widgets[field].get().strip() for field in self.entry_widgets}
         client_data.update(current_internal_defaults)
 
-        validation_errors = validate_fields(client_data, self.VALIDATION_RULES)
+        # XCLIENTES só é reservado depois da validação, para não gastar ids com formulários inválidos
+        form_rules = {field: rule for field, rule in self.VALIDATION_RULES.items() if field != "XCLIENTES"}
+        validation_errors = validate_fields(client_data, form_rules)
         if validation_errors:
             messagebox.showerror("Validation Error", "\n".join(validation_errors))
             return
 
-        if insert_client_data(client_data):
+        self.run_db_task(self.register_client, client_data, on_success=self.show_insert_result, key="insert", write=True)
+
+    def register_client(self, client_data):
+        """Roda no executor de banco: reserva o XCLIENTES e insere. Retorna None se não houve id."""
+        client_data["XCLIENTES"] = self.get_next_xclientes()
+        if client_data["XCLIENTES"] is None and get_write_journal() is None:
+            return None # get_next_xclientes already showed the error
+        # Sem XCLIENTES o insert vai para o diário offline e o id é reservado no reenvio
+        return insert_client_data(client_data)
+
+    def show_insert_result(self, inserted):
+        if inserted is None:
+            return
+        if isinstance(inserted, QueuedWrite):
+            messagebox.showinfo("Salvo offline", "banco fora do ar: o cadastro foi guardado e será enviado quando a conexão voltar.")
+            self.clear_form_fields()
+        elif inserted:
             messagebox.showinfo("sucesso", "cliente registrado com sucesso!")
             self.clear_form_fields() # clear_form_fields is now in ClientRegistrationGUI
         else:
@@ -10,6 +10,7 @@ from utils.cep_integration import on_cep_focus_out, fill_address_fields
 from utils.settings_window import SettingsWindow
 from utils.centerWindow import centerWindow
 from utils.config_manager import ConfigManager # Import the class
+from utils.db_operations import get_validation_rules
 
 class ClientRegistrationGUI(ctk.CTkToplevel):
     def __init__(self, master=None):
@@ -30,7 +31,8 @@ class ClientRegistrationGUI(ctk.CTkToplevel):
     def update_field_and_validation_rules(self):
         """Updates FIELDS and VALIDATION_RULES based on the current CLIENT_FIELDS_CONFIG."""
         self.FIELDS = [field["name"] for field in self.config_manager.CLIENT_FIELDS_CONFIG if field["name"] != "XCLIENTES"]
-        self.VALIDATION_RULES = {field["name"]: (field["max_length"], field["required"]) for field in self.config_manager.CLIENT_FIELDS_CONFIG}
+        # max_length vem do tamanho real da coluna quando os metadados da FBCLIENTES já foram carregados
+        self.VALIDATION_RULES = get_validation_rules()
 
     def setup_gui_elements(self):
         # Clear existing widgets if any, for dynamic updates
@@ -5,12 +5,13 @@ import os
 # Add the parent directory to the Python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils.db_operations import delete_client_data, get_client_data
+from utils.db_operations import delete_client_data, QueuedWrite
+from utils.db_executor import DbTaskMixin
 from delete.client_delete_gui import ClientDeleteGUI
 import customtkinter as ctk # Keep ctk for the mainloop at the end
 from utils.logger import log_activity
 
-class ClientDeleteApp(ClientDeleteGUI):
+class ClientDeleteApp(DbTaskMixin, ClientDeleteGUI):
     def __init__(self, root=None):
         super().__init__(root)
         # The GUI setup is now handled by ClientDeleteGUI's __init__
@@ -21,38 +22,51 @@ class ClientDeleteApp(ClientDeleteGUI):
             messagebox.showerror("Input Error", "Please enter XCLIENTES, CGC, Name, or Inscrição to delete.")
             return
 
-        # Get client data before deletion for logging
-        client_data_before_delete = get_client_data(identifier)
+        # Resolve, capture the before image and delete in a single round trip, off the Tk thread
+        self.run_db_task(
+            delete_client_data, identifier,
+            on_success=lambda result: self.show_delete_result(result, identifier),
+            key="delete",
+            write=True
+        )
 
-        if client_data_before_delete:
+    def show_delete_result(self, result, identifier):
+        if isinstance(result, QueuedWrite):
+            messagebox.showinfo("Saved Offline", "The database is unreachable: the delete was queued and will be sent when the connection returns.")
+            self.entry_widgets["identifier"].delete(0, ctk.END)
+            log_activity(
+                action="Client Delete - Queued Offline",
+                user_data_before={"identifier": identifier},
+                user_id=result.client_id or identifier
+            )
+        elif result:
+            messagebox.showinfo("Success", "Client deleted successfully!")
+            self.entry_widgets["identifier"].delete(0, ctk.END)
             log_activity(
                 action="Client Delete - Before",
-                user_data_before=client_data_before_delete,
-                user_id=identifier # Using identifier as user_id for logging
+                user_data_before=result.before,
+                user_id=result.client_id
             )
-            if delete_client_data(identifier):
-                messagebox.showinfo("Success", "Client deleted successfully!")
-                self.entry_widgets["identifier"].delete(0, ctk.END)
-                log_activity(
-                    action="Client Delete - After",
-                    user_data_after={"status": "deleted"}, # Indicate successful deletion
-                    user_id=identifier
-                )
-            else:
-                messagebox.showerror("Error", "Failed to delete client. Client not found or an error occurred.")
-                log_activity(
-                    action="Client Delete - Failed",
-                    user_data_before=client_data_before_delete,
-                    user_data_after={"status": "failed to delete"},
-                    user_id=identifier
-                )
-        else:
+            log_activity(
+                action="Client Delete - After",
+                user_data_after={"status": "deleted"}, # Indicate successful deletion
+                user_id=result.client_id
+            )
+        elif result is None:
             messagebox.showerror("Error", "Client not found for deletion.")
             log_activity(
                 action="Client Delete - Not Found",
                 user_data_before={"identifier": identifier, "status": "not found"},
                 user_id=identifier
             )
+        else:
+            messagebox.showerror("Error", "Failed to delete client. Client not found or an error occurred.")
+            log_activity(
+                action="Client Delete - Failed",
+                user_data_before={"identifier": identifier},
+                user_data_after={"status": "failed to delete"},
+                user_id=identifier
+            )
 
 if __name__ == "__main__":
     root = ctk.CTk()
@@ -4,10 +4,16 @@ from cadastro.client_registration_app import ClientRegistrationApp
 from update.client_update_app import ClientUpdateApp
 from delete.client_delete_app import ClientDeleteApp
 from read.client_read_app import ClientReadApp
+from batch.client_batch_app import ClientBatchApp
 from utils.centerWindow import centerWindow
 from utils.config_manager import ConfigManager
 from utils.updater import AppUpdater # Import the updater
 from utils.settings_window import SettingsWindow # Import SettingsWindow
+from utils.diagnostics_app import DiagnosticsApp
+from utils.write_journal_app import WriteJournalApp
+from utils.db_operations import get_snapshot, get_name_index, get_schema_cache, get_health_status, get_circuit_breaker, get_write_journal
+
+HEALTH_REFRESH_MS = 1000
 
 class MainMenuApp:
     def __init__(self, root):
@@ -34,9 +40,25 @@ class MainMenuApp:
             print("Warning: version.py not found. Running in development mode, update checks skipped.")
             # No updater initialized if in development mode
 
+        # Começa a sincronizar a cópia local da FBCLIENTES, a montar o índice de nomes e a conferir os metadados em segundo plano
+        get_snapshot()
+        get_name_index()
+        get_schema_cache()
+        get_write_journal() # Reenvia o que ficou na fila offline de sessões anteriores
+
         self.create_widgets()
+        self.refresh_health_banner()
 
     def create_widgets(self):
+        # Banner de conexão: só aparece com o banco fora do ar (circuito aberto), no lugar das mensagens de erro repetidas
+        self.health_banner = ctk.CTkFrame(self.root, fg_color="#A51F1F")
+        self.health_label = ctk.CTkLabel(self.health_banner, text="", text_color="white")
+        self.health_label.pack(side="left", padx=10, pady=5)
+        btn_retry = ctk.CTkButton(self.health_banner, text="Tentar agora", width=100,
+                                  command=get_circuit_breaker().probe_now)
+        btn_retry.pack(side="right", padx=10, pady=5)
+        self.health_banner_visible = False
+
         # Create a frame to hold the buttons
         button_frame = ctk.CTkFrame(self.root)
         button_frame.pack(expand=True, fill='both', pady=20) # Center the frame and make it expand
@@ -61,11 +83,47 @@ class MainMenuApp:
                                    fg_color="#dc3545", hover_color="#c82333")
         btn_delete.pack(pady=10, fill='x', padx=20)
 
+        # Botão Lote (buscar/deletar vários de uma vez)
+        btn_batch = ctk.CTkButton(button_frame, text="Buscar/Deletar em Lote", command=self.open_batch_client_screen,
+                                  fg_color="#fd7e14", hover_color="#c96410")
+        btn_batch.pack(pady=10, fill='x', padx=20)
+
         # Botão Configurações
         btn_settings = ctk.CTkButton(button_frame, text="Configurações", command=self.open_settings_screen,
                                      fg_color="#6c757d", hover_color="#5a6268")
         btn_settings.pack(pady=10, fill='x', padx=20)
 
+        # Botão Diagnóstico (tempos das chamadas de banco ao vivo)
+        btn_diagnostics = ctk.CTkButton(button_frame, text="Diagnóstico", command=self.open_diagnostics_screen,
+                                        fg_color="#6c757d", hover_color="#5a6268")
+        btn_diagnostics.pack(pady=10, fill='x', padx=20)
+
+        # Botão Fila Offline (escritas guardadas com o banco fora do ar)
+        btn_journal = ctk.CTkButton(button_frame, text="Fila Offline", command=self.open_write_journal_screen,
+                                    fg_color="#6c757d", hover_color="#5a6268")
+        btn_journal.pack(pady=10, fill='x', padx=20)
+        self.button_frame = button_frame
+
+    def refresh_health_banner(self):
+        status = get_health_status()
+        if status["state"] == "closed":
+            if self.health_banner_visible:
+                self.health_banner.pack_forget()
+                self.health_banner_visible = False
+        else:
+            if status["state"] == "half_open":
+                detail = "testando a conexão..."
+            else:
+                detail = f"nova tentativa em {status['retry_in']:.0f}s"
+            journal = get_write_journal()
+            pending = journal.counts().get("pending", 0) if journal is not None else 0
+            if pending:
+                detail += f" ({pending} escritas na fila offline)"
+            self.health_label.configure(text=f"Banco de dados indisponível: {detail}")
+            if not self.health_banner_visible:
+                self.health_banner.pack(fill='x', before=self.button_frame)
+                self.health_banner_visible = True
+        self.root.after(HEALTH_REFRESH_MS, self.refresh_health_banner)
 
     def open_create_client_screen(self):
         # esconde o menu enquanto client estiver aberto
@@ -93,6 +151,18 @@ class MainMenuApp:
         client_app = ClientDeleteApp(self.root)
         client_app.protocol("WM_DELETE_WINDOW", lambda: self.on_client_app_close(client_app))
 
+    def open_batch_client_screen(self):
+        client_app = ClientBatchApp(self.root)
+        client_app.protocol("WM_DELETE_WINDOW", lambda: self.on_client_app_close(client_app))
+
+    def open_diagnostics_screen(self):
+        # Não esconde o menu: a janela fica aberta ao lado das telas enquanto se usa o sistema
+        DiagnosticsApp(self.root)
+
+    def open_write_journal_screen(self):
+        # Como o diagnóstico, fica aberta ao lado das outras telas
+        WriteJournalApp(self.root)
+
     def open_settings_screen(self):
         # Pass self.root as master and a dummy function for on_close_callback if not needed
         settings_window = SettingsWindow(self.root, self.root, lambda: None) 
@@ -5,15 +5,42 @@ import os
 # Add the parent directory to the Python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils.db_operations import get_client_data
+from utils.db_operations import get_client_data, get_snapshot_status, search_clients
+from utils.db_executor import DbTaskMixin
 from read.client_read_gui import ClientReadGUI
 import customtkinter as ctk # Keep ctk for the mainloop at the end
 from utils.config_manager import CLIENT_FIELDS_CONFIG # Keep for db_column mapping
 
-class ClientReadApp(ClientReadGUI):
+SNAPSHOT_STATUS_REFRESH_MS = 2000
+
+class ClientReadApp(DbTaskMixin, ClientReadGUI):
     def __init__(self, root=None):
         super().__init__(root)
         # The GUI setup is now handled by ClientReadGUI's __init__
+        self._snapshot_status_job = None
+        self.refresh_snapshot_status()
+
+    def refresh_snapshot_status(self):
+        """Mostra linhas e atraso da cópia local, atualizando a cada poucos segundos."""
+        status = get_snapshot_status()
+        if status is None:
+            return
+        if not status["ready"]:
+            text = "Local snapshot: loading, searches go to the server"
+        else:
+            lag = "never synced" if status["lag_seconds"] is None else f"synced {status['lag_seconds']:.0f}s ago"
+            text = f"Local snapshot: {status['rows']} rows (server: {status['server_rows']}), {lag}"
+        if status["last_error"]:
+            text += f" - last sync failed: {status['last_error']}"
+        self.snapshot_label.configure(text=text)
+        self._snapshot_status_job = self.after(SNAPSHOT_STATUS_REFRESH_MS, self.refresh_snapshot_status)
+
+    def destroy(self):
+        # Para o ciclo de atualização antes de a janela sumir
+        if self._snapshot_status_job is not None:
+            self.after_cancel(self._snapshot_status_job)
+            self._snapshot_status_job = None
+        super().destroy()
 
     def search_client(self):
         identifier = self.search_entry.get().strip()
@@ -21,7 +48,38 @@ class ClientReadApp(ClientReadGUI):
             messagebox.showerror("Input Error", "Please enter NRECNO or CGC to search.")
             return
 
-        client_data = get_client_data(identifier)
+        # A busca roda fora da thread do Tk; uma nova busca substitui a anterior
+        self.search_query = identifier
+        self.results_list.reset()
+        self.load_results_page(None)
+
+    def load_results_page(self, after_key):
+        """Próxima página de registros leves da busca atual (after_key None: a primeira)."""
+        self.run_db_task(
+            search_clients, self.search_query, after_key=after_key,
+            on_success=lambda page: self.show_results_page(page, first_page=after_key is None),
+            on_error=self.show_results_error,
+            key="search"
+        )
+
+    def show_results_page(self, page, first_page=False):
+        records, next_key = page
+        self.results_list.add_page(records, next_key)
+        if not first_page:
+            return
+        if not records:
+            self.show_search_result(None)
+        elif len(records) == 1 and next_key is None:
+            self.on_result_selected(records[0]) # Um único resultado: abre direto
+
+    def show_results_error(self, error):
+        self.results_list.load_failed() # Libera a rolagem para tentar a página de novo
+        messagebox.showerror("Database Error", f"An unexpected error occurred: {error}")
+
+    def on_result_selected(self, record):
+        self.run_db_task(get_client_data, record["XCLIENTES"], on_success=self.show_search_result, key="select")
+
+    def show_search_result(self, client_data):
         if client_data:
             self.populate_display_fields(client_data) # populate_display_fields is now in ClientReadGUI
         else:
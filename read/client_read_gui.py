@@ -8,6 +8,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from utils.centerWindow import centerWindow
 from utils.config_manager import ConfigManager # Import the class
+from utils.search_results_list import SearchResultsList
 
 class ClientReadGUI(ctk.CTkToplevel):
     def __init__(self, root=None):
@@ -45,6 +46,14 @@ class ClientReadGUI(ctk.CTkToplevel):
             display_label.grid(row=idx + 1, column=1, padx=5, pady=5, sticky=ctk.EW)
             self.display_widgets[field] = display_label
 
+        # Todos os clientes que casam com a busca; o cadastro completo só é lido ao selecionar um
+        self.results_list = SearchResultsList(self, on_select=self.on_result_selected, on_load_more=self.load_results_page)
+        self.results_list.grid(row=1, column=3, rowspan=max(1, len(self.FIELDS)), padx=10, pady=5, sticky=ctk.NSEW)
+
+        # Status da cópia local da FBCLIENTES (vazio quando SNAPSHOT_ENABLED está desligado)
+        self.snapshot_label = ctk.CTkLabel(self, text="", text_color="gray")
+        self.snapshot_label.grid(row=len(self.FIELDS) + 1, column=0, columnspan=3, padx=10, pady=5, sticky=ctk.W)
+
     def populate_display_fields(self, data):
         self.clear_display_fields()
         for field_name, display_label in self.display_widgets.items():
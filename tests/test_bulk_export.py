@@ -0,0 +1,75 @@
+import unittest
+from unittest.mock import patch
+import tempfile
+import gzip
+import json
+import csv
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import db_operations
+from utils.bulk_export import export_clients, build_export_query
+
+class TestBulkExport(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        db_config = {"BACKEND": "sqlite", "SQLITE_PATH": os.path.join(self.tmpdir.name, "clients.db")}
+        self.config_patch = patch.object(db_operations.config_manager, "DB_CONFIG", db_config)
+        self.config_patch.start()
+        db_operations._on_config_changed({"DB_CONFIG"})
+        self.messagebox_patch = patch('utils.db_operations.messagebox')
+        self.mock_messagebox = self.messagebox_patch.start()
+        # Inseridos fora de ordem para conferir a ordenação por XCLIENTES
+        for xclientes, razao, cidade in (("13", 'Acme "Matriz", Ltda', "Curitiba"), ("11", "Beta\nFilial", "Curitiba"),
+                                         ("15", "Gama", "São Paulo"), ("12", "Delta", "Curitiba"), ("14", "Épsilon; S/A", "Curitiba")):
+            db_operations.insert_client_data({"XCLIENTES": xclientes, "CLIENTE": razao, "CGC": f"{xclientes}000", "CIDADE": cidade})
+
+    def tearDown(self):
+        db_operations.get_connection_pool().close_all()
+        self.config_patch.stop()
+        self.messagebox_patch.stop()
+        db_operations._on_config_changed({"DB_CONFIG"})
+        self.tmpdir.cleanup()
+
+    def _columns(self):
+        return [field["db_column"] for field in db_operations.config_manager.CLIENT_FIELDS_CONFIG]
+
+    def test_query_filters_and_order(self):
+        sql, params = build_export_query(["XCLIENTES", "RAZAO"], "FBCLIENTES", estado="PR", xclientes_from=10, xclientes_to="14 ")
+        # A própria chave na faixa (busca no índice), nunca uma conversão dela
+        self.assertEqual(sql, "SELECT XCLIENTES, RAZAO FROM FBCLIENTES WHERE ESTADO = ? AND XCLIENTES >= ? AND XCLIENTES <= ? "
+                              "ORDER BY XCLIENTES")
+        self.assertEqual(params, ["PR", "10", "14"])
+
+    def test_csv_columns_order_and_escaping_across_chunks(self):
+        path = os.path.join(self.tmpdir.name, "clients.csv")
+        progress = []
+        report = export_clients(path, chunk_size=2, progress_callback=lambda r: progress.append(r.chunks))
+
+        self.assertEqual((report.rows, report.chunks), (5, 3)) # 2 + 2 + 1: passa da borda de cada bloco
+        self.assertEqual(progress, [1, 2, 3])
+        with open(path, encoding="utf-8", newline="") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], self._columns()) # Todas as colunas configuradas, na ordem da configuração
+        by_column = [dict(zip(rows[0], row)) for row in rows[1:]]
+        self.assertEqual([row["XCLIENTES"] for row in by_column], ["11", "12", "13", "14", "15"])
+        self.assertEqual(by_column[0]["RAZAO"], "Beta\nFilial")
+        self.assertEqual(by_column[2]["RAZAO"], 'Acme "Matriz", Ltda')
+        self.assertEqual(by_column[3]["RAZAO"], "Épsilon; S/A")
+
+    def test_jsonl_gzip_with_filters(self):
+        path = os.path.join(self.tmpdir.name, "clients.jsonl.gz")
+        report = export_clients(path, chunk_size=1, cidade="Curitiba", xclientes_from=12)
+
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(report.rows, 3)
+        self.assertEqual([row["XCLIENTES"] for row in rows], ["12", "13", "14"])
+        self.assertEqual(list(rows[0]), self._columns())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import tempfile
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import db_operations
+from utils.bulk_import import import_clients, build_column_mapping, ImportReport
+
+CSV = """razao;cgc;cidade;xclientes
+Acme Ltda;11222333000144;Curitiba;999
+;55666777000188;Curitiba;
+Beta S/A;99888777000166;São Paulo;
+"""
+
+class TestBulkImport(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        db_config = {"BACKEND": "sqlite", "SQLITE_PATH": os.path.join(self.tmpdir.name, "clients.db")}
+        self.config_patch = patch.object(db_operations.config_manager, "DB_CONFIG", db_config)
+        self.config_patch.start()
+        db_operations._on_config_changed({"DB_CONFIG"})
+        self.messagebox_patch = patch('utils.db_operations.messagebox')
+        self.mock_messagebox = self.messagebox_patch.start()
+
+    def tearDown(self):
+        db_operations.get_connection_pool().close_all()
+        self.config_patch.stop()
+        self.messagebox_patch.stop()
+        db_operations._on_config_changed({"DB_CONFIG"})
+        self.tmpdir.cleanup()
+
+    def _file(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def test_column_mapping_accepts_field_and_column_names(self):
+        mapping = build_column_mapping(["razao", "CLIENTE", " cgc ", "XCLIENTES", "other"], db_operations.config_manager.CLIENT_FIELDS_CONFIG)
+        self.assertEqual(mapping, {"razao": "CLIENTE", "CLIENTE": "CLIENTE", " cgc ": "CGC"}) # XCLIENTES é reservado
+
+    def test_imports_valid_rows_and_rejects_invalid_ones(self):
+        reject_path = os.path.join(self.tmpdir.name, "rejects.csv")
+        progress = []
+        report = import_clients(self._file("clients.csv", CSV), batch_size=10, reject_path=reject_path, progress_callback=progress.append)
+
+        self.assertEqual((report.rows_read, report.inserted, report.rejected, report.batches), (3, 2, 1, 1))
+        self.assertEqual(report.rejects[0][0], 3) # Linha do arquivo sem razão social
+        with open(reject_path, encoding="utf-8") as f:
+            self.assertTrue(f.read().startswith("3,"))
+        self.assertEqual(len(progress), 1)
+
+        acme = db_operations.get_client_data("11222333000144")
+        self.assertEqual(acme["RAZAO"], "Acme Ltda")
+        self.assertNotEqual(acme["XCLIENTES"], "999") # O id vem do alocador, não do arquivo
+        self.assertEqual(db_operations.get_client_data("99888777000166")["CIDADE"], "São Paulo")
+        self.mock_messagebox.showerror.assert_not_called()
+
+    def test_jsonl_with_invalid_line(self):
+        path = self._file("clients.jsonl", '{"CLIENTE": "Acme", "CGC": "111"}\n\nnot json\n{"RAZAO": "Beta", "CGC": "222"}\n')
+        report = import_clients(path)
+        self.assertEqual((report.inserted, report.rejected), (2, 1))
+        self.assertIn("Invalid JSON", report.rejects[0][1][0])
+
+    def test_imported_rows_notify_mutation_listeners(self):
+        events = []
+        listener = lambda operation, client_id, before, after: events.append((operation, client_id, after["RAZAO"]))
+        db_operations.add_mutation_listener(listener)
+        try:
+            import_clients(self._file("clients.csv", CSV))
+        finally:
+            db_operations.remove_mutation_listener(listener)
+        self.assertEqual([(operation, razao) for operation, _, razao in events], [("insert", "Acme Ltda"), ("insert", "Beta S/A")])
+        cache_hits = db_operations.get_client_cache().stats()["hits"]
+        db_operations.get_client_data(events[0][1])
+        self.assertEqual(db_operations.get_client_cache().stats()["hits"], cache_hits + 1)
+
+    def test_failed_batch_is_retried_row_by_row(self):
+        db_operations.insert_client_data({"XCLIENTES": "500", "CLIENTE": "Existente", "CGC": "000"})
+        allocator = MagicMock()
+        allocator.reserve_block.return_value = ["500", "501"] # O primeiro já existe: o lote inteiro falha
+        with patch('utils.id_allocator.get_xclientes_allocator', return_value=allocator):
+            report = import_clients(self._file("clients.csv", CSV))
+
+        self.assertEqual((report.inserted, report.rejected), (1, 2))
+        self.assertIn("Database error", report.rejects[1][1][0])
+        self.assertEqual(db_operations.get_client_data("501")["RAZAO"], "Beta S/A")
+        self.assertEqual(db_operations.get_client_data("500")["RAZAO"], "Existente")
+        self.assertIsNotNone(allocator.reserve_block.call_args[0][1]) # Reserva na conexão do lote
+
+    def test_pool_of_one_connection(self):
+        settings = dict(db_operations.config_manager.APP_SETTINGS, DB_POOL_MAX_SIZE=1, DB_POOL_ACQUIRE_TIMEOUT=1)
+        with patch.object(db_operations.config_manager, "APP_SETTINGS", settings):
+            db_operations._on_config_changed({"APP_SETTINGS"})
+            try:
+                report = import_clients(self._file("clients.csv", CSV), batch_size=1)
+            finally:
+                db_operations._on_config_changed({"APP_SETTINGS"})
+        self.assertEqual((report.inserted, report.batches), (2, 2))
+
+    def test_report_summary(self):
+        report = ImportReport()
+        report.rows_read, report.inserted = 10, 9
+        report.add_reject(4, ["CGC is required"])
+        self.assertIn("10 rows read, 9 inserted, 1 rejected", report.summary())
+
+if __name__ == '__main__':
+    unittest.main()
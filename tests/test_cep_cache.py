@@ -0,0 +1,58 @@
+import unittest
+import tempfile
+import time
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.cep_cache import CepCache, SOURCE_MEMORY, SOURCE_DISK
+
+ADDRESS = {"cep": "80010-000", "logradouro": "Praça Tiradentes", "bairro": "Centro", "localidade": "Curitiba", "uf": "PR"}
+
+class TestCepCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "cep_cache.db")
+        self.cache = CepCache(self.path, memory_entries=2, disk_entries=100)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmpdir.cleanup()
+
+    def test_memory_then_disk_across_sessions(self):
+        self.cache.put("80010000", ADDRESS)
+        self.assertEqual(self.cache.get("80010000"), (SOURCE_MEMORY, ADDRESS))
+        self.assertIsNone(self.cache.get("01001000"))
+        self.cache.close()
+
+        reopened = CepCache(self.path, memory_entries=2, disk_entries=100)
+        try:
+            self.assertEqual(reopened.get("80010000"), (SOURCE_DISK, ADDRESS))
+            self.assertEqual(reopened.get("80010000")[0], SOURCE_MEMORY) # Promovido para a memória
+            stats = reopened.stats()
+            self.assertEqual((stats["memory_hits"], stats["disk_hits"], stats["hit_ratio"]), (1, 1, 1.0))
+        finally:
+            reopened.close()
+
+    def test_negative_entries_and_ttl(self):
+        self.cache.configure(negative_ttl=0.05)
+        self.cache.put_not_found("99999999")
+        self.assertEqual(self.cache.get("99999999"), (SOURCE_MEMORY, None))
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get("99999999")) # Vencido na memória e no disco
+        self.assertEqual(self.cache.stats()["negative_hits"], 1)
+
+    def test_size_eviction(self):
+        self.cache.configure(disk_entries=3)
+        for i in range(5):
+            self.cache.put(f"8001000{i}", ADDRESS)
+        stats = self.cache.stats()
+        self.assertEqual(stats["memory_entries"], 2)
+        self.assertLessEqual(stats["disk_entries"], 3)
+        self.assertIsNotNone(self.cache.get("80010004"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import threading
+import time
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import requests
+from utils import cep_integration
+from utils.cep_cache import CepCache
+from utils.cep_client import CepClient, CepLookupError
+
+ADDRESS = {"cep": "80010-000", "logradouro": "Praça Tiradentes", "bairro": "Centro", "localidade": "Curitiba", "uf": "PR"}
+
+def _response(data=None, status=200):
+    return MagicMock(status_code=status, json=MagicMock(return_value=data))
+
+class TestCepClient(unittest.TestCase):
+
+    def setUp(self):
+        self.session = MagicMock()
+        self.client = CepClient(CepCache(None), workers=1, queue_limit=1, backoff=0, session=self.session)
+        self.client_patch = patch.object(cep_integration, "_cep_client", self.client)
+        self.client_patch.start()
+
+    def tearDown(self):
+        self.client_patch.stop()
+        self.client.close()
+
+    def test_second_lookup_skips_network(self):
+        self.session.get.return_value = _response(ADDRESS)
+        success, error = MagicMock(), MagicMock()
+
+        cep_integration.fetch_address_thread("80010000", success, error)
+        cep_integration.fetch_address_thread("80010000", success, error)
+
+        self.session.get.assert_called_once()
+        self.assertEqual(success.call_count, 2)
+        stats = self.client.cache.stats()
+        self.assertEqual((stats["memory_hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["latency"]["network"]["count"], 1)
+
+    def test_not_found_is_cached(self):
+        self.session.get.return_value = _response({"erro": True})
+        success, error = MagicMock(), MagicMock()
+
+        cep_integration.fetch_address_thread("99999999", success, error)
+        cep_integration.fetch_address_thread("99999999", success, error)
+
+        self.session.get.assert_called_once()
+        success.assert_not_called()
+        self.assertEqual(error.call_count, 2)
+        error.assert_called_with("Invalid CEP", "CEP not found.")
+
+    def test_retries_transient_errors(self):
+        self.session.get.side_effect = [requests.exceptions.ConnectionError("reset"), _response(status=503), _response(ADDRESS)]
+        self.assertEqual(self.client.lookup("80010000"), ADDRESS)
+        self.assertEqual(self.client.stats()["retries"], 2)
+
+        self.session.get.side_effect = [_response(status=503)] * 3
+        with self.assertRaises(CepLookupError):
+            self.client.lookup("01001000")
+
+    def test_bounded_queue_rejects_instead_of_spawning_threads(self):
+        release = threading.Event()
+        def slow_get(url, timeout):
+            release.wait(2)
+            return _response(ADDRESS)
+        self.session.get.side_effect = slow_get
+        done = threading.Event()
+        error = MagicMock()
+
+        self.client.submit("80010001", lambda data: None, error) # Ocupa o único worker
+        time.sleep(0.05)
+        self.client.submit("80010002", lambda data: done.set(), error) # Fica na fila
+        self.client.submit("80010003", lambda data: None, error) # Fila cheia
+        error.assert_called_once_with("CEP Lookup Busy", "Too many CEP lookups in progress. Please try again.")
+
+        release.set()
+        self.assertTrue(done.wait(2))
+        self.assertEqual(self.client.stats()["rejected"], 1)
+
+    def _block_worker(self):
+        """Ocupa o único worker com uma consulta lenta; retorna o Event que a libera."""
+        release = threading.Event()
+        def get(url, timeout):
+            if url.endswith("/00000000/json/"):
+                release.wait(2)
+            return _response(dict(ADDRESS, cep=url.split("/")[-3]))
+        self.session.get.side_effect = get
+        self.client.submit("00000000", lambda data: None, MagicMock())
+        time.sleep(0.05)
+        return release
+
+    def test_identical_ceps_in_flight_share_one_request(self):
+        release = self._block_worker()
+        results = []
+        done = threading.Event()
+        self.client.submit("80010000", results.append, MagicMock())
+        self.client.submit("80010000", lambda data: (results.append(data), done.set()), MagicMock())
+
+        release.set()
+        self.assertTrue(done.wait(2))
+        self.assertEqual(len(results), 2)
+        self.assertEqual(self.session.get.call_count, 2) # 00000000 e uma só para 80010000
+        self.assertEqual(self.client.stats()["coalesced"], 1)
+
+    def test_superseded_lookup_is_cancelled_before_the_network(self):
+        release = self._block_worker()
+        widget = MagicMock()
+        fill, warn, error = MagicMock(), MagicMock(), MagicMock()
+        done = threading.Event()
+
+        widget.get.return_value = "80010-001"
+        first = cep_integration.on_cep_focus_out(widget, fill, warn, error)
+        self.assertIs(cep_integration.on_cep_focus_out(widget, fill, warn, error), first) # Mesmo CEP: não pede outra
+        widget.get.return_value = "80010-002"
+        cep_integration.on_cep_focus_out(widget, lambda data: (fill(data), done.set()), warn, error)
+        self.assertTrue(first.cancelled)
+
+        release.set()
+        self.assertTrue(done.wait(2))
+        fill.assert_called_once()
+        self.assertEqual(fill.call_args[0][0]["cep"], "80010002")
+        requested = [call[0][0] for call in self.session.get.call_args_list]
+        self.assertFalse(any("80010001" in url for url in requested))
+        self.assertEqual(self.client.stats()["skipped"], 1)
+
+    def test_stale_result_does_not_overwrite_fields(self):
+        widgets = {name: MagicMock() for name in ("CEP", "ENDERECO", "CIDADE")}
+        widgets["CEP"].get.return_value = "80010-002"
+
+        cep_integration.fill_address_fields(widgets, dict(ADDRESS, cep="80010-001"))
+        widgets["CIDADE"].insert.assert_not_called()
+        cep_integration.fill_address_fields(widgets, dict(ADDRESS, cep="80010-002"))
+        widgets["CIDADE"].insert.assert_called_once_with(0, "Curitiba")
+
+if __name__ == '__main__':
+    unittest.main()
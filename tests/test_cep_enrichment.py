@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import tempfile
+import sqlite3
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import db_operations
+from utils.cep_cache import CepCache
+from utils.cep_client import CepClient
+from utils.cep_enrichment import enrich_clients, save_checkpoint
+
+ADDRESSES = {
+    "80010000": {"cep": "80010-000", "logradouro": "Praça Tiradentes", "bairro": "Centro", "localidade": "Curitiba", "uf": "PR"},
+    "01001000": {"cep": "01001-000", "logradouro": "Praça da Sé", "bairro": "Sé", "localidade": "São Paulo", "uf": "SP"},
+}
+
+class TestCepEnrichment(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        db_config = {"BACKEND": "sqlite", "SQLITE_PATH": os.path.join(self.tmpdir.name, "clients.db")}
+        self.config_patch = patch.object(db_operations.config_manager, "DB_CONFIG", db_config)
+        self.config_patch.start()
+        db_operations._on_config_changed({"DB_CONFIG"})
+        self.messagebox_patch = patch('utils.db_operations.messagebox')
+        self.messagebox_patch.start()
+        self.checkpoint = os.path.join(self.tmpdir.name, "checkpoint.json")
+
+        self.session = MagicMock()
+        self.session.get.side_effect = self._get
+        self.client = CepClient(CepCache(None), session=self.session, backoff=0)
+
+        self._insert("10", "80010-000", CIDADE="Curitiba", ESTADO="PR")
+        self._insert("11", "80010000")
+        self._insert("12", "01001000", ENDERECO="Rua Velha", BAIRRO="Sé", CIDADE="São Paulo", ESTADO="SP", LOGRADOURO="Praça da Sé")
+        self._insert("13", "99999999")
+        self._insert("14", "123")
+
+    def tearDown(self):
+        self.client.close()
+        db_operations.get_connection_pool().close_all()
+        self.config_patch.stop()
+        self.messagebox_patch.stop()
+        db_operations._on_config_changed({"DB_CONFIG"})
+        self.tmpdir.cleanup()
+
+    def _get(self, url, timeout):
+        cep = url.split("/")[-3]
+        return MagicMock(status_code=200, json=MagicMock(return_value=ADDRESSES.get(cep, {"erro": True})))
+
+    def _insert(self, xclientes, cep, **fields):
+        data = {"XCLIENTES": xclientes, "CLIENTE": f"Client {xclientes}", "CGC": f"9{xclientes}", "CEP": cep}
+        data.update(fields)
+        self.assertTrue(db_operations.insert_client_data(data))
+
+    def _enrich(self, **kwargs):
+        return enrich_clients(self.client, page_size=2, rate=0, checkpoint_path=self.checkpoint, **kwargs)
+
+    def test_dry_run_changes_nothing(self):
+        report = self._enrich(dry_run=True)
+        self.assertEqual((report.rows_read, report.rows_changed), (4, 2)) # 12 já está completo
+        self.assertIsNone(db_operations.get_client_data("11")["CIDADE"])
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_fills_blank_columns_with_one_request_per_cep(self):
+        report = self._enrich()
+
+        self.assertEqual((report.rows_changed, report.ceps, report.ceps_not_found, report.invalid_ceps), (2, 2, 1, 1))
+        self.assertEqual(self.session.get.call_count, 2) # 80010000 (duas linhas) e 99999999
+        row = db_operations.get_client_data("11")
+        self.assertEqual((row["ENDERECO"], row["LOGRA"], row["BAIRRO"], row["CIDADE"], row["ESTADO"]),
+                         ("Praça Tiradentes", "Praça Tiradentes", "Centro", "Curitiba", "PR"))
+        self.assertEqual(db_operations.get_client_data("10")["BAIRRO"], "Centro")
+        self.assertFalse(os.path.exists(self.checkpoint)) # Terminou: próxima execução começa do início
+
+    def test_written_rows_notify_mutation_listeners(self):
+        events = []
+        listener = lambda operation, client_id, before, after: events.append((operation, client_id, before["CIDADE"], after["CIDADE"]))
+        db_operations.add_mutation_listener(listener)
+        try:
+            self._enrich()
+        finally:
+            db_operations.remove_mutation_listener(listener)
+        self.assertEqual(sorted(events), [("update", "10", "Curitiba", "Curitiba"), ("update", "11", None, "Curitiba")])
+
+    def test_rows_changed_after_being_read_are_skipped(self):
+        def get_and_edit_elsewhere(url, timeout):
+            # Outra estação grava a cidade do 11 enquanto a ViaCEP responde
+            with sqlite3.connect(os.path.join(self.tmpdir.name, "clients.db")) as other:
+                other.execute("UPDATE FBCLIENTES SET CIDADE = 'Pinhais' WHERE XCLIENTES = '11'")
+            other.close()
+            return self._get(url, timeout)
+        self.session.get.side_effect = get_and_edit_elsewhere
+
+        report = self._enrich()
+        self.assertEqual((report.rows_changed, report.rows_conflicted), (1, 1))
+        self.assertEqual(db_operations.get_client_data("11")["CIDADE"], "Pinhais")
+        self.assertIsNone(db_operations.get_client_data("11")["BAIRRO"]) # A linha inteira fica como está
+        self.assertEqual(db_operations.get_client_data("10")["BAIRRO"], "Centro")
+
+    def test_overwrite_fixes_inconsistent_rows(self):
+        self._enrich(overwrite=True)
+        self.assertEqual(db_operations.get_client_data("12")["ENDERECO"], "Praça da Sé")
+
+    def test_resumes_after_checkpoint(self):
+        save_checkpoint(self.checkpoint, {"after_key": "10", "overwrite": False})
+        report = self._enrich()
+        self.assertEqual(report.rows_read, 3)
+        self.assertIsNone(db_operations.get_client_data("10")["BAIRRO"]) # Antes do checkpoint: já processado
+        self.assertEqual(db_operations.get_client_data("11")["BAIRRO"], "Centro")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import tempfile
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.cep_cache import CepCache, SOURCE_OFFLINE
+from utils.cep_client import CepClient
+from utils.cep_offline import OfflineCepDatabase, OfflineCepError, import_csv, refresh_from_csv
+
+CSV = """cep;logradouro;complemento;bairro;cidade;uf
+80010-000;Praça Tiradentes;;Centro;Curitiba;PR
+01001-000;Praça da Sé;lado ímpar;Sé;São Paulo;SP
+80020000;Rua XV de Novembro;;Centro;Curitiba;PR
+invalido;Rua;;;;
+"""
+
+class TestOfflineCepDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "ceps.bin")
+        self.count = import_csv(self._csv("full.csv", CSV), self.db_path)
+        self.database = OfflineCepDatabase(self.db_path)
+
+    def tearDown(self):
+        self.database.close()
+        self.tmpdir.cleanup()
+
+    def _csv(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def test_binary_search_lookup(self):
+        self.assertEqual(self.count, 3)
+        self.assertEqual(self.database.lookup("01001000"), {
+            "cep": "01001-000", "logradouro": "Praça da Sé", "complemento": "lado ímpar",
+            "bairro": "Sé", "localidade": "São Paulo", "uf": "SP",
+        })
+        self.assertEqual(self.database.lookup("80020-000")["logradouro"], "Rua XV de Novembro")
+        self.assertIsNone(self.database.lookup("80010001"))
+        self.assertIsNone(self.database.lookup("99999999"))
+        self.assertIsNone(self.database.lookup("123"))
+
+    def test_strings_are_stored_once(self):
+        with open(self.db_path, "rb") as f:
+            data = f.read()
+        self.assertEqual(data.count("Curitiba".encode("utf-8")), 1)
+
+    def test_incremental_refresh(self):
+        delta = self._csv("delta.csv", "cep,logradouro,bairro,cidade,uf,removido\n"
+                                       "80010000,Praça Tiradentes,Centro Histórico,Curitiba,PR,\n"
+                                       "01001000,,,,,1\n"
+                                       "70040010,Esplanada dos Ministérios,Zona Cívico-Administrativa,Brasília,DF,\n")
+        count, changes = refresh_from_csv(delta, self.db_path, database=self.database)
+
+        self.assertEqual((count, changes), (3, 3))
+        self.assertEqual(self.database.lookup("80010000")["bairro"], "Centro Histórico") # Reaberto após a troca
+        self.assertIsNone(self.database.lookup("01001000"))
+        self.assertEqual(self.database.lookup("70040010")["uf"], "DF")
+        self.assertEqual(self.database.lookup("80020000")["localidade"], "Curitiba")
+
+    def test_rejects_other_files(self):
+        other = self._csv("other.bin", "not a database")
+        with self.assertRaises(OfflineCepError):
+            OfflineCepDatabase(other)
+
+    def test_client_uses_offline_database_before_viacep(self):
+        session = MagicMock()
+        session.get.return_value = MagicMock(status_code=200, json=MagicMock(return_value={"erro": True}))
+        client = CepClient(CepCache(None), session=session, providers=[self.database])
+        try:
+            self.assertEqual(client.lookup("80010000")["localidade"], "Curitiba")
+            session.get.assert_not_called()
+            self.assertEqual(client.cache.stats()["latency"][SOURCE_OFFLINE]["count"], 1)
+            self.assertIsNone(client.lookup("99999999")) # Fora da base: ViaCEP
+            session.get.assert_called_once()
+        finally:
+            client.close()
+
+    def test_offline_database_wins_over_cached_answer(self):
+        session = MagicMock()
+        client = CepClient(CepCache(None), session=session, providers=[self.database])
+        try:
+            client.cache.put("80010000", {"cep": "80010-000", "bairro": "Antigo"}) # Resposta antiga da ViaCEP
+            client.cache.put_not_found("80020000")
+            self.assertEqual(client.lookup("80010000")["bairro"], "Centro")
+            self.assertEqual(client.lookup("80020000")["logradouro"], "Rua XV de Novembro")
+            session.get.assert_not_called()
+        finally:
+            client.close()
+
+    def test_refresh_keeps_old_database_when_file_is_in_use(self):
+        delta = self._csv("delta.csv", "cep,logradouro,bairro,cidade,uf\n80010000,Praça Tiradentes,Centro Histórico,Curitiba,PR\n")
+        with patch('utils.cep_offline.os.replace', side_effect=PermissionError("in use")):
+            with self.assertRaises(OfflineCepError):
+                refresh_from_csv(delta, self.db_path, database=self.database)
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)), ["ceps.bin", "delta.csv", "full.csv"]) # Sem temporários
+        self.assertEqual(self.database.lookup("80010000")["bairro"], "Centro") # Reaberta na base antiga
+
+if __name__ == '__main__':
+    unittest.main()
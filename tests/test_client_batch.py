@@ -0,0 +1,77 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from batch.client_batch_app import ClientBatchApp
+from utils.db_operations import MutationResult
+from utils.db_executor import InlineExecutor
+import customtkinter as ctk
+
+class TestClientBatchApp(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.root = ctk.CTk()
+        cls.root.withdraw()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.root.destroy()
+
+    def setUp(self):
+        self.mock_messagebox = patch('batch.client_batch_app.messagebox').start()
+        self.mock_log_activity = patch('batch.client_batch_app.log_activity').start()
+        # Mock the super().__init__ to avoid full GUI initialization
+        self.mock_super_init = patch('batch.client_batch_gui.ClientBatchGUI.__init__', MagicMock(return_value=None)).start()
+        self.mock_show_results_text = patch('batch.client_batch_gui.ClientBatchGUI.show_results_text').start()
+        patch('batch.client_batch_gui.ClientBatchGUI.get_identifiers_text', return_value="111\nacme;999\n111\n").start()
+
+        self.app = ClientBatchApp(self.root)
+        self.app.db_executor = InlineExecutor() # Run DB calls synchronously in tests
+
+    def tearDown(self):
+        patch.stopall()
+
+    @patch('batch.client_batch_app.resolve_clients_batch')
+    def test_lookup_shows_found_and_not_found(self, mock_resolve):
+        mock_resolve.return_value = [
+            ("111", {"XCLIENTES": "1", "RAZAO": "Acme"}, "CGC"),
+            ("acme", {"XCLIENTES": "1", "RAZAO": "Acme"}, "RAZAO"),
+            ("999", None, None),
+        ]
+        self.app.handle_lookup()
+
+        mock_resolve.assert_called_once_with(["111", "acme", "999"])
+        lines, summary = self.mock_show_results_text.call_args[0]
+        self.assertEqual([line.split("\t")[0] for line in lines], ["FOUND", "FOUND", "NOT FOUND"])
+        self.assertEqual(summary, "Found: 2  Not found: 1  Total: 3")
+        self.assertEqual(self.app.found_ids, ["1"])
+
+    @patch('batch.client_batch_app.delete_clients_batch')
+    def test_delete_found_writes_one_audit_entry(self, mock_delete):
+        self.app.found_ids = ["1", "2"]
+        self.mock_messagebox.askyesno.return_value = True
+        mock_delete.return_value = [MutationResult("1", before={"XCLIENTES": "1"}), MutationResult("2", before={"XCLIENTES": "2"})]
+
+        self.app.handle_delete_found()
+
+        mock_delete.assert_called_once_with(["1", "2"])
+        self.mock_log_activity.assert_called_once()
+        self.assertEqual(self.mock_log_activity.call_args[1]["action"], "Client Batch Delete")
+        self.assertEqual(self.mock_log_activity.call_args[1]["user_data_before"], {"1": {"XCLIENTES": "1"}, "2": {"XCLIENTES": "2"}})
+        self.mock_messagebox.showinfo.assert_called_once_with("Success", "2 clients deleted successfully!")
+        self.assertEqual(self.app.found_ids, [])
+
+    @patch('batch.client_batch_app.delete_clients_batch')
+    def test_delete_not_confirmed(self, mock_delete):
+        self.app.found_ids = ["1"]
+        self.mock_messagebox.askyesno.return_value = False
+        self.app.handle_delete_found()
+        mock_delete.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.client_cache import ClientCache
+
+class TestClientCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ClientCache(max_entries=2, max_bytes=1024 * 1024, ttl=60)
+
+    def _row(self, xclientes, cgc, inscricao=None):
+        return {"XCLIENTES": xclientes, "RAZAO": f"Client {xclientes}", "CGC": cgc, "INSCRICAO": inscricao}
+
+    def test_hit_by_primary_and_secondary_keys(self):
+        self.cache.put(self._row("1", "111", "ISS-1"))
+
+        self.assertEqual(self.cache.get("XCLIENTES", "1")["CGC"], "111")
+        self.assertEqual(self.cache.get("CGC", "111")["XCLIENTES"], "1")
+        self.assertEqual(self.cache.get("INSCRICAO", "ISS-1")["XCLIENTES"], "1")
+        self.assertIsNone(self.cache.get("CGC", "999"))
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (3, 1))
+
+    def test_lru_eviction_by_entry_count(self):
+        self.cache.put(self._row("1", "111"))
+        self.cache.put(self._row("2", "222"))
+        self.cache.get("XCLIENTES", "1") # "2" becomes the least recently used
+        self.cache.put(self._row("3", "333"))
+
+        self.assertIsNone(self.cache.get("CGC", "222"))
+        self.assertIsNotNone(self.cache.get("XCLIENTES", "1"))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_memory_bound(self):
+        self.cache.configure(max_entries=100, max_bytes=1500)
+        for idx in range(10):
+            self.cache.put(self._row(str(idx), str(idx)))
+        self.assertLessEqual(self.cache.stats()["bytes"], 1500)
+        self.assertLess(self.cache.stats()["entries"], 10)
+
+    def test_entries_expire(self):
+        with patch("utils.client_cache.time.monotonic", return_value=0):
+            self.cache.put(self._row("1", "111"))
+        with patch("utils.client_cache.time.monotonic", return_value=61):
+            self.assertIsNone(self.cache.get("XCLIENTES", "1"))
+        self.assertEqual(self.cache.stats()["expirations"], 1)
+
+    def test_secondary_key_follows_changes(self):
+        self.cache.put(self._row("1", "111"))
+        self.cache.merge({"XCLIENTES": "1", "CGC": "222"})
+
+        self.assertIsNone(self.cache.get("CGC", "111"))
+        self.assertEqual(self.cache.get("CGC", "222")["RAZAO"], "Client 1")
+        self.cache.invalidate("1")
+        self.assertIsNone(self.cache.get("XCLIENTES", "1"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,6 +7,8 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from delete.client_delete_app import ClientDeleteApp
+from utils.db_operations import MutationResult
+from utils.db_executor import InlineExecutor
 import customtkinter as ctk
 
 class TestClientDeleteApp(unittest.TestCase):
@@ -29,6 +31,7 @@ class TestClientDeleteApp(unittest.TestCase):
         self.mock_setup_gui_elements = patch('delete.client_delete_gui.ClientDeleteGUI.setup_gui_elements').start()
 
         self.app = ClientDeleteApp(self.root)
+        self.app.db_executor = InlineExecutor() # Run DB calls synchronously in tests
         # Manually set entry_widgets as setup_gui_elements is mocked
         self.app.entry_widgets = {
             "identifier": MagicMock(get=MagicMock(return_value="12345"), delete=MagicMock())
@@ -39,7 +42,7 @@ class TestClientDeleteApp(unittest.TestCase):
 
     @patch('delete.client_delete_app.delete_client_data') # Patch where it's used
     def test_handle_delete_client_success(self, mock_delete_client_data):
-        mock_delete_client_data.return_value = True
+        mock_delete_client_data.return_value = MutationResult("000001", before={"XCLIENTES": "000001"})
         self.app.handle_delete_client() # Call the method directly
         mock_delete_client_data.assert_called_once_with("12345")
         self.mock_messagebox.showinfo.assert_called_once_with("Success", "Client deleted successfully!")
@@ -53,6 +56,14 @@ class TestClientDeleteApp(unittest.TestCase):
         self.mock_messagebox.showerror.assert_called_once_with("Error", "Failed to delete client. Client not found or an error occurred.")
         self.app.entry_widgets["identifier"].delete.assert_not_called()
 
+    @patch('delete.client_delete_app.delete_client_data') # Patch where it's used
+    def test_handle_delete_client_not_found(self, mock_delete_client_data):
+        mock_delete_client_data.return_value = None
+        self.app.handle_delete_client() # Call the method directly
+        mock_delete_client_data.assert_called_once_with("12345")
+        self.mock_messagebox.showerror.assert_called_once_with("Error", "Client not found for deletion.")
+        self.app.entry_widgets["identifier"].delete.assert_not_called()
+
     @patch('delete.client_delete_app.delete_client_data') # Patch here to ensure it's not called
     def test_handle_delete_client_empty_identifier(self, mock_delete_client_data):
         self.app.entry_widgets["identifier"].get.return_value = ""
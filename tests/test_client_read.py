@@ -7,6 +7,7 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from read.client_read_app import ClientReadApp
+from utils.db_executor import InlineExecutor
 import customtkinter as ctk
 from utils.config_manager import CLIENT_FIELDS_CONFIG
 
@@ -33,6 +34,7 @@ class TestClientReadApp(unittest.TestCase):
         self.mock_clear_display_fields = patch('read.client_read_gui.ClientReadGUI.clear_display_fields').start()
 
         self.app = ClientReadApp(self.root)
+        self.app.db_executor = InlineExecutor() # Run DB calls synchronously in tests
         # Manually set search_entry as setup_gui_elements is mocked
         self.app.search_entry = MagicMock(get=MagicMock(return_value="12345"))
         # Manually set display_widgets and FIELDS as setup_gui_elements is mocked
@@ -40,30 +42,70 @@ class TestClientReadApp(unittest.TestCase):
             "Nome": MagicMock(), "CGC": MagicMock(), "XCLIENTES": MagicMock()
         }
         self.app.FIELDS = [field["name"] for field in CLIENT_FIELDS_CONFIG]
+        self.app.results_list = MagicMock()
 
 
     def tearDown(self):
         patch.stopall()
 
+    @patch('customtkinter.CTkToplevel.destroy')
+    @patch('read.client_read_app.get_snapshot_status')
+    def test_snapshot_status_refresh_stops_on_destroy(self, mock_status, mock_destroy):
+        mock_status.return_value = {"ready": True, "rows": 10, "server_rows": 10, "lag_seconds": 1.0, "last_error": None}
+        self.app.snapshot_label = MagicMock()
+        with patch.object(self.app, 'after', return_value="after#1") as mock_after, \
+             patch.object(self.app, 'after_cancel') as mock_after_cancel:
+            self.app.refresh_snapshot_status()
+            mock_after.assert_called_once()
+
+            self.app.destroy()
+
+        mock_after_cancel.assert_called_once_with("after#1")
+        mock_destroy.assert_called_once()
+
+    @patch('read.client_read_app.search_clients')
     @patch('read.client_read_app.get_client_data') # Patch where it's used
-    def test_search_client_found(self, mock_get_client_data):
+    def test_search_client_found(self, mock_get_client_data, mock_search_clients):
         mock_client_data = {"NOME": "Test Client", "CGC": "12345678901234", "XCLIENTES": "000001"}
+        mock_search_clients.return_value = ([{"XCLIENTES": "000001", "RAZAO": "Test Client"}], None)
         mock_get_client_data.return_value = mock_client_data
         
         self.app.search_client() # Call the method directly
         
-        mock_get_client_data.assert_called_once_with("12345")
+        mock_search_clients.assert_called_once_with("12345", after_key=None)
+        # A single match is opened right away with the full row
+        mock_get_client_data.assert_called_once_with("000001")
         self.mock_populate_display_fields.assert_called_once_with(mock_client_data)
         self.mock_messagebox.showwarning.assert_not_called()
         self.mock_clear_display_fields.assert_not_called()
 
+    @patch('read.client_read_app.search_clients')
+    @patch('read.client_read_app.get_client_data')
+    def test_search_client_many_matches_lists_first_page(self, mock_get_client_data, mock_search_clients):
+        records = [{"XCLIENTES": str(idx), "RAZAO": "Test"} for idx in range(3)]
+        mock_search_clients.return_value = (records, "2")
+
+        self.app.search_client()
+
+        self.app.results_list.reset.assert_called_once()
+        self.app.results_list.add_page.assert_called_once_with(records, "2")
+        mock_get_client_data.assert_not_called() # Full row only on selection
+
+        mock_search_clients.return_value = ([{"XCLIENTES": "3", "RAZAO": "Test"}], None)
+        self.app.load_results_page("2") # Scrolled to the end
+        mock_search_clients.assert_called_with("12345", after_key="2")
+
+        self.app.on_result_selected(records[1])
+        mock_get_client_data.assert_called_once_with("1")
+
+    @patch('read.client_read_app.search_clients')
     @patch('read.client_read_app.get_client_data') # Patch where it's used
-    def test_search_client_not_found(self, mock_get_client_data):
-        mock_get_client_data.return_value = None
+    def test_search_client_not_found(self, mock_get_client_data, mock_search_clients):
+        mock_search_clients.return_value = ([], None)
         
         self.app.search_client() # Call the method directly
         
-        mock_get_client_data.assert_called_once_with("12345")
+        mock_get_client_data.assert_not_called()
         self.mock_populate_display_fields.assert_not_called()
         self.mock_messagebox.showwarning.assert_called_once_with("Not Found", "Client not found.")
         self.mock_clear_display_fields.assert_called_once()
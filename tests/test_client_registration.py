@@ -7,6 +7,7 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from cadastro.client_registration_app import ClientRegistrationApp
+from utils.db_executor import InlineExecutor
 import customtkinter as ctk
 
 class TestClientRegistrationApp(unittest.TestCase):
@@ -32,6 +33,7 @@ class TestClientRegistrationApp(unittest.TestCase):
         self.mock_clear_form_fields = patch('cadastro.client_registration_gui.ClientRegistrationGUI.clear_form_fields').start()
 
         self.app = ClientRegistrationApp(self.root)
+        self.app.db_executor = InlineExecutor() # Run DB calls synchronously in tests
         
         # Manually set attributes that are normally set by ClientRegistrationGUI.__init__
         # and setup_gui_elements, but are needed for the business logic tests.
@@ -64,11 +66,10 @@ class TestClientRegistrationApp(unittest.TestCase):
     def tearDown(self):
         patch.stopall()
 
-    @patch('cadastro.client_registration_app.connect_to_database') # Patch where it's used
     @patch('cadastro.client_registration_app.insert_client_data') # Patch where it's used
     @patch('cadastro.client_registration_app.validate_fields') # Patch where it's used
     @patch('cadastro.client_registration_app.INTERNAL_DEFAULT_FIELDS', {"XCLIENTES": "000001", "FILIAL": "01"})
-    def test_handle_insert_client_success(self, mock_validate_fields, mock_insert_client_data, mock_connect_to_database):
+    def test_handle_insert_client_success(self, mock_validate_fields, mock_insert_client_data):
         mock_validate_fields.return_value = [] # No validation errors
         mock_insert_client_data.return_value = True # Successful insertion
         
@@ -78,29 +79,30 @@ class TestClientRegistrationApp(unittest.TestCase):
 
             mock_validate_fields.assert_called_once()
             mock_insert_client_data.assert_called_once()
+            self.assertEqual(mock_insert_client_data.call_args[0][0]["XCLIENTES"], "000002")
             self.mock_messagebox.showinfo.assert_called_once_with("sucesso", "cliente registrado com sucesso!")
             self.mock_clear_form_fields.assert_called_once()
 
-    @patch('cadastro.client_registration_app.connect_to_database') # Patch where it's used
     @patch('cadastro.client_registration_app.insert_client_data') # Patch where it's used
     @patch('cadastro.client_registration_app.validate_fields') # Patch where it's used
     @patch('cadastro.client_registration_app.INTERNAL_DEFAULT_FIELDS', {"XCLIENTES": "000001", "FILIAL": "01"})
-    def test_handle_insert_client_validation_error(self, mock_validate_fields, mock_insert_client_data, mock_connect_to_database):
+    def test_handle_insert_client_validation_error(self, mock_validate_fields, mock_insert_client_data):
         mock_validate_fields.return_value = ["Name is required."] # Validation errors
         mock_insert_client_data.return_value = False # Should not be called
 
-        self.app.handle_insert_client() # Call the method directly
+        with patch.object(self.app, 'get_next_xclientes') as mock_get_next_xclientes:
+            self.app.handle_insert_client() # Call the method directly
+            mock_get_next_xclientes.assert_not_called() # No id is reserved for an invalid form
 
         mock_validate_fields.assert_called_once()
         mock_insert_client_data.assert_not_called()
         self.mock_messagebox.showerror.assert_called_once_with("Validation Error", "Name is required.")
         self.mock_clear_form_fields.assert_not_called()
 
-    @patch('cadastro.client_registration_app.connect_to_database') # Patch where it's used
     @patch('cadastro.client_registration_app.insert_client_data') # Patch where it's used
     @patch('cadastro.client_registration_app.validate_fields') # Patch where it's used
     @patch('cadastro.client_registration_app.INTERNAL_DEFAULT_FIELDS', {"XCLIENTES": "000001", "FILIAL": "01"})
-    def test_handle_insert_client_db_error(self, mock_validate_fields, mock_insert_client_data, mock_connect_to_database):
+    def test_handle_insert_client_db_error(self, mock_validate_fields, mock_insert_client_data):
         mock_validate_fields.return_value = []
         mock_insert_client_data.return_value = False # Database insertion failed
 
@@ -112,50 +114,33 @@ class TestClientRegistrationApp(unittest.TestCase):
             self.mock_messagebox.showerror.assert_called_once_with("Erro", "não foi possivel enviar.")
             self.mock_clear_form_fields.assert_not_called()
 
-    @patch('cadastro.client_registration_app.connect_to_database') # Patch where it's used
-    def test_get_next_xclientes_success(self, mock_connect_to_database):
-        mock_conn = MagicMock()
-        mock_cursor = MagicMock()
-        mock_connect_to_database.return_value = mock_conn
-        mock_conn.cursor.return_value = mock_cursor
-        mock_cursor.fetchone.return_value = (123,) # Simulate existing max XCLIENTES
+    @patch('cadastro.client_registration_app.insert_client_data') # Patch where it's used
+    @patch('cadastro.client_registration_app.validate_fields') # Patch where it's used
+    def test_handle_insert_client_allocator_error(self, mock_validate_fields, mock_insert_client_data):
+        mock_validate_fields.return_value = []
 
-        result = self.app.get_next_xclientes()
-        self.assertEqual(result, "124")
-        mock_cursor.execute.assert_called_once_with("SELECT MAX(CAST(XCLIENTES AS INT)) FROM SM11_PROD.dbo.FBCLIENTES")
-        mock_conn.close.assert_called_once()
+        with patch.object(self.app, 'get_next_xclientes', return_value=None):
+            self.app.handle_insert_client() # Call the method directly
 
-    @patch('cadastro.client_registration_app.connect_to_database') # Patch where it's used
-    def test_get_next_xclientes_no_existing_data(self, mock_connect_to_database):
-        mock_conn = MagicMock()
-        mock_cursor = MagicMock()
-        mock_connect_to_database.return_value = mock_conn
-        mock_conn.cursor.return_value = mock_cursor
-        mock_cursor.fetchone.return_value = (None,) # Simulate no existing max XCLIENTES
+        mock_insert_client_data.assert_not_called()
+        self.mock_clear_form_fields.assert_not_called()
 
-        result = self.app.get_next_xclientes()
-        self.assertEqual(result, "1")
-        mock_conn.close.assert_called_once()
+    @patch('cadastro.client_registration_app.get_xclientes_allocator') # Patch where it's used
+    def test_get_next_xclientes_success(self, mock_get_allocator):
+        mock_get_allocator.return_value.next_id.return_value = "124"
 
-    @patch('cadastro.client_registration_app.connect_to_database', return_value=None) # Patch where it's used
-    def test_get_next_xclientes_db_connection_fail(self, mock_connect_to_database):
         result = self.app.get_next_xclientes()
-        self.assertIsNone(result)
-        # The error message is handled by the caller, not this method directly
-        self.mock_messagebox.showerror.assert_not_called() 
+        self.assertEqual(result, "124")
+        mock_get_allocator.return_value.next_id.assert_called_once()
+        self.mock_messagebox.showerror.assert_not_called()
 
-    @patch('cadastro.client_registration_app.connect_to_database') # Patch where it's used
-    def test_get_next_xclientes_db_query_error(self, mock_connect_to_database):
-        mock_conn = MagicMock()
-        mock_cursor = MagicMock()
-        mock_connect_to_database.return_value = mock_conn
-        mock_conn.cursor.return_value = mock_cursor
-        mock_cursor.execute.side_effect = Exception("DB Query Error")
+    @patch('cadastro.client_registration_app.get_xclientes_allocator') # Patch where it's used
+    def test_get_next_xclientes_allocator_error(self, mock_get_allocator):
+        mock_get_allocator.return_value.next_id.side_effect = Exception("DB Query Error")
 
         result = self.app.get_next_xclientes()
         self.assertIsNone(result)
         self.mock_messagebox.showerror.assert_called_once_with("Database Error", "Error fetching next XCLIENTES: DB Query Error")
-        mock_conn.close.assert_called_once()
 
 if __name__ == '__main__':
     unittest.main()
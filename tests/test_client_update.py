@@ -7,6 +7,8 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from update.client_update_app import ClientUpdateApp
+from utils.db_operations import MutationResult
+from utils.db_executor import InlineExecutor
 import customtkinter as ctk
 from utils.config_manager import CLIENT_FIELDS_CONFIG
 
@@ -33,6 +35,7 @@ class TestClientUpdateApp(unittest.TestCase):
         self.mock_clear_form_fields = patch('update.client_update_gui.ClientUpdateGUI.clear_form_fields').start()
 
         self.app = ClientUpdateApp(self.root)
+        self.app.db_executor = InlineExecutor() # Run DB calls synchronously in tests
         # Manually set attributes as setup_gui_elements is mocked
         self.app.search_entry = MagicMock(get=MagicMock(return_value="12345"))
         self.app.entry_widgets = {
@@ -60,31 +63,39 @@ class TestClientUpdateApp(unittest.TestCase):
             "Email": (50, False)
         }
         self.app.FIELDS = list(self.app.entry_widgets.keys()) # Ensure FIELDS is populated
+        self.app.clear_checkboxes = {field: MagicMock(get=MagicMock(return_value=False)) for field in self.app.FIELDS}
+        # Current DB row used to keep values of fields left empty in the form
+        self.mock_get_client_data = patch('update.client_update_app.get_client_data', return_value={"XCLIENTES": "000001", "CGC": "12345678901234"}).start()
         self.app.current_xclientes = None # Initialize as it's used in handle_update_client
+        self.app.results_list = MagicMock()
 
     def tearDown(self):
         patch.stopall()
 
+    @patch('update.client_update_app.search_clients')
     @patch('update.client_update_app.get_client_data') # Patch where it's used
-    def test_search_client_found(self, mock_get_client_data):
+    def test_search_client_found(self, mock_get_client_data, mock_search_clients):
         mock_client_data = {"NOME": "Old Name", "CGC": "12345678901234", "XCLIENTES": "000001"}
+        mock_search_clients.return_value = ([{"XCLIENTES": "000001", "RAZAO": "Old Name"}], None)
         mock_get_client_data.return_value = mock_client_data
         
         self.app.search_client() # Call the method directly
         
-        mock_get_client_data.assert_called_once_with("12345")
+        mock_search_clients.assert_called_once_with("12345", after_key=None)
+        mock_get_client_data.assert_called_once_with("000001")
         self.mock_populate_form_fields.assert_called_once_with(mock_client_data)
         self.assertEqual(self.app.current_xclientes, "000001")
         self.mock_messagebox.showwarning.assert_not_called()
         self.mock_clear_form_fields.assert_not_called()
 
+    @patch('update.client_update_app.search_clients')
     @patch('update.client_update_app.get_client_data') # Patch where it's used
-    def test_search_client_not_found(self, mock_get_client_data):
-        mock_get_client_data.return_value = None
+    def test_search_client_not_found(self, mock_get_client_data, mock_search_clients):
+        mock_search_clients.return_value = ([], None)
         
         self.app.search_client() # Call the method directly
         
-        mock_get_client_data.assert_called_once_with("12345")
+        mock_get_client_data.assert_not_called()
         self.mock_populate_form_fields.assert_not_called()
         self.assertIsNone(self.app.current_xclientes)
         self.mock_messagebox.showwarning.assert_called_once_with("Not Found", "Client not found.")
@@ -106,13 +117,31 @@ class TestClientUpdateApp(unittest.TestCase):
     def test_handle_update_client_success(self, mock_validate_fields, mock_update_client_data):
         self.app.current_xclientes = "000001" # Simulate client loaded
         mock_validate_fields.return_value = []
-        mock_update_client_data.return_value = True
+        after_image = {"XCLIENTES": "000001", "CGC": "12345678901234"}
+        mock_update_client_data.return_value = MutationResult("000001", before={"XCLIENTES": "000001", "CGC": "1"}, after=after_image, changed_fields=("CGC",))
 
         self.app.handle_update_client() # Call the method directly
 
         mock_validate_fields.assert_called_once()
         mock_update_client_data.assert_called_once()
         self.mock_messagebox.showinfo.assert_called_once_with("Success", "Client updated successfully!")
+        # The form is refreshed from the after image, without searching the database again
+        self.mock_populate_form_fields.assert_called_once_with(after_image)
+        self.mock_get_client_data.assert_called_once_with("000001")
+        # The current row is passed along so only changed columns are written
+        self.assertEqual(mock_update_client_data.call_args[1]["before_data"], self.mock_get_client_data.return_value)
+
+    @patch('update.client_update_app.update_client_data') # Patch where it's used
+    @patch('update.client_update_app.validate_fields') # Patch where it's used
+    def test_handle_update_client_nothing_changed(self, mock_validate_fields, mock_update_client_data):
+        self.app.current_xclientes = "000001"
+        mock_validate_fields.return_value = []
+        mock_update_client_data.return_value = MutationResult("000001", before={}, after={}, changed_fields=())
+
+        self.app.handle_update_client() # Call the method directly
+
+        self.mock_messagebox.showinfo.assert_called_once_with("No Changes", "Nothing to update: no field was changed.")
+        self.mock_populate_form_fields.assert_not_called()
 
     @patch('update.client_update_app.update_client_data') # Patch where it's used
     @patch('update.client_update_app.validate_fields') # Patch where it's used
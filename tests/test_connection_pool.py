@@ -0,0 +1,152 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import threading
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.config_manager import ConfigManager
+from utils.connection_pool import ConnectionPool, PoolTimeout
+
+class TestConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.created = []
+
+        def factory():
+            conn = MagicMock()
+            self.created.append(conn)
+            return conn
+
+        self.pool = ConnectionPool(factory, max_size=2, idle_timeout=300, ping_interval=None, acquire_timeout=0.1)
+
+    def test_reuses_released_connection(self):
+        conn = self.pool.acquire()
+        conn.close()
+        conn_again = self.pool.acquire()
+
+        self.assertIs(conn.raw, conn_again.raw)
+        self.assertEqual(len(self.created), 1)
+        stats = self.pool.stats()
+        self.assertEqual(stats["creates"], 1)
+        self.assertEqual(stats["hits"], 1)
+        self.created[0].rollback.assert_called_once() # Open transaction is ended on release
+        self.created[0].close.assert_not_called()
+
+    def test_bounded_size_waits_then_times_out(self):
+        self.pool.acquire()
+        self.pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            self.pool.acquire()
+        self.assertEqual(self.pool.stats()["waits"], 1)
+
+    def test_waiter_gets_released_connection(self):
+        first = self.pool.acquire()
+        self.pool.acquire()
+        result = {}
+
+        def borrow():
+            result["conn"] = self.pool.acquire(timeout=2)
+
+        waiter = threading.Thread(target=borrow)
+        waiter.start()
+        first.close()
+        waiter.join(2)
+
+        self.assertIs(result["conn"].raw, first.raw)
+        self.assertEqual(len(self.created), 2)
+
+    def test_dead_connection_is_replaced_on_checkout(self):
+        self.pool.ping_interval = 0
+        conn = self.pool.acquire()
+        conn.close()
+        self.created[0].cursor.return_value.execute.side_effect = Exception("connection reset")
+
+        replacement = self.pool.acquire()
+
+        self.assertIs(replacement.raw, self.created[1])
+        self.created[0].close.assert_called_once()
+        self.assertEqual(self.pool.stats()["ping_failures"], 1)
+
+    def test_idle_timeout_closes_connection(self):
+        self.pool.idle_timeout = 0.01
+        conn = self.pool.acquire()
+        conn.close()
+        conn.last_used -= 1
+
+        self.pool.acquire()
+
+        self.created[0].close.assert_called_once()
+        self.assertEqual(len(self.created), 2)
+
+    def test_rebuild_discards_idle_and_checked_out_connections(self):
+        idle = self.pool.acquire()
+        busy = self.pool.acquire()
+        idle.close()
+
+        self.pool.rebuild()
+        self.created[0].close.assert_called_once()
+
+        busy.close()
+        self.created[1].close.assert_called_once()
+        self.assertEqual(self.pool.stats()["open"], 0)
+
+    def test_prepared_cursor_reused_until_statements_cleared(self):
+        conn = self.pool.acquire()
+        cursor = conn.prepared_cursor("SELECT 1")
+        self.assertIs(conn.prepared_cursor("SELECT 1"), cursor)
+        self.assertEqual(self.created[0].cursor.call_count, 1)
+
+        self.pool.clear_prepared_statements()
+        conn.prepared_cursor("SELECT 1")
+
+        cursor.close.assert_called_once()
+        self.assertEqual(self.created[0].cursor.call_count, 2)
+
+    def test_factory_error_frees_slot(self):
+        self.pool = ConnectionPool(MagicMock(side_effect=Exception("login failed")), max_size=1, acquire_timeout=0.1)
+        with self.assertRaises(Exception):
+            self.pool.acquire()
+        self.assertEqual(self.pool.stats()["open"], 0)
+
+class TestConfigListeners(unittest.TestCase):
+
+    @patch.object(ConfigManager, '_save_config')
+    def test_only_changed_sections_are_notified(self, mock_save):
+        manager = ConfigManager()
+        calls = []
+        manager.add_listener(calls.append)
+        try:
+            manager.update_and_save_config(new_db_config=dict(manager.DB_CONFIG),
+                                           new_internal_default_fields=dict(manager.INTERNAL_DEFAULT_FIELDS))
+            self.assertEqual(calls, []) # "Salvar" sem mudar nada não recria o pool
+            internal = dict(manager.INTERNAL_DEFAULT_FIELDS, ADIMPLENTE="F")
+            manager.update_and_save_config(new_db_config=dict(manager.DB_CONFIG), new_internal_default_fields=internal)
+            self.assertEqual(calls, [{"INTERNAL_DEFAULT_FIELDS"}])
+        finally:
+            manager.remove_listener(calls.append)
+            manager.update_and_save_config(new_internal_default_fields=dict(ConfigManager.DEFAULT_INTERNAL_DEFAULT_FIELDS))
+
+    @patch.object(ConfigManager, '_save_config')
+    def test_fields_edited_in_place_are_notified(self, mock_save):
+        manager = ConfigManager()
+        calls = []
+        manager.add_listener(calls.append)
+        fields = manager.CLIENT_FIELDS_CONFIG
+        try:
+            fields.append({"name": "APELIDO", "db_column": "APELIDO", "max_length": 30, "required": False}) # Como o AddFieldDialog
+            manager.update_and_save_config(new_client_fields_config=fields)
+            self.assertEqual(calls, [{"CLIENT_FIELDS_CONFIG"}])
+            del fields[-1] # Como o remove_client_field
+            manager.update_and_save_config(new_client_fields_config=fields)
+            self.assertEqual(calls, [{"CLIENT_FIELDS_CONFIG"}, {"CLIENT_FIELDS_CONFIG"}])
+        finally:
+            manager.remove_listener(calls.append)
+            if fields and fields[-1]["name"] == "APELIDO":
+                del fields[-1]
+                manager.update_and_save_config(new_client_fields_config=fields)
+
+if __name__ == '__main__':
+    unittest.main()
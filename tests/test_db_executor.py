@@ -0,0 +1,150 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import threading
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.db_executor import DbExecutor, DbTaskMixin, DbTimeout, call_on_ui
+
+class FakeWindow(DbTaskMixin):
+    """Stands in for a Tk window: after() callbacks are queued and run by pump()."""
+
+    def __init__(self, executor):
+        self.db_executor = executor
+        self.scheduled = []
+
+    def after(self, ms, callback, *args):
+        self.scheduled.append((callback, args))
+
+    def bind(self, *args, **kwargs):
+        pass
+
+    def configure(self, **kwargs):
+        self.cursor = kwargs.get("cursor")
+
+    def pump(self, until):
+        while not until() and self.scheduled:
+            callback, args = self.scheduled.pop(0)
+            callback(*args)
+            threading.Event().wait(0.01)
+
+class TestDbExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = DbExecutor(workers=1)
+        self.window = FakeWindow(self.executor)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_result_delivered_on_calling_thread(self):
+        results = []
+        self.window.run_db_task(threading.get_ident, on_success=results.append, timeout=5)
+        self.assertEqual(self.window.cursor, "watch") # Busy while pending
+
+        self.window.pump(lambda: results)
+
+        self.assertNotEqual(results[0], threading.get_ident()) # Ran on a worker
+        self.assertEqual(self.window.cursor, "")
+
+    def test_queued_task_cancelled_before_running(self):
+        release = threading.Event()
+        ran = []
+        self.executor.submit(release.wait, 5)
+        task = self.executor.submit(ran.append, "late")
+
+        self.assertTrue(task.cancel())
+        release.set()
+        self.executor.submit(lambda: None).future.result(5)
+        self.assertEqual(ran, [])
+
+    def test_new_task_with_same_key_supersedes_previous(self):
+        release = threading.Event()
+        results = []
+        self.window.run_db_task(release.wait, 5, on_success=lambda _: results.append("first"), key="search")
+        self.window.run_db_task(lambda: "second", on_success=results.append, key="search")
+        release.set()
+
+        self.window.pump(lambda: results)
+        self.assertEqual(results, ["second"])
+
+    def test_timeout_reports_error(self):
+        release = threading.Event()
+        errors = []
+        self.window.run_db_task(release.wait, 5, on_error=errors.append, timeout=0.05)
+
+        self.window.pump(lambda: errors)
+        release.set()
+        self.assertIsInstance(errors[0], DbTimeout)
+
+    def test_ui_calls_from_worker_run_on_completion(self):
+        shown = MagicMock()
+        done = []
+
+        def failing_call():
+            call_on_ui(shown, "Database Error", "boom")
+            self.assertFalse(shown.called) # Deferred while still on the worker
+            return False
+
+        self.window.run_db_task(failing_call, on_success=done.append, timeout=5)
+        self.window.pump(lambda: done)
+        shown.assert_called_once_with("Database Error", "boom")
+
+    @patch('utils.db_executor.messagebox')
+    def test_write_is_not_replaced_and_second_submit_is_rejected(self, mock_messagebox):
+        release = threading.Event()
+        results = []
+        first = self.window.run_db_task(release.wait, 5, on_success=lambda _: results.append("saved"), key="insert", write=True)
+        self.assertIsNone(self.window.run_db_task(lambda: "again", on_success=results.append, key="insert", write=True))
+        self.assertIsNone(self.window.run_db_task(lambda: "read", on_success=results.append, key="insert")) # Mesma key
+        mock_messagebox.showwarning.assert_called()
+
+        self.window.cancel_db_tasks() # Esc não cancela escritas
+        self.assertFalse(first.abandoned)
+        release.set()
+        self.window.pump(lambda: results)
+        self.assertEqual(results, ["saved"])
+
+    @patch('utils.db_executor.messagebox')
+    def test_write_past_timeout_keeps_waiting_for_the_real_outcome(self, mock_messagebox):
+        started = threading.Event()
+        release = threading.Event()
+        results = []
+        errors = []
+
+        def slow_write():
+            started.set()
+            release.wait(5)
+            return True
+
+        self.window.run_db_task(slow_write, on_success=results.append, on_error=errors.append, timeout=0.05, write=True)
+        started.wait(5)
+        self.window.pump(lambda: mock_messagebox.showwarning.called)
+        self.assertEqual(errors, []) # Não é reportado como falha: pode ter gravado
+        self.assertEqual(self.window.cursor, "watch")
+        release.set()
+
+        self.window.pump(lambda: results)
+        self.assertEqual(results, [True])
+        self.assertEqual(errors, [])
+        mock_messagebox.showwarning.assert_called_once()
+
+    @patch('utils.db_executor.messagebox')
+    def test_queued_write_past_timeout_is_cancelled(self, mock_messagebox):
+        release = threading.Event()
+        ran = []
+        errors = []
+        self.executor.submit(release.wait, 5) # Ocupa o único worker
+        self.window.run_db_task(ran.append, "late", on_error=errors.append, timeout=0.05, write=True)
+
+        self.window.pump(lambda: errors)
+        release.set()
+        self.executor.submit(lambda: None).future.result(5)
+        self.assertIsInstance(errors[0], DbTimeout)
+        self.assertEqual(ran, []) # Nunca rodou: seguro tentar de novo
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+from unittest.mock import patch
+import threading
+import time
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import db_operations
+from utils.db_health import CircuitBreaker, CircuitOpenError, operation_timeouts, STATE_CLOSED, STATE_OPEN, OP_WRITE
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.server_up = threading.Event()
+        self.breaker = CircuitBreaker(self._probe, failure_threshold=2, cool_down=0.05)
+
+    def _probe(self):
+        if not self.server_up.is_set():
+            raise OSError("login timeout")
+
+    def test_opens_after_threshold_and_fails_fast(self):
+        self.assertFalse(self.breaker.record_failure(OSError("timeout")))
+        self.breaker.check() # Ainda fechado: deixa tentar
+        self.assertTrue(self.breaker.record_failure(OSError("timeout")))
+        self.assertEqual(self.breaker.state, STATE_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.check()
+        self.assertEqual(self.breaker.status()["fast_failures"], 1)
+
+    def test_background_probe_closes_circuit_when_server_returns(self):
+        self.breaker.record_failure(OSError("timeout"))
+        self.breaker.record_failure(OSError("timeout"))
+        time.sleep(0.15) # Alguns testes falham com o servidor fora
+        self.assertTrue(self.breaker.is_open)
+
+        self.server_up.set()
+        deadline = time.monotonic() + 2
+        while self.breaker.is_open and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.breaker.state, STATE_CLOSED)
+        self.breaker.check()
+
+    def test_operation_timeouts_merge_settings_with_defaults(self):
+        settings = {"DB_TIMEOUTS": {"write": {"query": 5}}}
+        self.assertEqual(operation_timeouts(settings, OP_WRITE), {"login": 10, "query": 5})
+
+class TestConnectFastFail(unittest.TestCase):
+
+    def setUp(self):
+        self.messagebox_patch = patch('utils.db_operations.messagebox')
+        self.mock_messagebox = self.messagebox_patch.start()
+        self.breaker_patch = patch.object(db_operations, "_breaker", CircuitBreaker(lambda: None, failure_threshold=1, cool_down=60))
+        self.breaker_patch.start()
+
+    def tearDown(self):
+        self.breaker_patch.stop()
+        self.messagebox_patch.stop()
+
+    def test_single_dialog_then_immediate_failures(self):
+        backend = db_operations.get_backend()
+        db_operations.get_connection_pool().close_all()
+        with patch.object(backend, "connect", side_effect=OSError("login timeout")) as mock_connect, \
+             patch.object(backend, "errors", (OSError,)):
+            self.assertIsNone(db_operations.connect_to_database())
+            self.assertIsNone(db_operations.connect_to_database(OP_WRITE))
+            self.assertIsNone(db_operations.connect_to_database())
+        self.assertEqual(mock_connect.call_count, 1) # As seguintes nem tentaram o login
+        self.mock_messagebox.showerror.assert_called_once()
+        self.assertEqual(db_operations.get_health_status()["state"], STATE_OPEN)
+
+if __name__ == '__main__':
+    unittest.main()
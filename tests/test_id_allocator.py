@@ -0,0 +1,60 @@
+import unittest
+import tempfile
+import threading
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.id_allocator import IdAllocator, SqliteIdStore
+
+class TestIdAllocator(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = SqliteIdStore(os.path.join(self.tmpdir.name, "ids.db"), seed=100)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_serves_ids_from_local_block(self):
+        allocator = IdAllocator(self.store, block_size=5)
+        ids = [allocator.next_id() for _ in range(7)]
+        self.assertEqual(ids, ["100", "101", "102", "103", "104", "105", "106"])
+
+    def test_two_processes_never_share_ids(self):
+        # Two allocators over the same store behave like two operators' processes
+        first = IdAllocator(self.store, block_size=3)
+        second = IdAllocator(self.store, block_size=3)
+        ids = [first.next_id(), second.next_id(), first.next_id(), second.next_id()]
+        self.assertEqual(len(set(ids)), len(ids))
+
+    def test_unique_under_concurrency(self):
+        allocators = [IdAllocator(self.store, block_size=4) for _ in range(3)]
+        results = []
+        lock = threading.Lock()
+
+        def worker(allocator):
+            for _ in range(20):
+                value = allocator.next_id()
+                with lock:
+                    results.append(value)
+
+        threads = [threading.Thread(target=worker, args=(allocators[i % 3],)) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 120)
+        self.assertEqual(len(set(results)), 120)
+
+    def test_reserve_block_for_bulk_imports(self):
+        allocator = IdAllocator(self.store, block_size=5)
+        self.assertEqual(allocator.reserve_block(3), ["100", "101", "102"])
+        self.assertEqual(allocator.next_id(), "103")
+        self.assertEqual(allocator.reserve_block(0), [])
+
+if __name__ == '__main__':
+    unittest.main()
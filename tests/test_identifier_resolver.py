@@ -0,0 +1,96 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.identifier_resolver import (
+    detect_identifier_shape, plan_lookups, build_resolver_sql,
+    SHAPE_DIGITS, SHAPE_CNPJ, SHAPE_DOCUMENT, SHAPE_TEXT
+)
+from utils.statement_cache import get_compiled_statements
+
+FIELDS = [
+    {"name": "CLIENTE", "max_length": 100, "required": True, "db_column": "RAZAO"},
+    {"name": "CGC", "max_length": 20, "required": True, "db_column": "CGC"},
+    {"name": "INSCRICAO", "max_length": 20, "required": False, "db_column": "INSCRICAO"},
+    {"name": "XCLIENTES", "max_length": 10, "required": True, "db_column": "XCLIENTES"}
+]
+
+class TestIdentifierResolver(unittest.TestCase):
+
+    def test_detect_identifier_shape(self):
+        self.assertEqual(detect_identifier_shape("12345"), SHAPE_DIGITS)
+        self.assertEqual(detect_identifier_shape("12.345.678/0001-90"), SHAPE_CNPJ)
+        self.assertEqual(detect_identifier_shape("123.456.789-00"), SHAPE_DOCUMENT)
+        self.assertEqual(detect_identifier_shape("Silva Ltda"), SHAPE_TEXT)
+
+    def test_plan_keeps_priority_order_for_digits(self):
+        keys = [lookup[0] for lookup in plan_lookups(" 12345 ", FIELDS)]
+        self.assertEqual(keys, ["XCLIENTES", "CGC", "INSCRICAO"])
+
+    def test_plan_skips_lookups_that_do_not_fit_column(self):
+        keys = [lookup[0] for lookup in plan_lookups("12345678901234", FIELDS)]
+        self.assertEqual(keys, ["CGC", "INSCRICAO"]) # Too long for XCLIENTES (10)
+
+    def test_plan_only_searches_cgc_for_formatted_cnpj(self):
+        self.assertEqual(plan_lookups("12.345.678/0001-90", FIELDS), [("CGC", "CGC", "=", "12.345.678/0001-90")])
+
+    def test_plan_uses_like_only_for_free_text(self):
+        lookups = plan_lookups("silva", FIELDS)
+        self.assertEqual(lookups[0], ("RAZAO", "RAZAO", "LIKE", "%silva%"))
+        self.assertEqual([lookup[0] for lookup in lookups], ["RAZAO", "INSCRICAO"])
+
+    def test_plan_empty_identifier(self):
+        self.assertEqual(plan_lookups("   ", FIELDS), [])
+
+    def test_build_resolver_sql_is_single_short_circuit_batch(self):
+        lookups = plan_lookups("12345", FIELDS)
+        sql = build_resolver_sql(lookups, "dbo.FBCLIENTES", "c.XCLIENTES, c.RAZAO")
+        self.assertEqual(sql.count("?"), len(lookups))
+        self.assertEqual(sql.count("IF @key IS NULL"), len(lookups) - 1)
+        self.assertIn("MATCH_KEY", sql)
+        self.assertNotIn("*", sql)
+
+    @patch('utils.sqlserver_backend._pyodbc')
+    def test_sqlserver_batch_temp_tables_match_column_types(self, mock_pyodbc):
+        from utils.sqlserver_backend import SqlServerBackend
+        backend = SqlServerBackend({})
+        statements = get_compiled_statements(FIELDS, "dbo.FBCLIENTES")
+        cursor = MagicMock()
+        cursor.fetchall.return_value = []
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+
+        backend.resolve_batch(conn, statements, [(0, 2, "RAZAO", "RAZAO", "%acme%"), (1, 2, "RAZAO", "RAZAO", "x" * 200)])
+        create = cursor.execute.call_args_list[0][0][0]
+        self.assertIn("VAL VARCHAR(102) COLLATE DATABASE_DEFAULT", create) # RAZAO(100) e os dois '%'
+        self.assertNotIn("NVARCHAR", create)
+        self.assertEqual(len(cursor.executemany.call_args[0][1]), 1) # Maior que a coluna: não casaria com nada
+
+        cursor.reset_mock()
+        backend.delete_batch(conn, statements, ["10", "11"])
+        self.assertIn("XCLIENTES VARCHAR(10) COLLATE DATABASE_DEFAULT PRIMARY KEY", cursor.execute.call_args_list[0][0][0])
+
+    @patch('utils.sqlserver_backend._pyodbc')
+    def test_sqlserver_resolver_key_variable_matches_column_type(self, mock_pyodbc):
+        from utils.sqlserver_backend import SqlServerBackend
+        from utils.schema_cache import ColumnInfo, TableSchema
+        backend = SqlServerBackend({})
+        statements = get_compiled_statements(FIELDS, "dbo.FBCLIENTES")
+        conn = MagicMock()
+        conn.prepared_cursor.return_value.fetchone.return_value = None
+        conn.prepared_cursor.return_value.nextset.return_value = False
+
+        backend.resolve_client(conn, statements, plan_lookups("12345", FIELDS))
+        self.assertIn("DECLARE @key VARCHAR(10) = NULL", conn.prepared_cursor.call_args[0][0]) # Da configuração
+        backend.set_schema(TableSchema("FBCLIENTES", [ColumnInfo("XCLIENTES", "varchar", 12, False)]))
+        backend.delete_client(conn, statements, plan_lookups("12345", FIELDS))
+        sql = conn.prepared_cursor.call_args[0][0]
+        self.assertIn("DECLARE @key VARCHAR(12) = NULL", sql) # Do banco, quando conhecido
+        self.assertNotIn("NVARCHAR", sql)
+
+if __name__ == '__main__':
+    unittest.main()
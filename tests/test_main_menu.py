@@ -26,6 +26,7 @@ class TestMainMenuApp(unittest.TestCase):
         self.mock_client_read_app = patch('main_menu.ClientReadApp').start()
         self.mock_client_update_app = patch('main_menu.ClientUpdateApp').start()
         self.mock_client_delete_app = patch('main_menu.ClientDeleteApp').start()
+        self.mock_client_batch_app = patch('main_menu.ClientBatchApp').start()
 
         # Mock root methods
         self.mock_root_withdraw = patch.object(self.root, 'withdraw').start()
@@ -63,6 +64,11 @@ class TestMainMenuApp(unittest.TestCase):
         self.mock_client_delete_app.assert_called_once_with(self.root)
         self.mock_client_delete_app.return_value.protocol.assert_called_once()
 
+    def test_open_batch_client_screen(self):
+        self.app.open_batch_client_screen()
+        self.mock_client_batch_app.assert_called_once_with(self.root)
+        self.mock_client_batch_app.return_value.protocol.assert_called_once()
+
     def test_on_client_app_close(self):
         mock_client_app_instance = MagicMock()
         self.app.on_client_app_close(mock_client_app_instance)
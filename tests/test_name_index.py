@@ -0,0 +1,51 @@
+import unittest
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.name_index import NameIndex, fold, trigrams
+
+class TestNameIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = NameIndex()
+        self.index.build([
+            ("1", "Padaria São João Ltda"),
+            ("2", "Construtora Andrade Gutierrez"),
+            ("3", "Comércio de Peças Andrade"),
+            ("4", "Farmácia Popular"),
+        ])
+
+    def _ids(self, query, limit=10):
+        return [match.client_id for match in self.index.search(query, limit)]
+
+    def test_fold_removes_accents_and_case(self):
+        self.assertEqual(fold("  Comércio de PEÇAS/SP "), "comercio de pecas sp")
+        self.assertIn("  j", trigrams("joao"))
+
+    def test_accent_and_case_insensitive(self):
+        self.assertEqual(self._ids("SAO JOAO")[0], "1")
+        self.assertEqual(self._ids("farmacia")[0], "4")
+
+    def test_partial_words_rank_all_matches(self):
+        self.assertEqual(set(self._ids("andrade")), {"2", "3"})
+        self.assertEqual(self._ids("andrade", limit=1), ["3"]) # Shorter name ranks first
+
+    def test_tolerates_typos(self):
+        self.assertEqual(self._ids("Contrutora Andrad")[0], "2")
+        self.assertEqual(self._ids("xyzw"), [])
+
+    def test_incremental_updates(self):
+        self.index.apply_mutation("update", "4", None, {"XCLIENTES": "4", "RAZAO": "Drogaria Central"})
+        self.index.apply_mutation("insert", "5", None, {"XCLIENTES": "5", "RAZAO": "Farmácia Nova"})
+        self.index.apply_mutation("delete", "1", {"XCLIENTES": "1"}, None)
+
+        self.assertEqual(self._ids("farmacia"), ["5"])
+        self.assertEqual(self._ids("drogaria"), ["4"])
+        self.assertEqual(self._ids("padaria"), [])
+        self.assertEqual(self.index.stats()["documents"], 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import sqlite3
+import tempfile
+import json
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.query_metrics import QueryMetrics, percentile
+
+class TestQueryMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.slow_log = os.path.join(self.tmpdir.name, "slow.log")
+        self.metrics = QueryMetrics(buffer_size=3, slow_threshold_ms=None, slow_log_path=self.slow_log)
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.execute("CREATE TABLE t (name TEXT, value INTEGER)")
+        self.conn.executemany("INSERT INTO t VALUES (?, ?)", [("abc", 1), ("de", 2)])
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmpdir.cleanup()
+
+    def _query(self, kind="resolve"):
+        with self.metrics.track(kind):
+            cursor = self.metrics.wrap_cursor(self.conn.cursor())
+            return cursor.execute("SELECT name, value FROM t ORDER BY value").fetchall()
+
+    def test_cursor_measures_rows_bytes_and_round_trips(self):
+        self.assertEqual(len(self._query()), 2)
+        sample = self.metrics.recent_samples()[0]
+        self.assertEqual((sample.kind, sample.rows, sample.bytes, sample.round_trips), ("resolve", 2, 3 + 8 + 2 + 8, 1))
+        self.assertGreater(sample.total_ms, 0)
+
+    def test_untracked_and_cache_only_calls_are_not_recorded(self):
+        self.metrics.wrap_cursor(self.conn.cursor()).execute("SELECT 1").fetchone()
+        with self.metrics.track("resolve"):
+            pass # Answered without going to the database
+        self.assertEqual(self.metrics.recent_samples(), [])
+
+    def test_ring_buffer_and_percentiles(self):
+        for _ in range(5):
+            self._query("search")
+        self.assertEqual(len(self.metrics.recent_samples(10)), 3)
+        summary = self.metrics.summary()["search"]
+        self.assertEqual(summary["count"], 3)
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2)
+        self.assertEqual(percentile([1, 2, 3, 4], 99), 4)
+
+    def test_action_sums_its_operations(self):
+        def user_action():
+            self._query("resolve")
+            self._query("update")
+        self.metrics.run_action("ClientUpdateApp.save", user_action)
+        action = self.metrics.recent_actions()[0]
+        self.assertEqual((action.name, action.queries, action.round_trips, action.rows), ("ClientUpdateApp.save", 2, 2, 4))
+        self.assertEqual(self.metrics.recent_samples()[0].action, "ClientUpdateApp.save")
+
+    def test_slow_operations_logged(self):
+        self.metrics.configure(slow_threshold_ms=0)
+        self._query("delete")
+        with open(self.slow_log, encoding="utf-8") as f:
+            entry = json.loads(f.readline())
+        self.assertEqual((entry["kind"], entry["rows"]), ("delete", 2))
+        self.assertEqual(self.metrics.slow_count, 1)
+        self.assertEqual(entry["statements"], ["SELECT name, value FROM t ORDER BY value"])
+
+    def test_slow_log_has_sql_text_without_parameter_values(self):
+        self.metrics.configure(slow_threshold_ms=0)
+        with self.metrics.track("resolve"):
+            cursor = self.metrics.wrap_cursor(self.conn.cursor())
+            cursor.execute("SELECT value\n  FROM t WHERE name = ?", ("abc",)).fetchall()
+            cursor.execute("SELECT value FROM t WHERE name = 'de'").fetchall()
+        with open(self.slow_log, encoding="utf-8") as f:
+            line = f.readline()
+        self.assertEqual(json.loads(line)["statements"], ["SELECT value FROM t WHERE name = ?"]) # Mesmo comando uma vez só
+        self.assertNotIn("abc", line)
+        self.assertNotIn("'de'", line)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import sqlite3
+import tempfile
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.config_manager import ConfigManager
+from utils.schema_cache import SchemaCache, ColumnInfo, TableSchema, derive_max_lengths, parse_declared_type
+from utils.sqlite_backend import SqliteBackend
+
+class TestSchemaCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "clients.db")
+        self.cache_path = os.path.join(self.tmpdir.name, "schema_cache.json")
+        self.backend = SqliteBackend(self.db_path)
+        self.connects = 0
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _connect(self):
+        self.connects += 1
+        return self.backend.connect()
+
+    def _cache(self):
+        return SchemaCache(self.cache_path, self.backend, self._connect, "FBCLIENTES", on_loaded=self.backend.set_schema)
+
+    def test_describe_table_types_lengths_and_indexes(self):
+        schema = self._cache().refresh()
+        self.assertEqual(schema.max_length("RAZAO"), 100)
+        self.assertFalse(schema.column("XCLIENTES").nullable)
+        self.assertTrue(schema.column("cgc").nullable)
+        self.assertEqual(schema.indexes["IX_FBCLIENTES_CGC"], ["CGC"])
+        self.assertIs(self.backend.schema, schema)
+
+    def test_persisted_schema_used_until_version_changes(self):
+        self._cache().refresh()
+
+        cache = self._cache()
+        self.assertTrue(cache.ready) # Loaded from the file, before any query
+        with patch.object(self.backend, "describe_table", wraps=self.backend.describe_table) as describe:
+            cache.refresh()
+            describe.assert_not_called()
+
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("ALTER TABLE FBCLIENTES ADD COLUMN OBS VARCHAR(30)")
+            conn.close()
+            cache.refresh()
+            describe.assert_called_once()
+        self.assertEqual(cache.schema.max_length("OBS"), 30)
+
+    def test_validate_and_derive_max_lengths(self):
+        schema = TableSchema("T", [ColumnInfo("RAZAO", "varchar", 5, True), ColumnInfo("XCLIENTES", "varchar", 10, False)])
+        self.assertEqual(len(schema.validate({"RAZAO": "too long", "XCLIENTES": None})), 2)
+        self.assertEqual(schema.validate({"RAZAO": "ok", "XCLIENTES": "1"}), [])
+
+        fields = [{"name": "CLIENTE", "db_column": "RAZAO", "max_length": 100}, {"name": "ZONA", "db_column": "ZONA", "max_length": 20},
+                  {"name": "CODIGO", "db_column": "XCLIENTES", "max_length": 6}, {"name": "NOVO", "db_column": "XCLIENTES"}]
+        self.assertEqual(derive_max_lengths(fields, schema), {"CLIENTE": 5, "ZONA": 20, "CODIGO": 6, "NOVO": 10}) # O menor dos dois
+        self.assertEqual(parse_declared_type("NVARCHAR(MAX)"), ("nvarchar", -1))
+
+    @patch('utils.sqlserver_backend._pyodbc')
+    def test_sqlserver_input_sizes_from_schema(self, mock_pyodbc):
+        from utils.sqlserver_backend import SqlServerBackend
+        mock_pyodbc.return_value = MagicMock(SQL_VARCHAR=12, SQL_INTEGER=4)
+        backend = SqlServerBackend({})
+        backend.set_schema(TableSchema("FBCLIENTES", [ColumnInfo("XCLIENTES", "varchar", 10, False), ColumnInfo("NRECNO", "int", None, True, 10, 0)]))
+        cursor = MagicMock()
+
+        backend.bind_input_sizes(cursor, ("XCLIENTES", "NRECNO", "UNKNOWN"))
+        cursor.setinputsizes.assert_called_once_with([(12, 10, 0), (4, 10, 0), None])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import unittest
+import sqlite3
+from unittest.mock import patch
+import tempfile
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.config_manager import ConfigManager
+from utils.identifier_resolver import plan_lookups, MATCH_XCLIENTES
+from utils.snapshot import ClientSnapshot
+from utils.sqlite_backend import SqliteBackend, build_schema_sql
+
+class TestClientSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fields_config = ConfigManager().CLIENT_FIELDS_CONFIG
+        source_path = os.path.join(self.tmpdir.name, "server.db")
+        self.source = sqlite3.connect(source_path)
+        for statement in build_schema_sql(self.fields_config):
+            self.source.execute(statement)
+        self.source.execute("ALTER TABLE FBCLIENTES ADD COLUMN ROWVER INTEGER") # Stands in for rowversion
+        self.version = 0
+        for xclientes in ("1", "2", "3"):
+            self._write(xclientes, f"Client {xclientes}")
+
+        self.source_path = source_path
+        self.snapshot = self._open_snapshot()
+
+    def _open_snapshot(self, version_column="ROWVER"):
+        return ClientSnapshot(
+            os.path.join(self.tmpdir.name, "snapshot.db"),
+            SqliteBackend(self.source_path),
+            self.fields_config,
+            lambda: sqlite3.connect(self.source_path),
+            version_column=version_column,
+            reconcile_every=1
+        )
+
+    def tearDown(self):
+        self.snapshot.close()
+        self.source.close()
+        self.tmpdir.cleanup()
+
+    def _write(self, xclientes, razao):
+        self.version += 1
+        self.source.execute(
+            "INSERT OR REPLACE INTO FBCLIENTES (XCLIENTES, RAZAO, CGC, ROWVER) VALUES (?, ?, ?, ?)",
+            (xclientes, razao, f"{xclientes}00", self.version)
+        )
+        self.source.commit()
+
+    def _resolve(self, identifier):
+        return self.snapshot.resolve(plan_lookups(identifier, self.fields_config))
+
+    def test_bootstrap_then_answers_locally(self):
+        self.assertFalse(self.snapshot.ready)
+        self.assertEqual(self.snapshot.sync_once(), 3)
+
+        self.assertTrue(self.snapshot.ready)
+        client, match_key = self._resolve("client 2")
+        self.assertEqual((client["XCLIENTES"], match_key), ("2", "RAZAO"))
+        status = self.snapshot.status()
+        self.assertEqual((status["rows"], status["server_rows"], status["last_version"]), (3, 3, "3"))
+
+    def test_incremental_sync_only_pulls_changed_rows(self):
+        self.snapshot.sync_once()
+        self._write("2", "Renamed")
+        self._write("4", "Client 4")
+
+        self.assertEqual(self.snapshot.sync_once(), 2)
+        self.assertEqual(self._resolve("2")[0]["RAZAO"], "Renamed")
+        self.assertEqual(self.snapshot.row_count(), 4)
+
+    def test_deletes_on_server_are_reconciled(self):
+        self.snapshot.sync_once()
+        self.source.execute("DELETE FROM FBCLIENTES WHERE XCLIENTES = '3'")
+        self.source.commit()
+
+        self.snapshot.sync_once()
+        self.assertEqual(self._resolve("3"), (None, None))
+        self.assertEqual(self.snapshot.row_count(), 2)
+
+    def test_local_mutations_applied_immediately(self):
+        self.snapshot.sync_once()
+        self.snapshot.apply_mutation("update", "1", None, {"XCLIENTES": "1", "RAZAO": "Edited", "CGC": "100"})
+        self.snapshot.apply_mutation("delete", "2", None, None)
+
+        self.assertEqual(self._resolve("1")[0]["RAZAO"], "Edited")
+        self.assertEqual(self._resolve("2"), (None, None))
+
+    def test_requires_version_column(self):
+        with self.assertRaises(ValueError):
+            self._open_snapshot(version_column=None)
+
+    def test_reopened_snapshot_waits_for_a_delta_pass(self):
+        self.snapshot.sync_once()
+        self.snapshot.close()
+        self._write("2", "Renamed elsewhere")
+
+        self.snapshot = self._open_snapshot()
+        self.assertFalse(self.snapshot.ready) # A cópia salva pode estar velha
+        self.assertEqual(self.snapshot.sync_once(), 1) # Delta, não uma nova carga inicial
+        self.assertTrue(self.snapshot.ready)
+        self.assertEqual(self._resolve("2")[0]["RAZAO"], "Renamed elsewhere")
+
+    def test_server_changes_reach_listeners(self):
+        changes = []
+        self.snapshot.add_listener(lambda operation, client_id, before, after: changes.append(
+            (operation, client_id, after and after["RAZAO"])))
+        self.snapshot.sync_once()
+        self.assertEqual(changes, []) # A carga inicial não é repassada
+
+        self._write("4", "Client 4")
+        self.source.execute("DELETE FROM FBCLIENTES WHERE XCLIENTES = '1'")
+        self.source.commit()
+        self.snapshot.sync_once()
+        self.assertEqual(changes, [("update", "4", "Client 4"), ("delete", "1", None)])
+
+    def test_batch_lookups_during_a_delta_keep_synced_rows(self):
+        self.snapshot.sync_once()
+        self._write("4", "Client 4")
+        self._write("5", "Client 5")
+        found = []
+        # O listener (ex.: uma tela) faz uma busca em lote no meio do delta
+        self.snapshot.add_listener(lambda operation, client_id, before, after: found.extend(
+            self.snapshot.resolve_batch([(0, 0, MATCH_XCLIENTES, MATCH_XCLIENTES, client_id)])))
+
+        with patch('utils.snapshot.FETCH_CHUNK', 1):
+            self.assertEqual(self.snapshot.sync_once(), 2)
+        self.assertEqual([row[3]["XCLIENTES"] for row in found], ["4", "5"]) # Já confirmado quando o listener roda
+        self.assertEqual(self.snapshot.row_count(), 5)
+        self.snapshot.close()
+        self.snapshot = self._open_snapshot()
+        self.assertEqual((self.snapshot.row_count(), self.snapshot.status()["last_version"]), (5, "5"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+import unittest
+from unittest.mock import patch
+import tempfile
+import threading
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import db_operations
+from utils.db_backend import create_backend
+from utils.sqlite_backend import SqliteBackend
+
+class TestSqliteBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        db_config = {"BACKEND": "sqlite", "SQLITE_PATH": os.path.join(self.tmpdir.name, "clients.db")}
+        self.config_patch = patch.object(db_operations.config_manager, "DB_CONFIG", db_config)
+        self.config_patch.start()
+        db_operations._on_config_changed({"DB_CONFIG"})
+        self.messagebox_patch = patch('utils.db_operations.messagebox')
+        self.mock_messagebox = self.messagebox_patch.start()
+
+    def tearDown(self):
+        db_operations.get_connection_pool().close_all()
+        self.config_patch.stop()
+        self.messagebox_patch.stop()
+        db_operations._on_config_changed({"DB_CONFIG"})
+        self.tmpdir.cleanup()
+
+    def _client(self, xclientes, razao, cgc):
+        return {"XCLIENTES": xclientes, "CLIENTE": razao, "CGC": cgc, "CIDADE": "Curitiba"}
+
+    def test_backend_selected_from_db_config(self):
+        self.assertIsInstance(db_operations.get_backend(), SqliteBackend)
+        self.assertEqual(create_backend({"BACKEND": "SQLite"}).name, "sqlite")
+        with self.assertRaises(ValueError):
+            create_backend({"BACKEND": "oracle"})
+
+    def test_schema_has_production_indexes(self):
+        conn = db_operations.connect_to_database()
+        try:
+            indexes = {row[0] for row in conn.cursor().execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        finally:
+            conn.close()
+        self.assertTrue({"IX_FBCLIENTES_CGC", "IX_FBCLIENTES_INSCRICAO", "IX_FBCLIENTES_RAZAO"} <= indexes)
+        self.assertIn("RAZAO", db_operations.get_table_columns())
+
+    def test_insert_resolve_update_delete(self):
+        self.assertTrue(db_operations.insert_client_data(self._client("10", "Acme Ltda", "111")))
+        self.assertFalse(db_operations.insert_client_data(self._client("10", "Outra", "222"))) # XCLIENTES exists
+
+        client, match_key = db_operations.resolve_client("acme")
+        self.assertEqual((client["XCLIENTES"], match_key), ("10", "RAZAO"))
+        self.assertEqual(db_operations.resolve_client("111")[1], "CGC")
+
+        result = db_operations.update_client_data(self._client("10", "Acme S/A", "111"), before_data=client)
+        self.assertEqual(result.changed_fields, ("CLIENTE",))
+        self.assertEqual(result.before["RAZAO"], "Acme Ltda")
+        self.assertEqual(result.after["RAZAO"], "Acme S/A")
+        self.assertFalse(db_operations.update_client_data(self._client("99", "Nobody", "0")))
+
+        deleted = db_operations.delete_client_data("10")
+        self.assertEqual(deleted.before["RAZAO"], "Acme S/A")
+        self.assertIsNone(db_operations.get_client_data("10"))
+        self.assertIsNone(db_operations.delete_client_data("10"))
+        self.mock_messagebox.showerror.assert_not_called()
+
+    def test_client_cache_read_through_and_invalidation(self):
+        db_operations.insert_client_data(self._client("10", "Acme", "11222333000144"))
+        cache = db_operations.get_client_cache()
+        hits = cache.stats()["hits"]
+
+        self.assertEqual(db_operations.get_client_data("10")["RAZAO"], "Acme")
+        self.assertEqual(db_operations.get_client_data("11222333000144")["XCLIENTES"], "10")
+        self.assertEqual(cache.stats()["hits"], hits + 2)
+
+        db_operations.update_client_data(self._client("10", "Acme S/A", "11222333000144"))
+        self.assertEqual(db_operations.get_client_data("10")["RAZAO"], "Acme S/A")
+        db_operations.delete_client_data("10")
+        self.assertIsNone(db_operations.get_client_data("10"))
+
+    def test_search_clients_keyset_pages(self):
+        for xclientes in ("11", "12", "13", "14", "15"):
+            db_operations.insert_client_data(self._client(xclientes, f"Acme {xclientes}", f"9{xclientes}"))
+        db_operations.insert_client_data(self._client("16", "Other", "916"))
+
+        records, next_key = db_operations.search_clients("acme", page_size=2)
+        self.assertEqual([record["XCLIENTES"] for record in records], ["11", "12"])
+        self.assertEqual(set(records[0]), {"XCLIENTES", "RAZAO", "CGC", "CIDADE", "ESTADO"})
+
+        pages = [records]
+        while next_key is not None:
+            records, next_key = db_operations.search_clients("acme", after_key=next_key, page_size=2)
+            pages.append(records)
+        self.assertEqual([[record["XCLIENTES"] for record in page] for page in pages], [["11", "12"], ["13", "14"], ["15"]])
+        self.assertEqual(db_operations.search_clients("nobody"), ([], None))
+
+    def test_batch_resolve_and_delete(self):
+        db_operations.insert_client_data(self._client("21", "Acme", "111"))
+        db_operations.insert_client_data(self._client("22", "Beta", "222"))
+        db_operations.insert_client_data(self._client("23", "Gama", "333"))
+
+        results = db_operations.resolve_clients_batch(["222", "21", "nobody", "beta", "21"])
+        self.assertEqual(
+            [(identifier, client and client["XCLIENTES"], match_key) for identifier, client, match_key in results],
+            [("222", "22", "CGC"), ("21", "21", "XCLIENTES"), ("nobody", None, None), ("beta", "22", "RAZAO")]
+        )
+        # Lista do lote: só as colunas da projeção de lista, não a linha inteira
+        self.assertNotIn("INSCRICAO", results[0][1])
+
+        with patch('utils.db_operations.log_operation') as mock_log:
+            deleted = db_operations.delete_clients_batch(["21", "22", "99"])
+        self.assertEqual(sorted(result.client_id for result in deleted), ["21", "22"])
+        mock_log.assert_called_once() # Um registro de auditoria para o lote, com as imagens antes
+        self.assertEqual(sorted(before["RAZAO"] for before in mock_log.call_args[1]["before_data"]), ["Acme", "Beta"])
+        self.assertIn("INSCRICAO", deleted[0].before) # Imagem de auditoria completa
+        self.assertIsNone(db_operations.get_client_data("21"))
+        self.assertEqual(db_operations.get_client_data("23")["RAZAO"], "Gama")
+        self.mock_messagebox.showerror.assert_not_called()
+
+    def test_name_index_only_answers_exact_names(self):
+        db_operations.insert_client_data(self._client("1", "PADARIA SAO JOAO LTDA", "111"))
+        db_operations.insert_client_data(self._client("2", "MERCADO CENTRAL", "222"))
+        db_operations.insert_client_data(self._client("3", "Mercado Central do Norte", "333"))
+        settings = dict(db_operations.config_manager.APP_SETTINGS, NAME_INDEX_ENABLED=True)
+        with patch.object(db_operations.config_manager, "APP_SETTINGS", settings):
+            index = db_operations.get_name_index()
+            for _ in range(200):
+                if index.ready:
+                    break
+                threading.Event().wait(0.01)
+            self.assertTrue(index.ready)
+
+            self.assertEqual(db_operations.resolve_client("PADARIA SAO JOSE"), (None, None)) # Parecido não basta
+            self.assertEqual(db_operations.resolve_client("MERCADO NORTE"), (None, None))
+            # O lote alimenta o delete: nome parecido não conta como encontrado
+            self.assertEqual(db_operations.resolve_clients_batch(["PADARIA SAO JOSE", "MERCADO NORTE"]),
+                             [("PADARIA SAO JOSE", None, None), ("MERCADO NORTE", None, None)])
+            client, match_key = db_operations.resolve_client("mercado central")
+            self.assertEqual((client["XCLIENTES"], match_key), ("2", "RAZAO")) # Nome exato ganha do LIKE
+
+            # Gravado por outra estação: o índice não sabe, o LIKE acha
+            conn = db_operations.connect_to_database()
+            try:
+                conn.cursor().execute("INSERT INTO FBCLIENTES (XCLIENTES, RAZAO, CGC) VALUES ('4', 'PADARIA SAO JOSE', '444')")
+                conn.commit()
+            finally:
+                conn.close()
+            self.assertEqual(db_operations.resolve_client("PADARIA SAO JOSE")[0]["XCLIENTES"], "4")
+        db_operations._drop_name_index()
+
+    def test_name_search_ranks_similar_names_first(self):
+        db_operations.insert_client_data(self._client("1", "Construtora Andrade Gutierrez", "111"))
+        db_operations.insert_client_data(self._client("2", "Comércio de Peças Andrade", "222"))
+        db_operations.insert_client_data(self._client("3", "Farmácia Popular", "333"))
+        settings = dict(db_operations.config_manager.APP_SETTINGS, NAME_INDEX_ENABLED=True)
+        with patch.object(db_operations.config_manager, "APP_SETTINGS", settings):
+            index = db_operations.get_name_index()
+            for _ in range(200):
+                if index.ready:
+                    break
+                threading.Event().wait(0.01)
+            self.assertTrue(index.ready)
+
+            records, next_key = db_operations.search_clients("Contrutora Andrad") # Erro de digitação: o LIKE não acha
+            self.assertEqual(([record["XCLIENTES"] for record in records], next_key), (["1"], None))
+            self.assertEqual(records[0]["CIDADE"], "Curitiba") # Registro de lista completo
+            records, _ = db_operations.search_clients("andrade")
+            self.assertEqual([record["XCLIENTES"] for record in records], ["2", "1"]) # Nome mais curto primeiro, sem repetir
+            records, next_key = db_operations.search_clients("andrade", page_size=1)
+            self.assertEqual(([record["XCLIENTES"] for record in records], next_key), (["2", "1"], "1"))
+        db_operations._drop_name_index()
+        records, _ = db_operations.search_clients("andrade") # Índice desligado: só o LIKE, por XCLIENTES
+        self.assertEqual([record["XCLIENTES"] for record in records], ["1", "2"])
+
+    def test_allocator_seeded_from_existing_rows(self):
+        from utils.id_allocator import get_xclientes_allocator
+
+        db_operations.insert_client_data(self._client("41", "Acme", "111"))
+        self.assertEqual(get_xclientes_allocator().next_id(), "42")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+import unittest
+from unittest.mock import patch
+import tempfile
+import sqlite3
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils import db_operations
+from utils.db_health import CircuitOpenError
+from utils.write_journal import (
+    JournalEntry, find_conflict, JOURNAL_INSERT, JOURNAL_UPDATE, JOURNAL_DELETE,
+    STATUS_PENDING, STATUS_DONE, STATUS_CONFLICT,
+)
+
+class TestFindConflict(unittest.TestCase):
+
+    COLUMN_OF = {"XCLIENTES": "XCLIENTES", "CLIENTE": "RAZAO", "CIDADE": "CIDADE"}
+
+    def _entry(self, operation, data, base=None):
+        return JournalEntry(1, 0.0, operation, "10", data, base, STATUS_PENDING, 0, None)
+
+    def test_update_conflicts_only_when_server_changed_the_same_field(self):
+        base = {"XCLIENTES": "10", "RAZAO": "Acme", "CIDADE": "Curitiba"}
+        entry = self._entry(JOURNAL_UPDATE, {"XCLIENTES": "10", "CLIENTE": "Acme S/A"}, base)
+
+        self.assertIsNone(find_conflict(entry, dict(base, CIDADE="Londrina"), self.COLUMN_OF)) # Outro campo
+        self.assertIsNone(find_conflict(entry, dict(base, RAZAO="Acme S/A  "), self.COLUMN_OF)) # Mesmo valor
+        self.assertIn("CLIENTE", find_conflict(entry, dict(base, RAZAO="Acme Corp"), self.COLUMN_OF))
+        self.assertIsNotNone(find_conflict(entry, None, self.COLUMN_OF))
+
+    def test_insert_and_delete(self):
+        self.assertIsNone(find_conflict(self._entry(JOURNAL_INSERT, {"XCLIENTES": "10"}), None, self.COLUMN_OF))
+        self.assertIsNotNone(find_conflict(self._entry(JOURNAL_INSERT, {"XCLIENTES": "10"}), {"XCLIENTES": "10"}, self.COLUMN_OF))
+        base = {"XCLIENTES": "10", "RAZAO": "Acme"}
+        delete = self._entry(JOURNAL_DELETE, {"identifier": "10"}, base)
+        self.assertIsNone(find_conflict(delete, dict(base), self.COLUMN_OF))
+        self.assertIsNotNone(find_conflict(delete, dict(base, RAZAO="Acme S/A"), self.COLUMN_OF))
+
+class TestWriteJournalReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        db_config = {"BACKEND": "sqlite", "SQLITE_PATH": os.path.join(self.tmpdir.name, "clients.db")}
+        self.config_patch = patch.object(db_operations.config_manager, "DB_CONFIG", db_config)
+        self.config_patch.start()
+        self.settings_patch = patch.dict(db_operations.config_manager.APP_SETTINGS, {
+            "WRITE_JOURNAL_ENABLED": True,
+            "WRITE_JOURNAL_PATH": os.path.join(self.tmpdir.name, "journal.db"),
+            "WRITE_JOURNAL_REPLAY_INTERVAL": 3600,
+        })
+        self.settings_patch.start()
+        db_operations._on_config_changed({"DB_CONFIG"})
+        self.messagebox_patch = patch('utils.db_operations.messagebox')
+        self.mock_messagebox = self.messagebox_patch.start()
+
+    def tearDown(self):
+        journal, db_operations._journal = db_operations._journal, None
+        db_operations._breaker.remove_listener(db_operations._on_health_changed)
+        db_operations._journal_wake.set() # Encerra a thread de reenvio
+        if journal is not None:
+            journal.close()
+        db_operations.get_connection_pool().close_all()
+        self.config_patch.stop()
+        self.settings_patch.stop()
+        self.messagebox_patch.stop()
+        db_operations._on_config_changed({"DB_CONFIG"})
+        self.tmpdir.cleanup()
+
+    def _client(self, xclientes, razao, cgc):
+        return {"XCLIENTES": xclientes, "CLIENTE": razao, "CGC": cgc, "CIDADE": "Curitiba"}
+
+    def _offline(self):
+        return patch.object(db_operations, "acquire_connection", side_effect=CircuitOpenError("down"))
+
+    def test_offline_writes_replay_in_one_transaction(self):
+        db_operations.insert_client_data(self._client("10", "Acme", "111"))
+        loaded = db_operations.get_client_data("10")
+
+        with self._offline():
+            queued_update = db_operations.update_client_data(self._client("10", "Acme S/A", "111"), before_data=loaded)
+            queued_insert = db_operations.insert_client_data(self._client("20", "Beta", "222"))
+            queued_delete = db_operations.delete_client_data("10")
+        self.assertIsInstance(queued_update, db_operations.QueuedWrite)
+        self.assertIsInstance(queued_insert, db_operations.QueuedWrite)
+        self.assertIsInstance(queued_delete, db_operations.QueuedWrite)
+        self.assertEqual(db_operations.get_write_journal().counts(), {STATUS_PENDING: 3})
+        self.mock_messagebox.showerror.assert_not_called()
+
+        report = db_operations.replay_write_journal()
+        self.assertEqual((report.done, report.conflicts, report.failed, report.transactions), (3, 0, 0, 1))
+        self.assertIsNone(db_operations.get_client_data("10"))
+        self.assertEqual(db_operations.get_client_data("20")["RAZAO"], "Beta")
+        self.assertEqual(db_operations.get_write_journal().counts(), {STATUS_DONE: 3})
+
+    def test_conflict_holds_later_entries_of_the_same_client(self):
+        db_operations.insert_client_data(self._client("10", "Acme", "111"))
+        loaded = db_operations.get_client_data("10")
+
+        with self._offline():
+            db_operations.update_client_data(self._client("10", "Acme S/A", "111"), before_data=loaded)
+            db_operations.delete_client_data("10")
+        db_operations.update_client_data(self._client("10", "Acme Corp", "111")) # Outra estação, direto no banco
+
+        report = db_operations.replay_write_journal()
+        self.assertEqual((report.done, report.conflicts), (0, 1))
+        self.assertEqual(db_operations.get_client_data("10")["RAZAO"], "Acme Corp")
+        statuses = [entry.status for entry in db_operations.get_write_journal().entries()]
+        self.assertEqual(statuses, [STATUS_CONFLICT, STATUS_PENDING])
+
+        journal = db_operations.get_write_journal()
+        journal.retry(journal.entries()[0].id) # Operador decide sobrescrever
+        report = db_operations.replay_write_journal()
+        self.assertEqual(report.done, 2)
+        self.assertIsNone(db_operations.get_client_data("10"))
+
+    def test_name_only_delete_is_not_queued_offline(self):
+        db_operations.insert_client_data(self._client("10", "Acme", "111"))
+        with self._offline():
+            self.assertFalse(db_operations.delete_client_data("Acme"))
+        self.mock_messagebox.showerror.assert_called_once()
+        self.assertEqual(db_operations.get_write_journal().counts(), {})
+        self.assertIsNotNone(db_operations.get_client_data("10"))
+
+    def test_replay_reserves_ids_on_its_connection_and_purges_old_entries(self):
+        journal = db_operations.get_write_journal()
+        old_id = journal.append(JOURNAL_UPDATE, "99", {"XCLIENTES": "99"})
+        journal.mark(old_id, STATUS_DONE)
+        journal._conn.execute("UPDATE write_journal SET created_at = 0 WHERE id = ?", (old_id,))
+        journal._conn.commit()
+
+        settings = dict(db_operations.config_manager.APP_SETTINGS, DB_POOL_MAX_SIZE=1, DB_POOL_ACQUIRE_TIMEOUT=1)
+        with patch.object(db_operations.config_manager, "APP_SETTINGS", settings):
+            db_operations._on_config_changed({"APP_SETTINGS"})
+            try:
+                self.assertIsInstance(db_operations.insert_client_data(self._client(None, "Beta", "222")), db_operations.QueuedWrite)
+                report = db_operations.replay_write_journal()
+            finally:
+                db_operations._on_config_changed({"APP_SETTINGS"})
+        self.assertEqual((report.done, report.failed), (1, 0))
+        client_id = journal.entries((STATUS_DONE,))[0].client_id
+        self.assertEqual(db_operations.get_client_data(client_id)["RAZAO"], "Beta")
+        self.assertEqual(journal.counts(), {STATUS_DONE: 1}) # A antiga foi removida
+
+    def test_ids_reserved_in_a_failed_batch_are_not_reused(self):
+        from utils.id_allocator import get_xclientes_allocator
+        backend = db_operations.get_backend()
+        fetch_for_update = backend.fetch_for_update
+        calls = []
+
+        def fail_first_batch(*args):
+            calls.append(args)
+            if len(calls) == 1:
+                raise sqlite3.OperationalError("disk I/O error") # Depois da reserva, dentro da transação
+            return fetch_for_update(*args)
+
+        get_xclientes_allocator().reserve_block(1) # Contador já existe: o próximo id vem dele, não do MAX(XCLIENTES)
+        db_operations.insert_client_data(self._client(None, "Acme", "111"))
+        db_operations.insert_client_data(self._client(None, "Beta", "222"))
+        with patch.object(backend, "fetch_for_update", side_effect=fail_first_batch):
+            report = db_operations.replay_write_journal()
+        self.assertEqual((report.done, report.failed, report.transactions), (2, 0, 2)) # Reenviadas uma a uma
+
+        ids = [entry.client_id for entry in db_operations.get_write_journal().entries((STATUS_DONE,))]
+        self.assertEqual(len(set(ids)), 2)
+        self.assertNotIn(str(get_xclientes_allocator().reserve_block(1)[0]), ids)
+        self.assertEqual([db_operations.get_client_data(client_id)["RAZAO"] for client_id in ids], ["Acme", "Beta"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,18 +5,20 @@ import os
 # Add the parent directory to the Python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from utils.db_operations import update_client_data, get_client_data
+from utils.db_operations import update_client_data, get_client_data, search_clients, get_write_journal, QueuedWrite
+from utils.db_executor import DbTaskMixin
 from utils.validation_utils import validate_fields
 from update.client_update_gui import ClientUpdateGUI
 import customtkinter as ctk # Keep ctk for the mainloop at the end
 from utils.config_manager import CLIENT_FIELDS_CONFIG # Keep for db_column mapping
 from utils.logger import log_activity
 
-class ClientUpdateApp(ClientUpdateGUI):
+class ClientUpdateApp(DbTaskMixin, ClientUpdateGUI):
     def __init__(self, root=None):
         super().__init__(root)
         # The GUI setup is now handled by ClientUpdateGUI's __init__
         self.current_xclientes = None # Initialize current_xclientes
+        self.loaded_client_data = None # Linha mostrada no formulário (base do update se o banco cair)
 
     def search_client(self):
         identifier = self.search_entry.get().strip()
@@ -24,9 +26,41 @@ class ClientUpdateApp(ClientUpdateGUI):
             messagebox.showerror("Input Error", "Please enter XCLIENTES, CGC, Name, or Inscrição to search.")
             return
 
-        client_data = get_client_data(identifier)
+        self.search_query = identifier
+        self.results_list.reset()
+        self.load_results_page(None)
+
+    def load_results_page(self, after_key):
+        """Próxima página de registros leves da busca atual (after_key None: a primeira)."""
+        self.run_db_task(
+            search_clients, self.search_query, after_key=after_key,
+            on_success=lambda page: self.show_results_page(page, first_page=after_key is None),
+            on_error=self.show_results_error,
+            key="search"
+        )
+
+    def show_results_page(self, page, first_page=False):
+        records, next_key = page
+        self.results_list.add_page(records, next_key)
+        if not first_page:
+            return
+        if not records:
+            self.show_search_result(None)
+        elif len(records) == 1 and next_key is None:
+            self.on_result_selected(records[0]) # Um único resultado: abre direto
+
+    def show_results_error(self, error):
+        self.results_list.load_failed() # Libera a rolagem para tentar a página de novo
+        messagebox.showerror("Database Error", f"An unexpected error occurred: {error}")
+
+    def on_result_selected(self, record):
+        # Só aqui o cadastro completo é lido; é ele que vai para o formulário e para o update
+        self.run_db_task(get_client_data, record["XCLIENTES"], on_success=self.show_search_result, key="select")
+
+    def show_search_result(self, client_data):
         if client_data:
             self.populate_form_fields(client_data) # populate_form_fields is now in ClientUpdateGUI
+            self.loaded_client_data = client_data
             # Store the XCLIENTES for update operation
             self.current_xclientes = client_data.get(next((f["db_column"] for f in CLIENT_FIELDS_CONFIG if f["name"] == "XCLIENTES"), None))
         else:
@@ -39,7 +73,12 @@ class ClientUpdateApp(ClientUpdateGUI):
             return
 
         # Fetch current data from the database to retain values for empty, non-cleared fields
-        current_db_data = get_client_data(self.current_xclientes)
+        self.run_db_task(get_client_data, self.current_xclientes, on_success=self.apply_update, key="update")
+
+    def apply_update(self, current_db_data):
+        if not current_db_data and get_write_journal() is not None:
+            # Banco fora do ar: o update vai para o diário offline com a linha carregada como base do conflito
+            current_db_data = self.loaded_client_data
         if not current_db_data:
             messagebox.showerror("Error", "Could not retrieve current client data from database.")
             return
@@ -72,21 +111,37 @@ class ClientUpdateApp(ClientUpdateGUI):
             messagebox.showerror("Validation Error", "\n".join(validation_errors))
             return
         
-        # Log data before update
-        log_activity(
-            action="Client Update - Before",
-            user_data_before=current_db_data,
-            user_id=self.current_xclientes
+        # Only the columns that differ from current_db_data are sent
+        self.run_db_task(
+            update_client_data, updated_client_data, before_data=current_db_data,
+            on_success=lambda result: self.show_update_result(result, current_db_data, updated_client_data),
+            key="update",
+            write=True
         )
 
-        if update_client_data(updated_client_data):
+    def show_update_result(self, result, current_db_data, updated_client_data):
+        if isinstance(result, QueuedWrite):
+            messagebox.showinfo("Saved Offline", "The database is unreachable: the update was queued and will be sent when the connection returns.")
+            log_activity(
+                action="Client Update - Queued Offline",
+                user_data_before=current_db_data,
+                user_data_after=updated_client_data,
+                user_id=self.current_xclientes
+            )
+        elif result and not result.changed_fields:
+            messagebox.showinfo("No Changes", "Nothing to update: no field was changed.")
+        elif result:
             messagebox.showinfo("Success", "Client updated successfully!")
-            # Re-populate form to show the updated data from DB, including cleared fields
-            self.search_client()
-            # Log data after successful update
+            # Re-populate the form from the after image returned by the update, instead of searching again
+            self.populate_form_fields(result.after or {})
+            log_activity(
+                action="Client Update - Before",
+                user_data_before=result.before,
+                user_id=self.current_xclientes
+            )
             log_activity(
                 action="Client Update - After",
-                user_data_after=updated_client_data,
+                user_data_after=result.after,
                 user_id=self.current_xclientes
             )
         else:
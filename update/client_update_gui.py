@@ -9,7 +9,9 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from utils.cep_integration import on_cep_focus_out, fill_address_fields
 from utils.centerWindow import centerWindow
 from utils.config_manager import ConfigManager # Import the class
+from utils.db_operations import get_validation_rules
 from utils.log_viewer_app import LogViewerApp
+from utils.search_results_list import SearchResultsList
 
 class ClientUpdateGUI(ctk.CTkToplevel):
     def __init__(self, root=None):
@@ -28,7 +30,8 @@ class ClientUpdateGUI(ctk.CTkToplevel):
 
     def update_field_and_validation_rules(self):
         self.FIELDS = [field["name"] for field in self.config_manager.CLIENT_FIELDS_CONFIG if field["name"] != "XCLIENTES"]
-        self.VALIDATION_RULES = {field["name"]: (field["max_length"], field["required"]) for field in self.config_manager.CLIENT_FIELDS_CONFIG}
+        # max_length vem do tamanho real da coluna quando os metadados da FBCLIENTES já foram carregados
+        self.VALIDATION_RULES = get_validation_rules()
 
     def setup_gui_elements(self):
         for widget in self.winfo_children():
@@ -58,6 +61,10 @@ class ClientUpdateGUI(ctk.CTkToplevel):
             clear_checkbox.grid(row=idx + 1, column=2, padx=5, pady=5, sticky=ctk.W)
             self.clear_checkboxes[field] = clear_var # Store the BooleanVar
 
+        # Todos os clientes que casam com a busca; o cadastro completo só é lido ao selecionar um
+        self.results_list = SearchResultsList(self, on_select=self.on_result_selected, on_load_more=self.load_results_page)
+        self.results_list.grid(row=1, column=3, rowspan=max(1, len(self.FIELDS)), padx=10, pady=5, sticky=ctk.NSEW)
+
         if "CEP" in self.entry_widgets:
             self.entry_widgets["CEP"].bind("<FocusOut>", self.on_cep_focus_out_wrapper)
         
@@ -0,0 +1,67 @@
+import argparse
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.identifier_resolver import parse_identifiers
+
+def format_batch_result(identifier, client_data, match_key):
+    """Uma linha do resultado em lote: FOUND/NOT FOUND, identificador e o cliente encontrado."""
+    if client_data is None:
+        return f"NOT FOUND\t{identifier}"
+    return f"FOUND\t{identifier}\t{client_data.get('XCLIENTES')}\t{client_data.get('RAZAO') or ''}\t({match_key})"
+
+def summarize_batch(results):
+    found = sum(1 for _, client_data, _ in results if client_data is not None)
+    return f"Found: {found}  Not found: {len(results) - found}  Total: {len(results)}"
+
+def found_client_ids(results):
+    """XCLIENTES encontrados, sem repetidos (dois identificadores podem cair no mesmo cliente)."""
+    return list(dict.fromkeys(client_data.get("XCLIENTES") for _, client_data, _ in results if client_data is not None))
+
+def main(argv=None):
+    from utils.db_operations import resolve_clients_batch, delete_clients_batch
+    from utils.logger import log_activity
+
+    parser = argparse.ArgumentParser(description="Busca (e opcionalmente apaga) vários clientes de uma vez.")
+    parser.add_argument("path", help="Arquivo com um identificador por linha ('-' para a entrada padrão)")
+    parser.add_argument("--delete", action="store_true", help="Apaga os encontrados em uma única transação")
+    parser.add_argument("--yes", action="store_true", help="Não pede confirmação antes de apagar")
+    args = parser.parse_args(argv)
+
+    if args.path == "-":
+        text = sys.stdin.read()
+    else:
+        with open(args.path, encoding="utf-8") as f:
+            text = f.read()
+
+    results = resolve_clients_batch(parse_identifiers(text))
+    if results is None:
+        return 2
+    for result in results:
+        print(format_batch_result(*result))
+    print(summarize_batch(results))
+
+    client_ids = found_client_ids(results)
+    if not args.delete or not client_ids:
+        return 0
+    if not args.yes and input(f"Delete {len(client_ids)} clients? [y/N] ").strip().lower() != "y":
+        print("Nothing deleted.")
+        return 0
+
+    deleted = delete_clients_batch(client_ids)
+    if deleted is False:
+        return 2
+    log_activity(
+        action="Client Batch Delete",
+        user_data_before={result.client_id: result.before for result in deleted},
+        user_data_after={"status": "deleted", "count": len(deleted)},
+        user_id=", ".join(str(result.client_id) for result in deleted)
+    )
+    print(f"Deleted: {len(deleted)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
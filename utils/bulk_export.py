@@ -0,0 +1,166 @@
+import argparse
+import csv
+import gzip
+import json
+import os
+import sys
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.config_manager import ConfigManager
+
+config_manager = ConfigManager()
+
+DEFAULT_CHUNK_SIZE = 1000
+
+class ExportReport:
+    """Resumo de uma exportação: linhas, blocos lidos com fetchmany e velocidade."""
+
+    def __init__(self, chunk_size):
+        self.chunk_size = chunk_size
+        self.rows = 0
+        self.chunks = 0
+        self.fetch_seconds = 0.0
+        self.started_at = time.monotonic()
+        self.finished_at = None
+
+    @property
+    def elapsed(self):
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self):
+        return (f"{self.rows} rows in {self.chunks} chunks of {self.chunk_size}, {self.elapsed:.1f}s "
+                f"({self.rows_per_second:.0f} rows/s, {self.fetch_seconds:.1f}s waiting on fetchmany)")
+
+def build_export_query(columns, table, estado=None, cidade=None, xclientes_from=None, xclientes_to=None):
+    """
+    Monta o SELECT projetado com os filtros opcionais, em ordem de XCLIENTES (a
+    chave: o banco lê pelo índice, sem ordenar). Retorna (sql, parâmetros).
+    A faixa xclientes_from/xclientes_to compara a própria coluna, na mesma ordem
+    da exportação, para o banco buscar direto no índice da chave; converter
+    XCLIENTES em número no WHERE obrigaria a ler a tabela inteira.
+    """
+    conditions = []
+    params = []
+    if estado:
+        conditions.append("ESTADO = ?")
+        params.append(estado)
+    if cidade:
+        conditions.append("CIDADE = ?")
+        params.append(cidade)
+    if xclientes_from is not None:
+        conditions.append("XCLIENTES >= ?")
+        params.append(str(xclientes_from).strip())
+    if xclientes_to is not None:
+        conditions.append("XCLIENTES <= ?")
+        params.append(str(xclientes_to).strip())
+
+    sql = f"SELECT {', '.join(columns)} FROM {table}"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY XCLIENTES"
+    return sql, params
+
+def iter_client_rows(chunk_size=DEFAULT_CHUNK_SIZE, columns=None, report=None, **filters):
+    """
+    Gera os clientes como dicionários, lendo do banco com cursor.fetchmany(chunk_size).
+    Só um bloco fica em memória por vez; a conexão volta ao pool quando o gerador termina.
+    """
+    from utils.db_health import OP_BULK
+    from utils.db_operations import get_backend, acquire_connection
+
+    backend = get_backend()
+    columns = columns or [field["db_column"] for field in config_manager.CLIENT_FIELDS_CONFIG]
+    sql, params = build_export_query(columns, backend.client_table, **filters)
+
+    conn = acquire_connection(OP_BULK)
+    try:
+        cursor = conn.cursor()
+        cursor.arraysize = chunk_size
+        cursor.execute(sql, params)
+        names = [column[0] for column in cursor.description]
+        while True:
+            fetch_started = time.monotonic()
+            rows = cursor.fetchmany(chunk_size)
+            if report is not None:
+                report.fetch_seconds += time.monotonic() - fetch_started
+            if not rows:
+                break
+            if report is not None:
+                report.chunks += 1
+                report.rows += len(rows)
+            for row in rows:
+                yield dict(zip(names, row))
+    finally:
+        conn.close()
+
+def _open_output(path, compress):
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+def export_clients(path, file_format=None, compress=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                   progress_callback=None, **filters):
+    """Exporta a FBCLIENTES para CSV ou JSONL (opcionalmente .gz) em streaming."""
+    lower = path.lower()
+    if compress is None:
+        compress = lower.endswith(".gz")
+    if file_format is None:
+        file_format = "jsonl" if lower.replace(".gz", "").endswith((".jsonl", ".ndjson")) else "csv"
+
+    columns = [field["db_column"] for field in config_manager.CLIENT_FIELDS_CONFIG]
+    report = ExportReport(chunk_size)
+    last_reported_chunk = 0
+
+    with _open_output(path, compress) as out:
+        writer = None
+        if file_format == "csv":
+            writer = csv.DictWriter(out, fieldnames=columns)
+            writer.writeheader()
+        for row in iter_client_rows(chunk_size=chunk_size, columns=columns, report=report, **filters):
+            if writer:
+                writer.writerow(row)
+            else:
+                out.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+            if progress_callback and report.chunks != last_reported_chunk:
+                last_reported_chunk = report.chunks
+                progress_callback(report)
+
+    report.finished_at = time.monotonic()
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta a FBCLIENTES para CSV/JSONL.")
+    parser.add_argument("path", help="Arquivo de saída (.csv, .jsonl, opcionalmente .gz)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Formato (padrão: pela extensão)")
+    parser.add_argument("--gzip", action="store_true", default=None, help="Compacta a saída com gzip")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--estado")
+    parser.add_argument("--cidade")
+    parser.add_argument("--xclientes-from")
+    parser.add_argument("--xclientes-to")
+    args = parser.parse_args(argv)
+
+    report = export_clients(
+        args.path,
+        file_format=args.format,
+        compress=args.gzip,
+        chunk_size=args.chunk_size,
+        progress_callback=lambda r: print(r.summary()) if r.chunks % 10 == 0 else None,
+        estado=args.estado,
+        cidade=args.cidade,
+        xclientes_from=args.xclientes_from,
+        xclientes_to=args.xclientes_to
+    )
+    print(report.summary())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
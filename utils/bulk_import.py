@@ -0,0 +1,226 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.config_manager import ConfigManager
+from utils.validation_utils import validate_fields
+
+config_manager = ConfigManager()
+
+DEFAULT_BATCH_SIZE = 500
+MAX_REJECTS_IN_MEMORY = 1000
+
+class ImportReport:
+    """Resumo de uma importação: linhas lidas, inseridas, rejeitadas e velocidade."""
+
+    def __init__(self):
+        self.rows_read = 0
+        self.inserted = 0
+        self.rejected = 0
+        self.batches = 0
+        self.rejects = [] # Apenas as primeiras MAX_REJECTS_IN_MEMORY; todas vão para o arquivo de rejeitos
+        self.started_at = time.monotonic()
+        self.finished_at = None
+
+    @property
+    def elapsed(self):
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    @property
+    def rows_per_second(self):
+        return self.rows_read / self.elapsed if self.elapsed > 0 else 0.0
+
+    def add_reject(self, line_no, errors):
+        self.rejected += 1
+        if len(self.rejects) < MAX_REJECTS_IN_MEMORY:
+            self.rejects.append((line_no, errors))
+
+    def summary(self):
+        return (f"{self.rows_read} rows read, {self.inserted} inserted, {self.rejected} rejected "
+                f"in {self.batches} batches, {self.elapsed:.1f}s ({self.rows_per_second:.0f} rows/s)")
+
+def detect_format(path):
+    lower = path.lower()
+    if lower.endswith(".jsonl") or lower.endswith(".ndjson"):
+        return "jsonl"
+    return "csv"
+
+def iter_source_rows(path, file_format=None, delimiter=None):
+    """Lê o arquivo em streaming, devolvendo (número_da_linha, dicionário) um por vez."""
+    file_format = file_format or detect_format(path)
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if file_format == "jsonl":
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_no, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_no, e
+            return
+
+        if delimiter is None:
+            sample = f.read(4096)
+            f.seek(0)
+            try:
+                delimiter = csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+            except csv.Error:
+                delimiter = ","
+        reader = csv.DictReader(f, delimiter=delimiter)
+        for row in reader:
+            yield reader.line_num, row
+
+def build_column_mapping(headers, fields_config):
+    """
+    Mapeia cabeçalhos do arquivo para nomes de campo do CLIENT_FIELDS_CONFIG.
+    Aceita tanto o nome do campo quanto a coluna do banco (sem diferenciar maiúsculas).
+    XCLIENTES é sempre ignorado: os ids são reservados pela importação.
+    """
+    lookup = {}
+    for field in fields_config:
+        if field["name"] == "XCLIENTES":
+            continue
+        lookup[field["name"].upper()] = field["name"]
+        lookup.setdefault(field["db_column"].upper(), field["name"])
+    return {header: lookup[header.strip().upper()] for header in headers if header and header.strip().upper() in lookup}
+
+def map_row(raw_row, mapping):
+    client_data = {}
+    for header, field_name in mapping.items():
+        value = raw_row.get(header)
+        client_data[field_name] = "" if value is None else str(value).strip()
+    return client_data
+
+def _insert_batch(conn, backend, statements, allocator, batch, report, reject, inserted):
+    """Insere o lote em uma transação; se falhar, reenvia linha a linha para achar os rejeitos."""
+    # Ids reservados na conexão do lote (não empresta outra do pool) e confirmados antes
+    # do INSERT: se o lote voltar atrás, o reenvio linha a linha usa os mesmos ids
+    ids = allocator.reserve_block(len(batch), conn)
+    conn.commit()
+    for (_, client_data), xclientes in zip(batch, ids):
+        client_data["XCLIENTES"] = xclientes
+
+    cursor = backend.bulk_cursor(conn)
+    backend.bind_input_sizes(cursor, statements.insert_columns)
+    try:
+        params = [statements.bulk_insert_values(client_data) for _, client_data in batch]
+        cursor.executemany(statements.bulk_insert_sql, params)
+        conn.commit()
+        report.inserted += len(batch)
+        for _, client_data in batch:
+            inserted(client_data)
+        return
+    except backend.errors:
+        conn.rollback()
+
+    for line_no, client_data in batch:
+        try:
+            cursor.execute(statements.bulk_insert_sql, statements.bulk_insert_values(client_data))
+            conn.commit()
+            report.inserted += 1
+            inserted(client_data)
+        except backend.errors as e:
+            conn.rollback()
+            reject(line_no, [f"Database error: {e}"])
+
+def import_clients(path, batch_size=DEFAULT_BATCH_SIZE, file_format=None, delimiter=None,
+                   reject_path=None, progress_callback=None):
+    """
+    Importa clientes de um CSV/JSONL para a FBCLIENTES em lotes.
+    O arquivo é lido em streaming: só um lote fica em memória por vez.
+    """
+    from utils.db_health import OP_BULK
+    from utils.db_operations import get_backend, acquire_connection, get_client_statements, get_validation_rules, _notify_mutation
+    from utils.id_allocator import get_xclientes_allocator
+
+    fields_config = config_manager.CLIENT_FIELDS_CONFIG
+    validation_rules = {name: rule for name, rule in get_validation_rules().items() if name != "XCLIENTES"}
+    backend = get_backend()
+    statements = get_client_statements()
+    allocator = get_xclientes_allocator()
+
+    report = ImportReport()
+    reject_file = open(reject_path, "w", encoding="utf-8", newline="") if reject_path else None
+    reject_writer = csv.writer(reject_file) if reject_file else None
+    conn = acquire_connection(OP_BULK)
+    mappings = {} # Um mapeamento por conjunto de cabeçalhos (no JSONL as chaves podem variar)
+    batch = []
+
+    def reject(line_no, errors):
+        report.add_reject(line_no, errors)
+        if reject_writer:
+            reject_writer.writerow([line_no, "; ".join(errors)])
+
+    def inserted(client_data):
+        # Mesmo aviso do insert_client_data: cache de clientes, índice de nomes e cópia local ficam em dia
+        _notify_mutation("insert", client_data["XCLIENTES"],
+                         after=statements.row_to_dict(statements.bulk_insert_values(client_data)))
+
+    def flush():
+        _insert_batch(conn, backend, statements, allocator, batch, report, reject, inserted)
+        report.batches += 1
+        batch.clear()
+        if progress_callback:
+            progress_callback(report)
+
+    try:
+        for line_no, raw_row in iter_source_rows(path, file_format, delimiter):
+            report.rows_read += 1
+            if isinstance(raw_row, Exception):
+                reject(line_no, [f"Invalid JSON: {raw_row}"])
+                continue
+            headers = tuple(raw_row.keys())
+            if headers not in mappings:
+                if len(mappings) > 64:
+                    mappings.clear()
+                mappings[headers] = build_column_mapping(headers, fields_config)
+            client_data = map_row(raw_row, mappings[headers])
+
+            errors = validate_fields(client_data, validation_rules)
+            if errors:
+                reject(line_no, errors)
+                continue
+
+            batch.append((line_no, client_data))
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+    finally:
+        conn.close()
+        if reject_file:
+            reject_file.close()
+        report.finished_at = time.monotonic()
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importa clientes de um arquivo CSV/JSONL para a FBCLIENTES.")
+    parser.add_argument("path", help="Arquivo .csv ou .jsonl")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Formato do arquivo (padrão: pela extensão)")
+    parser.add_argument("--delimiter", help="Separador do CSV (padrão: detectado)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--rejects", help="Grava as linhas rejeitadas neste CSV")
+    args = parser.parse_args(argv)
+
+    report = import_clients(
+        args.path,
+        batch_size=args.batch_size,
+        file_format=args.format,
+        delimiter=args.delimiter,
+        reject_path=args.rejects,
+        progress_callback=lambda r: print(r.summary())
+    )
+    print(report.summary())
+    for line_no, errors in report.rejects:
+        print(f"  line {line_no}: {'; '.join(errors)}")
+    return 0 if report.rejected == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+
+from utils.query_metrics import percentile
+
+DEFAULT_CEP_CACHE_PATH = "cep_cache.db"
+DEFAULT_MEMORY_ENTRIES = 500
+DEFAULT_DISK_ENTRIES = 50000
+DEFAULT_TTL = 30 * 24 * 3600       # Endereço de um CEP quase nunca muda
+DEFAULT_NEGATIVE_TTL = 24 * 3600   # "CEP não encontrado" expira antes: a base dos Correios é atualizada
+LATENCY_SAMPLES = 500
+
+SOURCE_MEMORY = "memory"
+SOURCE_DISK = "disk"
+SOURCE_NETWORK = "network"
+SOURCE_OFFLINE = "offline" # Base de CEPs local (utils.cep_offline)
+
+class CepCache:
+    """
+    Cache de endereços por CEP em dois níveis: LRU em memória na frente de um
+    arquivo SQLite que sobrevive entre sessões. Guarda também o "CEP não
+    encontrado" (negative caching) com um TTL menor. Os dois níveis são
+    limitados por número de entradas; no disco saem as usadas há mais tempo.
+    Se o arquivo não puder ser aberto, o cache continua só em memória.
+    """
+
+    def __init__(self, path=DEFAULT_CEP_CACHE_PATH, memory_entries=DEFAULT_MEMORY_ENTRIES,
+                 disk_entries=DEFAULT_DISK_ENTRIES, ttl=DEFAULT_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL):
+        self.path = path
+        self._lock = threading.Lock()
+        self._memory = OrderedDict() # cep -> (expira_em, endereço ou None)
+        self._latencies = {source: deque(maxlen=LATENCY_SAMPLES) for source in (SOURCE_MEMORY, SOURCE_DISK, SOURCE_OFFLINE, SOURCE_NETWORK)}
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.last_error = None
+        self._conn = None
+        self._disk_count = 0
+        self.configure(memory_entries, disk_entries, ttl, negative_ttl)
+        self._open_disk()
+
+    def configure(self, memory_entries=None, disk_entries=None, ttl=None, negative_ttl=None):
+        with self._lock:
+            if memory_entries is not None:
+                self.memory_entries = max(0, int(memory_entries))
+            if disk_entries is not None:
+                self.disk_entries = max(0, int(disk_entries))
+            if ttl is not None:
+                self.ttl = float(ttl)
+            if negative_ttl is not None:
+                self.negative_ttl = float(negative_ttl)
+            self._evict_memory()
+
+    def _open_disk(self):
+        if not self.path:
+            return
+        try:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cep_cache ("
+                "cep TEXT PRIMARY KEY, address TEXT, expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS IX_cep_cache_last_used ON cep_cache (last_used)")
+            conn.commit()
+            self._disk_count = conn.execute("SELECT COUNT(*) FROM cep_cache").fetchone()[0]
+            self._conn = conn
+        except sqlite3.Error as e:
+            self.last_error = str(e) # Segue só com a memória
+
+    def _disk_failed(self, error):
+        self.last_error = str(error)
+        try:
+            self._conn.close()
+        except sqlite3.Error:
+            pass
+        self._conn = None
+
+    def get(self, cep):
+        """
+        (fonte, endereço) do CEP: fonte é SOURCE_MEMORY ou SOURCE_DISK e endereço é
+        None quando o CEP está guardado como não encontrado. Retorna None se não
+        está no cache (ou expirou).
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(cep)
+            if entry is not None and entry[0] >= now:
+                self._memory.move_to_end(cep)
+                return self._hit(SOURCE_MEMORY, entry[1])
+            if entry is not None:
+                del self._memory[cep]
+            row = None
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute("SELECT address, expires_at FROM cep_cache WHERE cep = ?", (cep,)).fetchone()
+                    if row is not None and row[1] >= now:
+                        self._conn.execute("UPDATE cep_cache SET last_used = ? WHERE cep = ?", (now, cep))
+                        self._conn.commit()
+                except sqlite3.Error as e:
+                    self._disk_failed(e)
+                    row = None
+            if row is None or row[1] < now:
+                self.misses += 1
+                return None
+            address = json.loads(row[0]) if row[0] is not None else None
+            self._remember(cep, row[1], address)
+            return self._hit(SOURCE_DISK, address)
+
+    def _hit(self, source, address):
+        if source == SOURCE_MEMORY:
+            self.memory_hits += 1
+        else:
+            self.disk_hits += 1
+        if address is None:
+            self.negative_hits += 1
+        return source, (dict(address) if address is not None else None)
+
+    def put(self, cep, address):
+        """Guarda o endereço do CEP (dicionário da ViaCEP)."""
+        self._store(cep, dict(address), self.ttl)
+
+    def put_not_found(self, cep):
+        self._store(cep, None, self.negative_ttl)
+
+    def _store(self, cep, address, ttl):
+        now = time.time()
+        expires_at = now + ttl
+        with self._lock:
+            self._remember(cep, expires_at, address)
+            if self._conn is None or self.disk_entries <= 0:
+                return
+            try:
+                exists = self._conn.execute("SELECT 1 FROM cep_cache WHERE cep = ?", (cep,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cep_cache (cep, address, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                    (cep, json.dumps(address, ensure_ascii=False) if address is not None else None, expires_at, now)
+                )
+                if not exists:
+                    self._disk_count += 1
+                self._evict_disk()
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self._disk_failed(e)
+
+    def _remember(self, cep, expires_at, address):
+        if self.memory_entries <= 0:
+            return
+        self._memory[cep] = (expires_at, address)
+        self._memory.move_to_end(cep)
+        self._evict_memory()
+
+    def _evict_memory(self):
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _evict_disk(self):
+        # Vencidas primeiro, depois as menos usadas; apaga 10% a mais para não rodar a cada put
+        overflow = self._disk_count - self.disk_entries
+        if overflow <= 0:
+            return
+        cursor = self._conn.execute("DELETE FROM cep_cache WHERE expires_at < ?", (time.time(),))
+        self._disk_count -= max(cursor.rowcount, 0)
+        overflow = self._disk_count - self.disk_entries
+        if overflow > 0:
+            overflow += self.disk_entries // 10
+            cursor = self._conn.execute(
+                "DELETE FROM cep_cache WHERE cep IN (SELECT cep FROM cep_cache ORDER BY last_used LIMIT ?)", (overflow,)
+            )
+            self._disk_count -= max(cursor.rowcount, 0)
+            self.evictions += max(cursor.rowcount, 0)
+
+    def record_latency(self, source, seconds):
+        """Tempo de uma consulta de CEP completa, pela fonte que respondeu."""
+        with self._lock:
+            self._latencies[source].append(seconds * 1000)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                try:
+                    self._conn.execute("DELETE FROM cep_cache")
+                    self._conn.commit()
+                    self._disk_count = 0
+                except sqlite3.Error as e:
+                    self._disk_failed(e)
+
+    def stats(self):
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            latency = {}
+            for source, samples in self._latencies.items():
+                ordered = sorted(samples)
+                latency[source] = {"count": len(ordered), "p50_ms": percentile(ordered, 50), "p95_ms": percentile(ordered, 95)}
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "hit_ratio": hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "disk_entries": self._disk_count if self._conn is not None else 0,
+                "latency": latency,
+                "last_error": self.last_error,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+def cep_cache_settings(app_settings):
+    """Argumentos do CepCache.configure a partir do APP_SETTINGS."""
+    return {
+        "memory_entries": app_settings.get("CEP_CACHE_MEMORY_ENTRIES", DEFAULT_MEMORY_ENTRIES),
+        "disk_entries": app_settings.get("CEP_CACHE_DISK_ENTRIES", DEFAULT_DISK_ENTRIES),
+        "ttl": app_settings.get("CEP_CACHE_TTL", DEFAULT_TTL),
+        "negative_ttl": app_settings.get("CEP_CACHE_NEGATIVE_TTL", DEFAULT_NEGATIVE_TTL),
+    }
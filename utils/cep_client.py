@@ -0,0 +1,283 @@
+import queue
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.cep_cache import SOURCE_NETWORK
+
+VIACEP_URL = "https://viacep.com.br/ws/{cep}/json/"
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE_LIMIT = 8
+DEFAULT_TIMEOUT = 5
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.5
+TRANSIENT_STATUS = (429, 500, 502, 503, 504)
+
+class CepLookupError(Exception):
+    """Falha na consulta de CEP, com o título e a mensagem mostrados ao operador."""
+
+    def __init__(self, title, message):
+        super().__init__(message)
+        self.title = title
+        self.message = message
+
+class CepLookup:
+    """
+    Uma consulta pedida por uma tela: CEP, callbacks de sucesso (endereço) e erro
+    (título, mensagem). Cancelada, não recebe o resultado; se todas as consultas
+    do mesmo CEP forem canceladas antes de um worker pegá-lo, nem vai à rede.
+    """
+
+    __slots__ = ("cep", "on_success", "on_error", "cancelled", "finished")
+
+    def __init__(self, cep, on_success, on_error):
+        self.cep = cep
+        self.on_success = on_success
+        self.on_error = on_error
+        self.cancelled = False
+        self.finished = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class _Transient(Exception):
+    """Resposta 429/5xx: vale tentar de novo."""
+
+class CepClient:
+    """
+    Cliente ViaCEP compartilhado pelas telas e pelos jobs em lote: uma
+    requests.Session com keep-alive (uma conexão TLS reaproveitada em vez de
+    um handshake por consulta), `workers` threads fixas alimentadas por uma
+    fila de até `queue_limit` CEPs e nova tentativa com backoff exponencial
+    em timeout, falha de conexão e respostas 429/5xx. Pedidos do mesmo CEP
+    enquanto ele está na fila ou em andamento entram na mesma consulta.
+    O cache de CEPs (utils.cep_cache) e os provedores locais (`providers`, ex.:
+    a base offline do utils.cep_offline) são consultados antes da rede; a
+    ViaCEP fica como reserva para o que eles não conhecem.
+    """
+
+    def __init__(self, cache=None, workers=DEFAULT_WORKERS, queue_limit=DEFAULT_QUEUE_LIMIT, timeout=DEFAULT_TIMEOUT,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, session=None, url=VIACEP_URL, providers=None):
+        self.cache = cache
+        self.providers = list(providers or []) # Objetos com lookup(cep) -> endereço ou None, e `source`
+        self.url = url
+        self.workers = max(1, int(workers))
+        self._session = session or self._create_session(self.workers)
+        self.queue_limit = max(1, int(queue_limit))
+        self._queue = queue.Queue() # CEPs; os pedidos ficam em _inflight
+        self._inflight = {} # cep -> [CepLookup] esperando o resultado
+        self._queued = set() # CEPs na fila que nenhum worker pegou ainda
+        self._threads = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self.requests = 0
+        self.retries_done = 0
+        self.failures = 0
+        self.rejected = 0
+        self.coalesced = 0
+        self.skipped = 0 # CEPs tirados da fila com todos os pedidos cancelados
+        self.configure(timeout, retries, backoff)
+
+    @staticmethod
+    def _create_session(workers):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def configure(self, timeout=None, retries=None, backoff=None):
+        if timeout is not None:
+            self.timeout = float(timeout)
+        if retries is not None:
+            self.retries = max(0, int(retries))
+        if backoff is not None:
+            self.backoff = max(0.0, float(backoff))
+
+    def fetch(self, cep):
+        """
+        Consulta a ViaCEP (sem cache). Retorna o endereço, ou None se o CEP não existe.
+        Levanta CepLookupError depois de esgotar as tentativas.
+        """
+        for attempt in range(self.retries + 1):
+            if attempt:
+                with self._lock:
+                    self.retries_done += 1
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            with self._lock:
+                self.requests += 1
+            try:
+                response = self._session.get(self.url.format(cep=cep), timeout=self.timeout)
+                if response.status_code in TRANSIENT_STATUS:
+                    raise _Transient(f"HTTP {response.status_code}")
+                response.raise_for_status()
+                data = response.json()
+                return None if "erro" in data else data
+            except requests.exceptions.Timeout:
+                error = CepLookupError("CEP Lookup Error", "CEP lookup timed out.")
+            except (requests.exceptions.ConnectionError, _Transient) as e:
+                error = CepLookupError("CEP Lookup Error", f"Error fetching CEP: {e}")
+            except requests.exceptions.RequestException as e:
+                error = CepLookupError("CEP Lookup Error", f"Error fetching CEP: {e}")
+                break # 4xx: outra tentativa daria o mesmo
+            except ValueError as e:
+                error = CepLookupError("CEP Lookup Error", f"Invalid response from the CEP service: {e}")
+                break
+        with self._lock:
+            self.failures += 1
+        raise error
+
+    def lookup(self, cep):
+        """
+        Endereço do CEP (cache, senão rede), ou None se não existe. Síncrono, na
+        thread atual: é o que os jobs em lote chamam. Levanta CepLookupError.
+        """
+        start = time.perf_counter()
+        local = self.lookup_local(cep)
+        if local is not None:
+            source, data = local
+            if self.cache is not None:
+                self.cache.record_latency(source, time.perf_counter() - start)
+            return data
+        data = self.fetch(cep)
+        if self.cache is not None:
+            self.cache.record_latency(SOURCE_NETWORK, time.perf_counter() - start)
+            if data is None:
+                self.cache.put_not_found(cep)
+            else:
+                self.cache.put(cep, data)
+        return data
+
+    def lookup_local(self, cep):
+        """
+        (fonte, endereço) sem ir à rede: de um provedor local ou do cache (endereço
+        None = CEP guardado como não encontrado). None se nenhum dos dois conhece o CEP.
+        Os provedores vêm primeiro: uma base offline atualizada vale mais que uma
+        resposta antiga da ViaCEP guardada no cache.
+        """
+        for provider in self.providers:
+            try:
+                data = provider.lookup(cep)
+            except Exception:
+                continue # Provedor com problema (arquivo trocado, corrompido): segue para o cache/ViaCEP
+            if data is not None:
+                return provider.source, data
+        if self.cache is not None:
+            return self.cache.get(cep)
+        return None
+
+    def resolve(self, cep, on_success, on_error):
+        """lookup com o resultado entregue aos callbacks: on_success(endereço) ou on_error(título, mensagem)."""
+        try:
+            data = self.lookup(cep)
+        except CepLookupError as e:
+            on_error(e.title, e.message)
+            return
+        except Exception as e:
+            on_error("Unexpected Error", f"An unexpected error occurred: {e}")
+            return
+        if data is None:
+            on_error("Invalid CEP", "CEP not found.")
+        else:
+            on_success(data)
+
+    def submit(self, cep, on_success, on_error):
+        """
+        Enfileira a consulta para os workers; se o mesmo CEP já está na fila ou em
+        andamento, o pedido espera aquele resultado. Com a fila cheia a consulta é
+        recusada na hora (on_error) em vez de acumular threads; CEPs cujos pedidos
+        foram todos cancelados não contam no limite. Retorna o CepLookup ou None.
+        """
+        if self._shutdown:
+            raise RuntimeError("CepClient is shut down")
+        self._start_workers()
+        lookup = CepLookup(cep, on_success, on_error)
+        with self._lock:
+            waiters = self._inflight.get(cep)
+            if waiters is not None:
+                waiters.append(lookup)
+                self.coalesced += 1
+                return lookup
+            live = sum(1 for queued in self._queued if not all(waiter.cancelled for waiter in self._inflight[queued]))
+            if live >= self.queue_limit:
+                self.rejected += 1
+                full = True
+            else:
+                full = False
+                self._inflight[cep] = [lookup]
+                self._queued.add(cep)
+        if full:
+            lookup.finished = True
+            on_error("CEP Lookup Busy", "Too many CEP lookups in progress. Please try again.")
+            return None
+        self._queue.put(cep)
+        return lookup
+
+    def _start_workers(self):
+        with self._lock:
+            for _ in range(self.workers - len(self._threads)):
+                thread = threading.Thread(target=self._worker, name="cep-client", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _worker(self):
+        while True:
+            cep = self._queue.get()
+            if cep is None:
+                return
+            with self._lock:
+                self._queued.discard(cep)
+                if all(lookup.cancelled for lookup in self._inflight.get(cep, ())):
+                    # Todos os pedidos foram substituídos enquanto esperavam: não usa rede nem o worker
+                    self._inflight.pop(cep, None)
+                    self.skipped += 1
+                    continue
+            outcome = []
+            self.resolve(cep, lambda data: outcome.append((True, data)), lambda title, message: outcome.append((False, (title, message))))
+            with self._lock:
+                waiters = self._inflight.pop(cep, [])
+            success, value = outcome[0]
+            for lookup in waiters:
+                lookup.finished = True
+                if lookup.cancelled:
+                    continue
+                if success:
+                    lookup.on_success(value)
+                else:
+                    lookup.on_error(*value)
+
+    def pending(self):
+        with self._lock:
+            return len(self._queued)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "retries": self.retries_done,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "coalesced": self.coalesced,
+                "skipped": self.skipped,
+                "queued": len(self._queued),
+                "workers": self.workers,
+            }
+
+    def close(self):
+        """Os workers terminam o que já está na fila e saem; a sessão é fechada."""
+        self._shutdown = True
+        for _ in self._threads:
+            self._queue.put(None)
+        self._session.close()
+
+def cep_client_settings(app_settings):
+    """Argumentos do CepClient a partir do APP_SETTINGS."""
+    return {
+        "workers": app_settings.get("CEP_CLIENT_WORKERS", DEFAULT_WORKERS),
+        "queue_limit": app_settings.get("CEP_CLIENT_QUEUE_LIMIT", DEFAULT_QUEUE_LIMIT),
+        "timeout": app_settings.get("CEP_CLIENT_TIMEOUT", DEFAULT_TIMEOUT),
+        "retries": app_settings.get("CEP_CLIENT_RETRIES", DEFAULT_RETRIES),
+        "backoff": app_settings.get("CEP_CLIENT_BACKOFF", DEFAULT_BACKOFF),
+    }
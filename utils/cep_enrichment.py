@@ -0,0 +1,376 @@
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.config_manager import ConfigManager
+
+config_manager = ConfigManager()
+
+DEFAULT_PAGE_SIZE = 500
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE = 5.0 # Consultas à ViaCEP por segundo
+DEFAULT_CHECKPOINT_PATH = "cep_enrichment_checkpoint.json"
+MAX_SAMPLE_CHANGES = 20
+
+class EnrichmentReport:
+    """Resumo do preenchimento por CEP: linhas lidas e alteradas, CEPs distintos por origem e velocidade."""
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.rows_read = 0
+        self.rows_changed = 0 # Em dry-run: linhas que seriam alteradas
+        self.rows_conflicted = 0 # Mudaram no servidor entre a leitura e a gravação: ficaram como estão
+        self.columns_changed = 0
+        self.invalid_ceps = 0
+        self.values_too_long = 0
+        self.ceps = 0
+        self.ceps_from_cache = 0 # Cache ou base offline, sem rede
+        self.ceps_fetched = 0
+        self.ceps_not_found = 0
+        self.ceps_failed = 0
+        self.pages = 0
+        self.last_key = None
+        self.samples = [] # Primeiras MAX_SAMPLE_CHANGES alterações (XCLIENTES, {coluna: (antes, depois)})
+        self.started_at = time.monotonic()
+        self.finished_at = None
+
+    @property
+    def elapsed(self):
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    @property
+    def rows_per_second(self):
+        return self.rows_read / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self):
+        action = "would change" if self.dry_run else "changed"
+        return (f"{self.rows_read} rows read, {self.rows_changed} {action} ({self.columns_changed} columns), "
+                f"{self.rows_conflicted} skipped on conflict "
+                f"in {self.pages} pages; {self.ceps} distinct CEPs: {self.ceps_from_cache} cached/offline, "
+                f"{self.ceps_fetched} fetched, {self.ceps_not_found} not found, {self.ceps_failed} failed; "
+                f"{self.invalid_ceps} invalid CEPs, {self.values_too_long} values too long; "
+                f"{self.elapsed:.1f}s ({self.rows_per_second:.0f} rows/s)")
+
+class RateLimiter:
+    """No máximo `rate` chamadas por segundo somando todas as threads (intervalo mínimo entre inícios)."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+def normalize_cep(value):
+    digits = re.sub(r"\D", "", str(value or ""))
+    return digits if len(digits) == 8 else None
+
+def address_columns(fields_config, mapping):
+    """
+    Coluna do banco -> chave da ViaCEP, a partir do ADDRESS_FIELD_MAPPING da tela
+    (as chaves dele podem ser nome de campo ou coluna). Só colunas configuradas.
+    """
+    column_of = {}
+    for field in fields_config:
+        column_of[field["name"].upper()] = field["db_column"]
+        column_of.setdefault(field["db_column"].upper(), field["db_column"])
+    columns = {}
+    for key, json_key in mapping.items():
+        column = column_of.get(key.upper())
+        if column is not None:
+            columns.setdefault(column, json_key)
+    return columns
+
+def build_enrichment_query(table, columns, target_columns, after_key, limit, limit_style="top", only_blank=True):
+    """
+    Próxima página (em ordem de XCLIENTES, depois de after_key) das linhas com CEP
+    e, com only_blank, com alguma das colunas de endereço vazia. Retorna (sql, parâmetros).
+    """
+    conditions = ["CEP IS NOT NULL", "CEP <> ''"]
+    if only_blank:
+        conditions.append("(" + " OR ".join(f"{column} IS NULL OR {column} = ''" for column in target_columns) + ")")
+    params = []
+    if after_key is not None:
+        conditions.append("XCLIENTES > ?")
+        params.append(after_key)
+    top = f"TOP ({int(limit)}) " if limit_style == "top" else ""
+    sql = f"SELECT {top}{', '.join(columns)} FROM {table} WHERE {' AND '.join(conditions)} ORDER BY XCLIENTES"
+    if limit_style == "limit":
+        sql += f" LIMIT {int(limit)}"
+    return sql, params
+
+def plan_changes(row, address, target_columns, overwrite=False, max_lengths=None):
+    """
+    {coluna: valor novo} das colunas de endereço que mudam na linha. Sem overwrite só
+    preenche as vazias. Retorna (mudanças, quantos valores não cabem na coluna).
+    """
+    def normalize(value):
+        return "" if value is None else str(value).strip()
+
+    changes = {}
+    too_long = 0
+    for column, json_key in target_columns.items():
+        value = normalize(address.get(json_key))
+        current = normalize(row.get(column))
+        if not value or value == current or (current and not overwrite):
+            continue
+        max_length = (max_lengths or {}).get(column)
+        if max_length and len(value) > max_length:
+            too_long += 1 # Não corta o endereço: a coluna fica como está
+            continue
+        changes[column] = value
+    return changes, too_long
+
+def load_checkpoint(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_checkpoint(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+class CepResolver:
+    """
+    Endereços dos CEPs de uma página: os já vistos nesta execução, os do cache e
+    os da base offline saem na hora; os outros vão à ViaCEP pelo cliente compartilhado, com até
+    `concurrency` consultas ao mesmo tempo e no máximo `rate` por segundo.
+    """
+
+    def __init__(self, client, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE):
+        self.client = client
+        self.concurrency = max(1, int(concurrency))
+        self.limiter = RateLimiter(rate)
+        self.known = {} # cep -> endereço, None (não existe) ou erro (não tenta de novo nesta execução)
+
+    def _fetch(self, cep):
+        from utils.cep_client import CepLookupError
+        self.limiter.wait()
+        try:
+            data = self.client.fetch(cep)
+        except CepLookupError as e:
+            return cep, e
+        if self.client.cache is not None:
+            if data is None:
+                self.client.cache.put_not_found(cep)
+            else:
+                self.client.cache.put(cep, data)
+        return cep, data
+
+    def resolve(self, ceps, report):
+        missing = []
+        for cep in dict.fromkeys(ceps):
+            if cep in self.known:
+                continue
+            report.ceps += 1
+            local = self.client.lookup_local(cep)
+            if local is not None:
+                report.ceps_from_cache += 1
+                self._remember(cep, local[1], report)
+            else:
+                missing.append(cep)
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(missing))) as pool:
+                for cep, data in pool.map(self._fetch, missing):
+                    if isinstance(data, Exception):
+                        report.ceps_failed += 1
+                    else:
+                        report.ceps_fetched += 1
+                    self._remember(cep, data, report)
+        return {cep: self.known[cep] for cep in ceps}
+
+    def _remember(self, cep, data, report):
+        if data is None:
+            report.ceps_not_found += 1
+        self.known[cep] = data
+
+def _blank(value):
+    return "" if value is None else str(value)
+
+def _write_page(conn, backend, statements, updates):
+    """
+    Grava a página com concorrência otimista. updates: [(XCLIENTES, linha lida, {coluna: valor novo})].
+    As linhas são travadas e relidas (fetch_for_update); as que mudaram no CEP ou numa coluna
+    alterada desde a leitura da página ficam de fora. O UPDATE só das colunas alteradas agrupa as
+    linhas que mudam o mesmo conjunto de colunas (executemany) e ainda exige, no WHERE, o CEP e os
+    valores antigos. Retorna ([(XCLIENTES, imagem antes, mudanças)], [XCLIENTES que ficaram de fora por conflito]).
+    """
+    name_of = {column: name for name, column in zip(statements.insert_names, statements.insert_columns)}
+    column_of = {name: column for column, name in name_of.items()}
+    current = backend.fetch_for_update(conn, statements, [str(xclientes) for xclientes, _, _ in updates])
+    groups = {}
+    conflicted = []
+    for xclientes, read, changes in updates:
+        before = current.get(str(xclientes))
+        guard = ("CEP",) + tuple(changes)
+        if before is None or any(_blank(before.get(column)) != _blank(read.get(column)) for column in guard):
+            conflicted.append(xclientes) # Alterada por outra estação: não sobrescreve
+            continue
+        groups.setdefault(tuple(sorted(changes)), []).append((xclientes, read, changes, before))
+
+    applied = []
+    cursor = backend.bulk_cursor(conn)
+    for columns, rows in groups.items():
+        sql, names = statements.update_by_key({name_of[column] for column in columns})
+        guard = ("CEP",) + columns
+        sql += "".join(f" AND COALESCE({column}, '') = ?" for column in guard)
+        cursor.executemany(sql, [tuple(changes[column_of[name]] for name in names) + (xclientes,)
+                                 + tuple(_blank(read.get(column)) for column in guard)
+                                 for xclientes, read, changes, _ in rows])
+        for xclientes, _, changes, before in rows:
+            applied.append((xclientes, before, changes))
+    return applied, conflicted
+
+def _count_change(report, before, changes):
+    report.rows_changed += 1
+    report.columns_changed += len(changes)
+    if len(report.samples) < MAX_SAMPLE_CHANGES:
+        report.samples.append((before["XCLIENTES"], {column: (before.get(column), value) for column, value in changes.items()}))
+
+def enrich_clients(client=None, page_size=DEFAULT_PAGE_SIZE, concurrency=DEFAULT_CONCURRENCY, rate=DEFAULT_RATE,
+                   dry_run=False, overwrite=False, checkpoint_path=DEFAULT_CHECKPOINT_PATH, resume=True,
+                   progress_callback=None):
+    """
+    Preenche ENDERECO/LOGRA/BAIRRO/CIDADE/ESTADO das linhas da FBCLIENTES a partir
+    do CEP, com o mesmo mapeamento da tela (ADDRESS_FIELD_MAPPING). As linhas são
+    lidas em páginas por XCLIENTES; cada página é gravada e confirmada numa
+    transação e o último XCLIENTES vai para o checkpoint, de onde uma nova
+    execução continua. dry_run não grava nada (nem o checkpoint). Linhas alteradas
+    por outra estação entre a leitura e a gravação ficam como estão (rows_conflicted);
+    as gravadas passam pelo log de atividades e pelos listeners de mutação.
+    """
+    from utils.cep_integration import ADDRESS_FIELD_MAPPING, get_cep_client
+    from utils.db_health import OP_BULK
+    from utils.db_operations import (
+        get_backend, acquire_connection, get_client_statements, get_validation_rules, get_client_cache,
+        log_operation, _notify_mutation,
+    )
+
+    fields_config = config_manager.CLIENT_FIELDS_CONFIG
+    target_columns = address_columns(fields_config, ADDRESS_FIELD_MAPPING)
+    column_of = {field["name"]: field["db_column"] for field in fields_config}
+    max_lengths = {column_of[name]: rule[0] for name, rule in get_validation_rules().items()}
+    backend = get_backend()
+    statements = get_client_statements()
+    resolver = CepResolver(client or get_cep_client(), concurrency, rate)
+    columns = ["XCLIENTES", "CEP"] + list(target_columns)
+
+    report = EnrichmentReport(dry_run)
+    after_key = None
+    if resume and checkpoint_path:
+        checkpoint = load_checkpoint(checkpoint_path)
+        if checkpoint and checkpoint.get("overwrite") == overwrite:
+            after_key = checkpoint.get("after_key")
+
+    conn = acquire_connection(OP_BULK)
+    try:
+        while True:
+            sql, params = build_enrichment_query(backend.client_table, columns, target_columns, after_key, page_size,
+                                                 backend.limit_style, only_blank=not overwrite)
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            if not rows:
+                break
+            report.rows_read += len(rows)
+            report.pages += 1
+            after_key = rows[-1]["XCLIENTES"]
+
+            ceps = {}
+            for row in rows:
+                cep = normalize_cep(row["CEP"])
+                if cep is None:
+                    report.invalid_ceps += 1
+                else:
+                    ceps[row["XCLIENTES"]] = cep
+            addresses = resolver.resolve(list(ceps.values()), report)
+
+            updates = []
+            for row in rows:
+                address = addresses.get(ceps.get(row["XCLIENTES"]))
+                if not isinstance(address, dict):
+                    continue
+                changes, too_long = plan_changes(row, address, target_columns, overwrite, max_lengths)
+                report.values_too_long += too_long
+                if not changes:
+                    continue
+                updates.append((row["XCLIENTES"], row, changes))
+                if dry_run:
+                    _count_change(report, row, changes)
+
+            if not dry_run:
+                applied, conflicted = _write_page(conn, backend, statements, updates) if updates else ([], [])
+                conn.commit()
+                report.rows_conflicted += len(conflicted)
+                for xclientes in conflicted:
+                    get_client_cache().invalidate(xclientes) # Mudou no servidor: a cópia em cache está velha
+                for xclientes, before, changes in applied:
+                    _count_change(report, before, changes)
+                    after = dict(before, **changes)
+                    log_operation("CEP Enrichment", xclientes, before_data=before, after_data=after)
+                    _notify_mutation("update", xclientes, before=before, after=after)
+                if checkpoint_path:
+                    save_checkpoint(checkpoint_path, {"after_key": after_key, "overwrite": overwrite})
+            report.last_key = after_key
+            if progress_callback:
+                progress_callback(report)
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+        report.finished_at = time.monotonic()
+
+    if not dry_run and checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path) # Terminou: a próxima execução começa do início
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Preenche o endereço das linhas da FBCLIENTES a partir do CEP (ViaCEP).")
+    parser.add_argument("--dry-run", action="store_true", help="Só mostra o que seria alterado")
+    parser.add_argument("--overwrite", action="store_true", help="Corrige também colunas preenchidas que divergem do CEP")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Consultas à ViaCEP ao mesmo tempo")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Consultas à ViaCEP por segundo")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_PATH, help="Arquivo de checkpoint")
+    parser.add_argument("--restart", action="store_true", help="Ignora o checkpoint e começa do início")
+    args = parser.parse_args(argv)
+
+    report = enrich_clients(
+        page_size=args.page_size,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        dry_run=args.dry_run,
+        overwrite=args.overwrite,
+        checkpoint_path=args.checkpoint,
+        resume=not args.restart,
+        progress_callback=lambda r: print(r.summary())
+    )
+    print(report.summary())
+    for xclientes, changes in report.samples:
+        print(f"  {xclientes}: " + ", ".join(f"{column} {before!r} -> {after!r}" for column, (before, after) in changes.items()))
+    return 0 if report.ceps_failed == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
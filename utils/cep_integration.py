@@ -1,44 +1,146 @@
-import requests
+import os
 import threading
 import re
+import weakref
 import customtkinter as ctk
+from utils.cep_cache import CepCache, cep_cache_settings, DEFAULT_CEP_CACHE_PATH
+from utils.cep_client import CepClient, cep_client_settings
+from utils.cep_offline import OfflineCepDatabase, OfflineCepError, offline_settings, refresh_from_csv
+from utils.config_manager import ConfigManager
+
+config_manager = ConfigManager()
+
+_cep_cache = None
+_cep_cache_lock = threading.Lock()
+_cep_client = None
+_cep_client_lock = threading.Lock()
+_offline_db = None
+_offline_db_lock = threading.Lock()
+_widget_lookups = weakref.WeakKeyDictionary() # campo de CEP -> última consulta pedida por ele
+
+def get_cep_cache():
+    """Cache de CEPs (utils.cep_cache) compartilhado pelas telas, criado no primeiro uso."""
+    global _cep_cache
+    with _cep_cache_lock:
+        if _cep_cache is None:
+            settings = config_manager.APP_SETTINGS
+            _cep_cache = CepCache(settings.get("CEP_CACHE_PATH", DEFAULT_CEP_CACHE_PATH), **cep_cache_settings(settings))
+        return _cep_cache
+
+def get_cep_cache_stats():
+    """Hits (memória/disco), misses, hit ratio e latência das consultas de CEP por fonte."""
+    return get_cep_cache().stats()
+
+def get_offline_cep_database():
+    """
+    Base de CEPs offline (utils.cep_offline) em CEP_OFFLINE_DB_PATH, ou None se o
+    arquivo não existe (ou não é uma base válida): aí as consultas vão à ViaCEP.
+    """
+    global _offline_db
+    with _offline_db_lock:
+        if _offline_db is None:
+            path = offline_settings(config_manager.APP_SETTINGS)["path"]
+            if path and os.path.exists(path):
+                try:
+                    _offline_db = OfflineCepDatabase(path)
+                except (OSError, OfflineCepError):
+                    return None
+        return _offline_db
+
+def refresh_offline_cep_database(csv_path, delimiter=None):
+    """
+    Aplica um CSV de CEPs novos/alterados/removidos à base offline (cria a base se não existir).
+    Levanta OfflineCepError se outro programa estiver com a base aberta (Windows).
+    """
+    global _cep_client
+    path = offline_settings(config_manager.APP_SETTINGS)["path"]
+    had_database = get_offline_cep_database() is not None
+    result = refresh_from_csv(csv_path, path, delimiter, database=_offline_db)
+    if not had_database:
+        with _cep_client_lock:
+            client, _cep_client = _cep_client, None
+        if client is not None:
+            client.close() # Recriado no próximo uso já com a base offline
+    return result
+
+def get_cep_client():
+    """
+    Cliente ViaCEP (utils.cep_client) compartilhado pelas telas de cadastro e
+    alteração e pelos jobs em lote: sessão keep-alive, workers fixos e cache.
+    A base offline, se existir, responde antes da ViaCEP.
+    """
+    global _cep_client
+    with _cep_client_lock:
+        if _cep_client is None:
+            offline = get_offline_cep_database()
+            _cep_client = CepClient(get_cep_cache(), providers=[offline] if offline is not None else None,
+                                    **cep_client_settings(config_manager.APP_SETTINGS))
+        return _cep_client
+
+def _on_config_changed(changed_sections):
+    global _cep_client, _offline_db
+    if "APP_SETTINGS" not in changed_sections:
+        return
+    if _cep_cache is not None:
+        _cep_cache.configure(**cep_cache_settings(config_manager.APP_SETTINGS))
+    with _offline_db_lock:
+        database = _offline_db
+        if database is not None and database.path != offline_settings(config_manager.APP_SETTINGS)["path"]:
+            _offline_db = None
+            database.close()
+    with _cep_client_lock:
+        client, _cep_client = _cep_client, None
+    if client is not None:
+        client.close() # Recriado no próximo uso com os workers/limites novos
+
+config_manager.add_listener(_on_config_changed)
 
 def fetch_address_thread(cep, callback_success, callback_error):
-    """Obtém detalhes de endereço da API ViaCEP em um thread para evitar travamentos na tela aguardando a API"""
-    try:
-        response = requests.get(f"https://viacep.com.br/ws/{cep}/json/", timeout=5)
-        response.raise_for_status()
-        data = response.json()
-
-        if "erro" in data:
-            callback_error("Invalid CEP", "CEP not found.")
-        else:
-            callback_success(data)
-    except requests.exceptions.Timeout:
-        callback_error("CEP Lookup Error", "CEP lookup timed out.")
-    except requests.exceptions.RequestException as e:
-        callback_error("CEP Lookup Error", f"Error fetching CEP: {e}")
-    except Exception as e:
-        callback_error("Unexpected Error", f"An unexpected error occurred: {e}")
+    """Obtém detalhes de endereço (cache, senão ViaCEP) na thread atual e entrega o resultado aos callbacks."""
+    get_cep_client().resolve(cep, callback_success, callback_error)
+
+# Campo do formulário (ou coluna do banco) -> chave do JSON da ViaCEP. Usado pela tela e pelo
+# utils.cep_enrichment, para o preenchimento em lote gravar o mesmo que a tela gravaria.
+ADDRESS_FIELD_MAPPING = {
+    "ENDERECO": "logradouro",
+    "LOGRA": "logradouro",
+    "BAIRRO": "bairro",
+    "CIDADE": "localidade",
+    "ESTADO": "uf",
+}
+
+def normalize_cep(value):
+    return str(value or "").strip().replace("-", "").replace(".", "")
 
 def on_cep_focus_out(cep_entry_widget, fill_address_callback, show_warning_callback, show_error_callback):
-    """Valida o CEP e retorna erro caso esteja errado"""
-    cep = cep_entry_widget.get().strip().replace("-", "").replace(".", "")
+    """
+    Valida o CEP e retorna erro caso esteja errado. A consulta vai para os workers do cliente de CEP, sem travar a tela.
+    Só a última consulta de cada campo entrega o resultado: a anterior é cancelada
+    (e nem vai à rede se ainda estava na fila). Sair do campo de novo com o mesmo
+    CEP ainda em consulta não pede outra.
+    """
+    cep = normalize_cep(cep_entry_widget.get())
+    previous = _widget_lookups.get(cep_entry_widget)
+    if previous is not None and previous.cep == cep and not previous.finished and not previous.cancelled:
+        return previous
+    if previous is not None:
+        previous.cancel()
+        _widget_lookups.pop(cep_entry_widget, None)
     if re.fullmatch(r'\d{8}', cep):
-        threading.Thread(target=fetch_address_thread, args=(cep, fill_address_callback, show_error_callback), daemon=True).start()
+        lookup = get_cep_client().submit(cep, fill_address_callback, show_error_callback)
+        if lookup is not None:
+            _widget_lookups[cep_entry_widget] = lookup
+        return lookup
     elif cep:
         show_warning_callback("Invalid CEP Format", "Please enter a valid 8-digit CEP.")
+    return None
 
 def fill_address_fields(entry_widgets, address_data):
     """adiciona os campos caso o cep esteja correto e a API tenha retornado"""
-    field_mapping = {
-        "ENDERECO": "logradouro",
-        "LOGRA": "logradouro",
-        "BAIRRO": "bairro",
-        "CIDADE": "localidade",
-        "ESTADO": "uf",
-    }
-    for form_field, json_key in field_mapping.items():
+    cep_widget = entry_widgets.get("CEP")
+    if cep_widget is not None and address_data.get("cep") and normalize_cep(cep_widget.get()) != normalize_cep(address_data["cep"]):
+        return # O CEP do campo mudou depois desta consulta: resultado antigo não sobrescreve o endereço
+    for form_field, json_key in ADDRESS_FIELD_MAPPING.items():
         if form_field in entry_widgets:
             entry_widgets[form_field].delete(0, ctk.END) # ctk is not imported here, need to pass it or import
             entry_widgets[form_field].insert(0, address_data.get(json_key, ""))
@@ -0,0 +1,340 @@
+import argparse
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.cep_cache import SOURCE_OFFLINE
+
+DEFAULT_OFFLINE_DB_PATH = "cep_offline.bin"
+
+# Arquivo: cabeçalho | registros (ordenados por CEP) | tabela de strings
+# Registro: CEP como inteiro e o deslocamento de cada campo na tabela de strings (24 bytes).
+# Tabela de strings: cada string distinta uma vez só, com o tamanho em 2 bytes na frente.
+MAGIC = b"CEPDB\x00\x01\x00"
+HEADER = struct.Struct("<8sIIQd") # magic, registros, reservado, início da tabela de strings, gerado em
+FIELDS = ("logradouro", "complemento", "bairro", "localidade", "uf")
+RECORD = struct.Struct("<I" + "I" * len(FIELDS))
+LENGTH = struct.Struct("<H")
+
+# Cabeçalhos aceitos no CSV (sem diferenciar maiúsculas) para cada campo
+COLUMN_ALIASES = {
+    "cep": ("cep",),
+    "logradouro": ("logradouro", "endereco", "rua"),
+    "complemento": ("complemento",),
+    "bairro": ("bairro",),
+    "localidade": ("localidade", "cidade", "municipio"),
+    "uf": ("uf", "estado"),
+}
+DELETE_COLUMN = "removido" # No CSV de atualização: 1/S/true apaga o CEP da base
+
+class OfflineCepError(Exception):
+    """Arquivo da base offline ausente, corrompido, de outra versão ou em uso (na troca pelo refresh)."""
+
+def cep_to_int(value):
+    digits = re.sub(r"\D", "", str(value or ""))
+    return int(digits) if len(digits) == 8 else None
+
+def format_cep(number):
+    digits = f"{number:08d}"
+    return f"{digits[:5]}-{digits[5:]}"
+
+def _source_columns(headers):
+    """Campo -> cabeçalho do CSV."""
+    by_lower = {header.strip().lower(): header for header in headers if header}
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in by_lower:
+                columns[field] = by_lower[alias]
+                break
+    if "cep" not in columns:
+        raise OfflineCepError("CSV has no CEP column.")
+    return columns
+
+def iter_csv_records(path, delimiter=None):
+    """
+    (cep_inteiro, (logradouro, complemento, bairro, localidade, uf), removido) de cada
+    linha do CSV, em streaming. Linhas com CEP inválido são ignoradas.
+    """
+    from utils.bulk_import import iter_source_rows
+
+    columns = None
+    for _, row in iter_source_rows(path, "csv", delimiter):
+        if columns is None:
+            columns = _source_columns(row.keys())
+            delete_header = next((header for header in row if header and header.strip().lower() == DELETE_COLUMN), None)
+        number = cep_to_int(row.get(columns["cep"]))
+        if number is None:
+            continue
+        values = tuple((row.get(columns[field]) or "").strip() if field in columns else "" for field in FIELDS)
+        removed = delete_header is not None and str(row.get(delete_header) or "").strip().lower() in ("1", "s", "sim", "true", "y")
+        yield number, values, removed
+
+def _replace(tmp_path, path):
+    """
+    Troca o arquivo da base pelo novo. No Windows a troca falha enquanto outro
+    programa (outra instância do sistema) mantém a base mapeada: o temporário é
+    apagado e a base antiga continua valendo.
+    """
+    try:
+        os.replace(tmp_path, path)
+    except PermissionError as e:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise OfflineCepError(f"{path} is in use by another program; close it and try again ({e}).")
+
+def write_database(path, records):
+    """
+    Grava a base a partir de (cep_inteiro, valores) já ordenados por CEP e sem
+    repetição. Escreve num arquivo temporário e troca no fim (quem lê nunca vê meio arquivo).
+    Retorna o número de registros.
+    """
+    strings = {"": 0}
+    table = bytearray(LENGTH.pack(0))
+    packed = bytearray()
+    count = 0
+    for number, values in records:
+        offsets = []
+        for value in values:
+            offset = strings.get(value)
+            if offset is None:
+                encoded = value.encode("utf-8")[:0xFFFF]
+                offset = strings[value] = len(table)
+                table += LENGTH.pack(len(encoded)) + encoded
+            offsets.append(offset)
+        packed += RECORD.pack(number, *offsets)
+        count += 1
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, count, 0, HEADER.size + len(packed), time.time()))
+        f.write(packed)
+        f.write(table)
+        f.flush()
+        os.fsync(f.fileno())
+    _replace(tmp_path, path)
+    return count
+
+def import_csv(csv_path, path=DEFAULT_OFFLINE_DB_PATH, delimiter=None):
+    """Cria a base offline a partir de um CSV completo (cep, logradouro, complemento, bairro, localidade/cidade, uf)."""
+    records = {}
+    for number, values, removed in iter_csv_records(csv_path, delimiter):
+        if removed:
+            records.pop(number, None)
+        else:
+            records[number] = values # Repetido: vale a última linha
+    return write_database(path, sorted(records.items()))
+
+class OfflineCepDatabase:
+    """
+    Base de CEPs local, só leitura: o arquivo é mapeado em memória (mmap) e o
+    CEP procurado por busca binária nos registros de tamanho fixo, sem rede e
+    sem carregar o arquivo inteiro. Se o arquivo for trocado (refresh), é
+    reaberto na próxima consulta.
+    """
+
+    source = SOURCE_OFFLINE
+    CHECK_INTERVAL = 5 # Segundos entre conferências de troca do arquivo
+
+    def __init__(self, path=DEFAULT_OFFLINE_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        self._map = None
+        self._stamp = None
+        self._checked_at = 0.0
+        self.count = 0
+        self.generated_at = None
+        self.lookups = 0
+        self.hits = 0
+        self._open()
+
+    def _open(self):
+        stat = os.stat(self.path)
+        f = open(self.path, "rb")
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError: # Arquivo vazio
+            f.close()
+            raise OfflineCepError(f"{self.path} is empty.")
+        if len(data) < HEADER.size:
+            data.close()
+            f.close()
+            raise OfflineCepError(f"{self.path} is not a CEP database.")
+        magic, count, _, strings_at, generated_at = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or strings_at != HEADER.size + count * RECORD.size or strings_at > len(data):
+            data.close()
+            f.close()
+            raise OfflineCepError(f"{self.path} is not a CEP database (or was written by another version).")
+        self._file, self._map = f, data
+        self.count, self._strings_at, self.generated_at = count, strings_at, generated_at
+        self._stamp = (stat.st_mtime_ns, stat.st_size)
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = self._file = None
+
+    def _reload_if_changed(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.CHECK_INTERVAL and self._map is not None:
+            return
+        self._checked_at = now
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return # Arquivo sumiu: continua com o mapeamento aberto
+        if self._map is None or (stat.st_mtime_ns, stat.st_size) != self._stamp:
+            self._close()
+            self._open()
+
+    def _string(self, offset):
+        start = self._strings_at + offset
+        (length,) = LENGTH.unpack_from(self._map, start)
+        return self._map[start + LENGTH.size:start + LENGTH.size + length].decode("utf-8")
+
+    def _find(self, number):
+        low, high = 0, self.count - 1
+        while low <= high:
+            middle = (low + high) // 2
+            record = RECORD.unpack_from(self._map, HEADER.size + middle * RECORD.size)
+            if record[0] < number:
+                low = middle + 1
+            elif record[0] > number:
+                high = middle - 1
+            else:
+                return record
+        return None
+
+    def lookup(self, cep):
+        """Endereço no formato da ViaCEP (cep, logradouro, complemento, bairro, localidade, uf), ou None se não está na base."""
+        number = cep_to_int(cep)
+        if number is None:
+            return None
+        with self._lock:
+            self._reload_if_changed()
+            self.lookups += 1
+            record = self._find(number)
+            if record is None:
+                return None
+            self.hits += 1
+            address = {"cep": format_cep(number)}
+            for field, offset in zip(FIELDS, record[1:]):
+                address[field] = self._string(offset)
+            return address
+
+    def __iter__(self):
+        """(cep_inteiro, valores) de todos os registros, em ordem (usado pelo refresh)."""
+        with self._lock:
+            for index in range(self.count):
+                record = RECORD.unpack_from(self._map, HEADER.size + index * RECORD.size)
+                yield record[0], tuple(self._string(offset) for offset in record[1:])
+
+    def stats(self):
+        with self._lock:
+            return {"records": self.count, "lookups": self.lookups, "hits": self.hits,
+                    "generated_at": self.generated_at, "path": self.path}
+
+def _merge(existing, updates):
+    """Junta os registros atuais (ordenados) com as alterações {cep: valores ou None = apagar}, em ordem."""
+    pending = sorted(updates.items())
+    index = 0
+    for number, values in existing:
+        while index < len(pending) and pending[index][0] < number:
+            if pending[index][1] is not None:
+                yield pending[index]
+            index += 1
+        if index < len(pending) and pending[index][0] == number:
+            if pending[index][1] is not None:
+                yield pending[index]
+            index += 1
+            continue
+        yield number, values
+    for number, values in pending[index:]:
+        if values is not None:
+            yield number, values
+
+def refresh_from_csv(csv_path, path=DEFAULT_OFFLINE_DB_PATH, delimiter=None, database=None):
+    """
+    Atualização incremental: aplica um CSV só com os CEPs novos, alterados e
+    removidos (coluna "removido") sobre a base existente, numa só passada pelos
+    registros em ordem. `database`, se aberta neste processo, é fechada antes da
+    troca do arquivo e reaberta na próxima consulta. Retorna (registros, alterações).
+    Levanta OfflineCepError se o arquivo não pôde ser trocado (em uso no Windows).
+    """
+    updates = {}
+    for number, values, removed in iter_csv_records(csv_path, delimiter):
+        updates[number] = None if removed else values
+    if not os.path.exists(path):
+        return write_database(path, _merge([], updates)), len(updates)
+
+    source = OfflineCepDatabase(path)
+    try:
+        tmp_path = f"{path}.merge"
+        count = write_database(tmp_path, _merge(source, updates))
+    finally:
+        source.close()
+    if database is None:
+        _replace(tmp_path, path)
+    else:
+        # A trava fica com a troca: uma consulta no meio reabriria (e mapearia) o arquivo velho
+        with database._lock:
+            database._close()
+            _replace(tmp_path, path)
+    return count, len(updates)
+
+def offline_settings(app_settings):
+    return {"path": app_settings.get("CEP_OFFLINE_DB_PATH", DEFAULT_OFFLINE_DB_PATH)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Base de CEPs offline (arquivo binário com busca binária).")
+    sub = parser.add_subparsers(dest="command", required=True)
+    import_parser = sub.add_parser("import", help="Cria a base a partir de um CSV completo")
+    import_parser.add_argument("csv")
+    refresh_parser = sub.add_parser("refresh", help="Aplica um CSV de CEPs novos/alterados/removidos")
+    refresh_parser.add_argument("csv")
+    lookup_parser = sub.add_parser("lookup", help="Consulta um CEP")
+    lookup_parser.add_argument("cep")
+    for sub_parser in (import_parser, refresh_parser, lookup_parser):
+        sub_parser.add_argument("--db", default=DEFAULT_OFFLINE_DB_PATH, help="Arquivo da base")
+    for sub_parser in (import_parser, refresh_parser):
+        sub_parser.add_argument("--delimiter", help="Separador do CSV (padrão: detectado)")
+    args = parser.parse_args(argv)
+
+    started = time.monotonic()
+    if args.command == "import":
+        count = import_csv(args.csv, args.db, args.delimiter)
+        print(f"{count} CEPs written to {args.db} ({os.path.getsize(args.db)} bytes) in {time.monotonic() - started:.1f}s")
+    elif args.command == "refresh":
+        try:
+            count, changes = refresh_from_csv(args.csv, args.db, args.delimiter)
+        except OfflineCepError as e:
+            print(e)
+            return 1
+        print(f"{changes} changes applied, {count} CEPs in {args.db} ({time.monotonic() - started:.1f}s)")
+    else:
+        database = OfflineCepDatabase(args.db)
+        try:
+            address = database.lookup(args.cep)
+        finally:
+            database.close()
+        print(address if address is not None else "CEP not found in the offline database.")
+        return 0 if address is not None else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
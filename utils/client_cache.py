@@ -0,0 +1,143 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+DEFAULT_TTL = 60
+
+# Chaves secundárias: coluna -> valor apontam para o XCLIENTES da entrada
+SECONDARY_KEYS = ("CGC", "INSCRICAO")
+
+def estimate_size(client_data):
+    """Tamanho aproximado da linha em memória (dicionário, chaves e valores)."""
+    size = sys.getsizeof(client_data)
+    for key, value in client_data.items():
+        size += sys.getsizeof(key) + sys.getsizeof(value)
+    return size
+
+def _normalize(value):
+    return None if value is None else str(value).strip()
+
+class ClientCache:
+    """
+    Cache LRU com TTL de linhas da FBCLIENTES, por XCLIENTES e pelas chaves
+    secundárias CGC e INSCRICAO. Limitado por número de entradas e por memória.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict() # XCLIENTES -> (expira_em, tamanho, dados)
+        self._secondary = {} # (coluna, valor) -> XCLIENTES
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.configure(max_entries, max_bytes, ttl)
+
+    def configure(self, max_entries=None, max_bytes=None, ttl=None):
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max(0, int(max_entries))
+            if max_bytes is not None:
+                self.max_bytes = max(0, int(max_bytes))
+            if ttl is not None:
+                self.ttl = float(ttl)
+            self._evict()
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, column, value):
+        """Linha cujo `column` vale `value`, ou None (conta hit/miss)."""
+        value = _normalize(value)
+        with self._lock:
+            xclientes = value if column == "XCLIENTES" else self._secondary.get((column, value))
+            entry = self._entries.get(xclientes) if xclientes is not None else None
+            if entry is not None and entry[0] < time.monotonic():
+                self._remove(xclientes)
+                self.expirations += 1
+                entry = None
+            if entry is None or _normalize(entry[2].get(column)) != value:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(xclientes)
+            self.hits += 1
+            return dict(entry[2])
+
+    def put(self, client_data):
+        xclientes = _normalize(client_data.get("XCLIENTES"))
+        if xclientes is None or not self.enabled:
+            return
+        data = dict(client_data)
+        size = estimate_size(data)
+        with self._lock:
+            self._remove(xclientes)
+            if size > self.max_bytes:
+                return
+            self._entries[xclientes] = (time.monotonic() + self.ttl, size, data)
+            self._bytes += size
+            for column in SECONDARY_KEYS:
+                key_value = _normalize(data.get(column))
+                if key_value:
+                    self._secondary[(column, key_value)] = xclientes
+            self._evict()
+
+    def merge(self, client_data):
+        """Write-through de um update: aplica a imagem depois sobre a entrada existente."""
+        xclientes = _normalize(client_data.get("XCLIENTES"))
+        with self._lock:
+            entry = self._entries.get(xclientes)
+            current = dict(entry[2]) if entry else {}
+        current.update(client_data)
+        self.put(current)
+
+    def invalidate(self, xclientes):
+        with self._lock:
+            self._remove(_normalize(xclientes))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._secondary.clear()
+            self._bytes = 0
+
+    def _remove(self, xclientes):
+        entry = self._entries.pop(xclientes, None)
+        if entry is None:
+            return
+        self._bytes -= entry[1]
+        for column in SECONDARY_KEYS:
+            key = (column, _normalize(entry[2].get(column)))
+            if self._secondary.get(key) == xclientes:
+                del self._secondary[key]
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+def cache_settings(app_settings):
+    return {
+        "max_entries": app_settings.get("CLIENT_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES),
+        "max_bytes": app_settings.get("CLIENT_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES),
+        "ttl": app_settings.get("CLIENT_CACHE_TTL", DEFAULT_TTL),
+    }
@@ -1,3 +1,4 @@
+import copy
 import json
 import os
 
@@ -30,7 +31,9 @@ class ConfigManager:
         'SERVER': '192.168.4.17,1433',
         'DATABASE': 'SM11_PROD',
         'UID': 'sa',
-        'PWD': '*f4lc40$'
+        'PWD': '*f4lc40$',
+        'BACKEND': 'sqlserver', # 'sqlserver' ou 'sqlite' (arquivo local, para testes/benchmarks)
+        'SQLITE_PATH': 'fbclientes.db'
     }
 
     DEFAULT_INTERNAL_DEFAULT_FIELDS = {
@@ -41,7 +44,50 @@ class ConfigManager:
 
     DEFAULT_APP_SETTINGS = {
         "APP_WIDTH": 800,
-        "APP_HEIGHT": 750
+        "APP_HEIGHT": 750,
+        "DB_POOL_MAX_SIZE": 4,
+        "DB_POOL_IDLE_TIMEOUT": 300,
+        "DB_POOL_PING_INTERVAL": 30,
+        "DB_POOL_ACQUIRE_TIMEOUT": 30,
+        "XCLIENTES_BLOCK_SIZE": 20,
+        "DB_EXECUTOR_WORKERS": 2,
+        "DB_CALL_TIMEOUT": 60,
+        "CLIENT_CACHE_MAX_ENTRIES": 1000,
+        "CLIENT_CACHE_MAX_BYTES": 4194304,
+        "CLIENT_CACHE_TTL": 60,
+        "SNAPSHOT_ENABLED": False,
+        "SNAPSHOT_PATH": "fbclientes_snapshot.db",
+        "SNAPSHOT_VERSION_COLUMN": "ROWVER",
+        "SNAPSHOT_SYNC_INTERVAL": 10,
+        "SNAPSHOT_RECONCILE_EVERY": 30,
+        "NAME_INDEX_ENABLED": False,
+        "NAME_SEARCH_LIMIT": 10,
+        "SEARCH_PAGE_SIZE": 50,
+        "QUERY_METRICS_BUFFER_SIZE": 1000,
+        "SLOW_QUERY_THRESHOLD_MS": 500,
+        "SCHEMA_CACHE_PATH": "schema_cache.json",
+        "DB_BREAKER_FAILURE_THRESHOLD": 3,
+        "DB_BREAKER_COOL_DOWN": 15,
+        "DB_TIMEOUTS": {
+            "read": {"login": 5, "query": 30},
+            "write": {"login": 10, "query": 60},
+            "bulk": {"login": 15, "query": 600}
+        },
+        "WRITE_JOURNAL_ENABLED": False,
+        "WRITE_JOURNAL_PATH": "write_journal.db",
+        "WRITE_JOURNAL_BATCH_SIZE": 50,
+        "WRITE_JOURNAL_REPLAY_INTERVAL": 30,
+        "CEP_CACHE_PATH": "cep_cache.db",
+        "CEP_CACHE_MEMORY_ENTRIES": 500,
+        "CEP_CACHE_DISK_ENTRIES": 50000,
+        "CEP_CACHE_TTL": 2592000,
+        "CEP_CACHE_NEGATIVE_TTL": 86400,
+        "CEP_CLIENT_WORKERS": 2,
+        "CEP_CLIENT_QUEUE_LIMIT": 8,
+        "CEP_CLIENT_TIMEOUT": 5,
+        "CEP_CLIENT_RETRIES": 2,
+        "CEP_CLIENT_BACKOFF": 0.5,
+        "CEP_OFFLINE_DB_PATH": "cep_offline.bin"
     }
 
     # Singleton pattern for ConfigManager
@@ -61,8 +107,25 @@ class ConfigManager:
         self.DB_CONFIG = self.app_config["DB_CONFIG"]
         self.INTERNAL_DEFAULT_FIELDS = self.app_config["INTERNAL_DEFAULT_FIELDS"]
         self.APP_SETTINGS = self.app_config["APP_SETTINGS"]
+        self._listeners = []
+        # Cópia do que foi salvo por último: as telas editam as listas em memória antes de salvar,
+        # então comparar com self.app_config nunca veria a mudança
+        self._saved_config = copy.deepcopy(self.app_config)
         self._initialized = True
 
+    def add_listener(self, callback):
+        """Registers a callback(changed_sections) called after the config is saved."""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify_listeners(self, changed_sections):
+        for callback in list(self._listeners):
+            callback(changed_sections)
+
     def _load_config(self):
         """Loads configuration from app_config.json or returns defaults, merging new defaults if necessary."""
         config = {
@@ -87,23 +150,35 @@ class ConfigManager:
 
     def update_and_save_config(self, new_client_fields_config=None, new_db_config=None, new_internal_default_fields=None, new_app_settings=None):
         """Updates config variables and saves the entire config."""
+        changed_sections = set()
         if new_client_fields_config is not None:
+            if new_client_fields_config != self._saved_config.get("CLIENT_FIELDS_CONFIG"):
+                changed_sections.add("CLIENT_FIELDS_CONFIG")
             self.CLIENT_FIELDS_CONFIG = new_client_fields_config
             self.app_config["CLIENT_FIELDS_CONFIG"] = new_client_fields_config
         
         if new_db_config is not None:
+            if new_db_config != self._saved_config.get("DB_CONFIG"):
+                changed_sections.add("DB_CONFIG")
             self.DB_CONFIG = new_db_config
             self.app_config["DB_CONFIG"] = new_db_config
 
         if new_internal_default_fields is not None:
+            if new_internal_default_fields != self._saved_config.get("INTERNAL_DEFAULT_FIELDS"):
+                changed_sections.add("INTERNAL_DEFAULT_FIELDS")
             self.INTERNAL_DEFAULT_FIELDS = new_internal_default_fields
             self.app_config["INTERNAL_DEFAULT_FIELDS"] = new_internal_default_fields
 
         if new_app_settings is not None:
+            if new_app_settings != self._saved_config.get("APP_SETTINGS"):
+                changed_sections.add("APP_SETTINGS")
             self.APP_SETTINGS = new_app_settings
             self.app_config["APP_SETTINGS"] = new_app_settings
 
         self._save_config(self.app_config)
+        self._saved_config = copy.deepcopy(self.app_config)
+        if changed_sections: # Só as seções que de fato mudaram: salvar sem alterar nada não recria pool, backend, etc.
+            self._notify_listeners(changed_sections)
 
     def reset_config_to_defaults(self):
         """Resets all configurations to their default values and saves them."""
@@ -119,6 +194,8 @@ class ConfigManager:
             "APP_SETTINGS": self.APP_SETTINGS
         }
         self._save_config(self.app_config)
+        self._saved_config = copy.deepcopy(self.app_config)
+        self._notify_listeners({"CLIENT_FIELDS_CONFIG", "DB_CONFIG", "INTERNAL_DEFAULT_FIELDS", "APP_SETTINGS"})
 
 # Create a single instance of ConfigManager and expose its attributes as module-level variables
 _module_config_manager = ConfigManager()
@@ -0,0 +1,277 @@
+import threading
+import time
+from collections import deque, OrderedDict
+
+MAX_PREPARED_PER_CONNECTION = 16
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be borrowed within the acquire timeout."""
+
+
+class PooledConnection:
+    """
+    Envolve uma conexão DB-API emprestada do pool.
+    close() devolve a conexão ao pool em vez de fechá-la, então o código que
+    já faz `conn.close()` no finally continua funcionando sem alterações.
+    """
+
+    def __init__(self, pool, raw_connection, generation):
+        self._pool = pool
+        self._raw = raw_connection
+        self.generation = generation
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.checked_out = False
+        self._prepared = OrderedDict()
+        self._statement_generation = pool.statement_generation
+
+    @property
+    def raw(self):
+        return self._raw
+
+    def cursor(self):
+        return self._pool.wrap_cursor(self._raw.cursor())
+
+    def prepared_cursor(self, sql):
+        """
+        Cursor reservado para `sql` nesta conexão. O pyodbc reaproveita o statement
+        preparado quando o mesmo texto é executado de novo no mesmo cursor.
+        """
+        if self._statement_generation != self._pool.statement_generation:
+            self._clear_prepared()
+            self._statement_generation = self._pool.statement_generation
+        cursor = self._prepared.pop(sql, None)
+        if cursor is None:
+            cursor = self._raw.cursor()
+        self._prepared[sql] = cursor
+        while len(self._prepared) > MAX_PREPARED_PER_CONNECTION:
+            _, oldest = self._prepared.popitem(last=False)
+            self._close_cursor(oldest)
+        return self._pool.wrap_cursor(cursor)
+
+    def _clear_prepared(self):
+        for cursor in self._prepared.values():
+            self._close_cursor(cursor)
+        self._prepared.clear()
+
+    @staticmethod
+    def _close_cursor(cursor):
+        try:
+            cursor.close()
+        except Exception:
+            pass
+
+    def commit(self):
+        self._raw.commit()
+
+    def rollback(self):
+        self._raw.rollback()
+
+    def close(self):
+        """Devolve a conexão ao pool (não fecha a conexão física)."""
+        if self.checked_out:
+            self._pool.release(self)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """
+    Pool de conexões limitado e thread-safe.
+
+    - max_size: número máximo de conexões físicas abertas ao mesmo tempo.
+    - idle_timeout: conexões paradas há mais tempo que isso (segundos) são fechadas.
+    - ping_interval: conexões paradas há mais tempo que isso são testadas com
+      `ping_query` antes de serem entregues; conexões mortas são descartadas.
+    - acquire_timeout: tempo máximo esperando uma conexão livre.
+    - cursor_wrapper: aplicado a cada cursor entregue (ex.: instrumentação de métricas).
+    """
+
+    def __init__(self, connect_factory, max_size=4, idle_timeout=300, ping_interval=30,
+                 acquire_timeout=30, ping_query="SELECT 1", cursor_wrapper=None):
+        self._connect_factory = connect_factory
+        self._cursor_wrapper = cursor_wrapper
+        self.max_size = max(1, int(max_size))
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+        self.acquire_timeout = acquire_timeout
+        self.ping_query = ping_query
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._open_count = 0
+        self._generation = 0
+        self.statement_generation = 0
+        self._stats = {"hits": 0, "waits": 0, "creates": 0, "discards": 0, "ping_failures": 0}
+
+    def wrap_cursor(self, cursor):
+        return self._cursor_wrapper(cursor) if self._cursor_wrapper else cursor
+
+    def configure(self, max_size=None, idle_timeout=None, ping_interval=None, acquire_timeout=None):
+        """Altera os limites do pool em tempo de execução."""
+        with self._cond:
+            if max_size is not None:
+                self.max_size = max(1, int(max_size))
+            if idle_timeout is not None:
+                self.idle_timeout = idle_timeout
+            if ping_interval is not None:
+                self.ping_interval = ping_interval
+            if acquire_timeout is not None:
+                self.acquire_timeout = acquire_timeout
+            self._cond.notify_all()
+
+    def acquire(self, timeout=None):
+        """Empresta uma conexão do pool, criando uma nova se houver espaço."""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout if timeout is not None else None
+
+        while True:
+            to_close = []
+            conn = None
+            create = False
+            with self._cond:
+                waited = False
+                while True:
+                    to_close.extend(self._prune_idle_locked())
+                    if self._idle:
+                        conn = self._idle.pop()  # LIFO: a conexão usada mais recentemente
+                        break
+                    if self._open_count < self.max_size:
+                        self._open_count += 1
+                        create = True
+                        break
+                    if not waited:
+                        self._stats["waits"] += 1
+                        waited = True
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._close_all(to_close)
+                        raise PoolTimeout(f"No database connection available after {timeout}s (pool size {self.max_size}).")
+                    self._cond.wait(remaining)
+                generation = self._generation
+            self._close_all(to_close)
+
+            if create:
+                try:
+                    raw = self._connect_factory()
+                except Exception:
+                    with self._cond:
+                        self._open_count -= 1
+                        self._cond.notify()
+                    raise
+                conn = PooledConnection(self, raw, generation)
+                with self._cond:
+                    self._stats["creates"] += 1
+                conn.checked_out = True
+                return conn
+
+            if self._is_alive(conn):
+                with self._cond:
+                    self._stats["hits"] += 1
+                conn.checked_out = True
+                return conn
+
+            with self._cond:
+                self._stats["ping_failures"] += 1
+            self._discard(conn)
+
+    def release(self, conn):
+        """Devolve uma conexão ao pool, descartando-a se estiver obsoleta ou quebrada."""
+        conn.checked_out = False
+        conn.last_used = time.monotonic()
+        if conn.generation != self._generation:
+            self._discard(conn)
+            return
+        try:
+            # Encerra qualquer transação deixada aberta por quem emprestou a conexão
+            conn.raw.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        with self._cond:
+            if conn.generation != self._generation:
+                discard = True
+            else:
+                discard = False
+                self._idle.append(conn)
+                self._cond.notify()
+        if discard:
+            self._discard(conn)
+
+    def rebuild(self):
+        """Invalida todas as conexões (ex.: DB_CONFIG mudou); conexões emprestadas são fechadas ao voltar."""
+        with self._cond:
+            self._generation += 1
+            stale = list(self._idle)
+            self._idle.clear()
+            self._open_count -= len(stale)
+            self._stats["discards"] += len(stale)
+            self._cond.notify_all()
+        self._close_all(stale)
+
+    def close_all(self):
+        self.rebuild()
+
+    def clear_prepared_statements(self):
+        """Faz cada conexão descartar seus cursores preparados no próximo uso."""
+        with self._cond:
+            self.statement_generation += 1
+
+    def stats(self):
+        """Retorna contadores do pool (hits, waits, creates, ...) e ocupação atual."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["open"] = self._open_count
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._open_count - len(self._idle)
+            stats["max_size"] = self.max_size
+        return stats
+
+    def _prune_idle_locked(self):
+        if not self.idle_timeout:
+            return []
+        now = time.monotonic()
+        expired = [c for c in self._idle if now - c.last_used > self.idle_timeout]
+        for c in expired:
+            self._idle.remove(c)
+        self._open_count -= len(expired)
+        self._stats["discards"] += len(expired)
+        if expired:
+            self._cond.notify_all()
+        return expired
+
+    def _is_alive(self, conn):
+        if self.ping_interval is None or time.monotonic() - conn.last_used < self.ping_interval:
+            return True
+        try:
+            cursor = conn.raw.cursor()
+            cursor.execute(self.ping_query)
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        with self._cond:
+            self._open_count -= 1
+            self._stats["discards"] += 1
+            self._cond.notify()
+        self._close_all([conn])
+
+    @staticmethod
+    def _close_all(connections):
+        for conn in connections:
+            try:
+                conn.raw.close()
+            except Exception:
+                pass
@@ -0,0 +1,126 @@
+from utils.identifier_resolver import build_search_page_sql
+
+BACKEND_SQLSERVER = "sqlserver"
+BACKEND_SQLITE = "sqlite"
+
+# Chaves do DB_CONFIG que escolhem/configuram o backend e não fazem parte da string ODBC
+BACKEND_KEYS = ("BACKEND", "SQLITE_PATH")
+
+DEFAULT_SQLITE_PATH = "fbclientes.db"
+
+class DatabaseBackend:
+    """
+    Interface de armazenamento usada pelo db_operations, bulk_import, bulk_export
+    e id_allocator. Cada implementação sabe abrir conexões e executar as operações
+    de cliente no seu dialeto; quem chama só lida com dicionários.
+
+    Os métodos de operação recebem uma conexão emprestada do pool e as
+    instruções compiladas (statement_cache) da configuração de campos atual.
+    Não fazem commit nem tratam erros: isso fica com quem chama.
+    """
+
+    name = None
+    client_table = None
+    errors = (Exception,) # Exceções do driver que o chamador deve tratar como erro de banco
+    ping_query = "SELECT 1"
+    limit_style = "top" # Como o dialeto limita linhas: "top" (TOP (n)) ou "limit" (LIMIT n)
+    schema = None # TableSchema da tabela de clientes (schema_cache), quando já carregado
+
+    def connect(self, login_timeout=None):
+        """Abre uma conexão física (DB-API); login_timeout em segundos (None: o padrão do driver)."""
+        raise NotImplementedError
+
+    def set_query_timeout(self, raw_conn, seconds):
+        """Timeout (segundos) das consultas seguintes na conexão física, quando o driver suporta."""
+
+    def id_store(self, connect):
+        """Store de ids usado pelo IdAllocator; `connect` empresta uma conexão do pool."""
+        raise NotImplementedError
+
+    def schema_changed(self):
+        """Chamado quando CLIENT_FIELDS_CONFIG muda."""
+
+    def insert_client(self, conn, statements, client_data):
+        """Insere se o XCLIENTES não existir. Retorna True se inseriu."""
+        raise NotImplementedError
+
+    def update_client(self, conn, statements, names, client_data):
+        """Atualiza os campos `names`. Retorna (imagem_antes, imagem_depois); antes é None se não existir."""
+        raise NotImplementedError
+
+    def resolve_client(self, conn, statements, lookups):
+        """Primeira busca de `lookups` que encontrar. Retorna (dados, match_key) ou (None, None)."""
+        raise NotImplementedError
+
+    def delete_client(self, conn, statements, lookups):
+        """Resolve e apaga. Retorna (imagem_antes, match_key) ou (None, None)."""
+        raise NotImplementedError
+
+    def search_page(self, conn, columns, lookups, after_key, limit):
+        """Até `limit` linhas (dicionários com `columns`) que casam com qualquer busca, depois de after_key."""
+        sql, params = build_search_page_sql(lookups, self.client_table, columns, after_key, limit, self.limit_style)
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def resolve_batch(self, conn, statements, batch_lookups):
+        """
+        Resolve várias buscas (posição, prioridade, match_key, coluna, valor) de uma
+        vez, via tabela temporária e junções. Retorna [(posição, prioridade, match_key, dados)]
+        com todas as linhas que casaram; escolher a de maior prioridade fica com quem chama.
+        """
+        raise NotImplementedError
+
+    def delete_batch(self, conn, statements, client_ids):
+        """Apaga os XCLIENTES dados na transação corrente. Retorna as imagens antes das linhas apagadas."""
+        raise NotImplementedError
+
+    def fetch_for_update(self, conn, statements, client_ids):
+        """
+        Imagens atuais (projeção de auditoria) dos XCLIENTES dados, travadas para
+        escrita até o fim da transação corrente. Retorna {XCLIENTES: dados}; os
+        que não existem ficam de fora.
+        """
+        raise NotImplementedError
+
+    def delta_query(self, columns, version_column, since):
+        """
+        SELECT das colunas mais a versão da linha (SYNC_VERSION, inteiro), só das
+        linhas com versão > since e em ordem de versão. Sem version_column, a tabela toda.
+        Retorna (sql, parâmetros).
+        """
+        raise NotImplementedError
+
+    def bulk_cursor(self, conn):
+        """Cursor para executemany em cargas em lote."""
+        return conn.cursor()
+
+    def table_columns(self, conn, table_name):
+        """Nomes das colunas da tabela."""
+        raise NotImplementedError
+
+    def describe_table(self, conn, table_name):
+        """TableSchema com tipos, tamanhos, nulidade e índices da tabela (sem versão)."""
+        raise NotImplementedError
+
+    def schema_version(self, conn, table_name):
+        """Carimbo que muda quando a estrutura da tabela muda (consulta barata)."""
+        raise NotImplementedError
+
+    def set_schema(self, schema):
+        """Recebe os metadados da tabela de clientes carregados pelo schema_cache."""
+        self.schema = schema
+
+    def bind_input_sizes(self, cursor, columns):
+        """Declara os tipos/tamanhos dos parâmetros (um por coluna, na ordem) antes do execute. Padrão: nada."""
+
+def create_backend(db_config):
+    """Cria o backend escolhido por DB_CONFIG["BACKEND"] (padrão: sqlserver)."""
+    backend = str(db_config.get("BACKEND") or BACKEND_SQLSERVER).strip().lower()
+    if backend == BACKEND_SQLITE:
+        from utils.sqlite_backend import SqliteBackend
+        return SqliteBackend(db_config.get("SQLITE_PATH") or DEFAULT_SQLITE_PATH)
+    if backend == BACKEND_SQLSERVER:
+        from utils.sqlserver_backend import SqlServerBackend
+        return SqlServerBackend({key: value for key, value in db_config.items() if key not in BACKEND_KEYS})
+    raise ValueError(f"Unknown database backend: {backend}")
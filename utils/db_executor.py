@@ -0,0 +1,237 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, CancelledError
+from tkinter import messagebox
+
+from utils.query_metrics import get_query_metrics
+
+DEFAULT_WORKERS = 2
+DEFAULT_CALL_TIMEOUT = 60
+POLL_INTERVAL_MS = 50
+
+_task_context = threading.local()
+
+class DbTimeout(Exception):
+    """A chamada passou do tempo limite; o resultado, se chegar, é descartado."""
+
+class DbTask:
+    """Uma chamada enfileirada no executor: função, argumentos e o Future do resultado."""
+
+    def __init__(self, fn, args, kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.ui_calls = [] # Chamadas de UI feitas pelo worker, executadas na thread do Tk ao terminar
+        self.abandoned = False
+        self.write = False # Escrita (insert/update/delete): nunca é substituída nem abandonada pela tela
+
+    def cancel(self):
+        """Cancela se ainda estiver na fila; se já estiver rodando, o resultado será ignorado."""
+        self.abandoned = True
+        return self.future.cancel()
+
+def call_on_ui(fn, *args, **kwargs):
+    """
+    Executa fn na thread do Tk. Dentro de um worker do executor a chamada é
+    guardada e feita quando a tarefa termina (ex.: messagebox.showerror dentro do
+    db_operations); fora dele é feita na hora.
+    """
+    task = getattr(_task_context, "task", None)
+    if task is None:
+        return fn(*args, **kwargs)
+    task.ui_calls.append((fn, args, kwargs))
+    return None
+
+class DbExecutor:
+    """Threads de trabalho alimentadas por uma fila; submit() devolve um DbTask com Future."""
+
+    def __init__(self, workers=DEFAULT_WORKERS):
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self.resize(workers)
+
+    def resize(self, workers):
+        with self._lock:
+            missing = max(1, int(workers)) - len(self._threads)
+            for _ in range(missing):
+                thread = threading.Thread(target=self._worker, name="db-executor", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, fn, *args, **kwargs):
+        if self._shutdown:
+            raise RuntimeError("DbExecutor is shut down")
+        task = DbTask(fn, args, kwargs)
+        self._queue.put(task)
+        return task
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def shutdown(self):
+        self._shutdown = True
+        for _ in self._threads:
+            self._queue.put(None)
+
+    def _worker(self):
+        while True:
+            task = self._queue.get()
+            if task is None:
+                return
+            # Tarefas canceladas na fila não chegam a usar conexão nem worker
+            if not task.future.set_running_or_notify_cancel():
+                continue
+            _task_context.task = task
+            try:
+                task.future.set_result(task.fn(*task.args, **task.kwargs))
+            except BaseException as e:
+                task.future.set_exception(e)
+            finally:
+                _task_context.task = None
+
+class InlineExecutor:
+    """Executa a tarefa na hora, na thread atual (testes e scripts sem mainloop)."""
+
+    def submit(self, fn, *args, **kwargs):
+        task = DbTask(fn, args, kwargs)
+        task.future.set_running_or_notify_cancel()
+        _task_context.task = task
+        try:
+            task.future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            task.future.set_exception(e)
+        finally:
+            _task_context.task = None
+        return task
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def _app_settings():
+    from utils.config_manager import ConfigManager
+    return ConfigManager().APP_SETTINGS
+
+def get_db_executor():
+    """Executor compartilhado pelas telas, com DB_EXECUTOR_WORKERS threads."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = DbExecutor(_app_settings().get("DB_EXECUTOR_WORKERS", DEFAULT_WORKERS))
+        return _executor
+
+class DbTaskMixin:
+    """
+    Para as telas Tk: roda chamadas de banco fora da thread do mainloop e entrega
+    o resultado de volta com after(). Enquanto houver tarefa pendente a janela
+    mostra o cursor de espera; Esc cancela as leituras da janela.
+    """
+
+    db_executor = None # None = executor compartilhado
+
+    def run_db_task(self, fn, *args, on_success=None, on_error=None, timeout=None, key=None, write=False, **kwargs):
+        """
+        Enfileira fn(*args, **kwargs). on_success(resultado) e on_error(exceção) rodam
+        na thread do Tk. Uma nova tarefa com a mesma key substitui a anterior.
+
+        write=True (insert/update/delete): a tarefa não é substituída, cancelada pelo
+        Esc nem abandonada no timeout, porque pode ter gravado. Enquanto ela estiver
+        pendente, outra escrita ou tarefa com a mesma key é recusada (retorna None).
+        """
+        tasks = self.__dict__.setdefault("_db_tasks", {})
+        if not self.__dict__.get("_db_cancel_bound"):
+            self._db_cancel_bound = True
+            try:
+                self.bind("<Escape>", lambda event: self.cancel_db_tasks(), add="+")
+            except Exception:
+                pass
+
+        same_key_write = key is not None and key in tasks and tasks[key].write
+        if same_key_write or (write and any(task.write for task in tasks.values())):
+            messagebox.showwarning("Please Wait", "The previous operation is still being saved. Please wait for it to finish.")
+            return None
+        if key is not None and key in tasks:
+            tasks.pop(key).cancel()
+        key = key if key is not None else object()
+
+        if timeout is None:
+            timeout = _app_settings().get("DB_CALL_TIMEOUT", DEFAULT_CALL_TIMEOUT)
+        executor = self.db_executor or get_db_executor()
+        # Cada tarefa é uma ação do operador nas métricas: soma das idas ao banco que ela fizer
+        action = f"{type(self).__name__}.{getattr(fn, '__name__', 'task')}"
+        task = executor.submit(get_query_metrics().run_action, action, fn, *args, **kwargs)
+        task.write = write
+        tasks[key] = task
+        deadline = time.monotonic() + timeout if timeout else None
+        self._set_busy(True)
+        self._poll_db_task(key, task, deadline, on_success, on_error)
+        return task
+
+    def cancel_db_tasks(self):
+        """Cancela as leituras pendentes; escritas seguem até o fim e o resultado ainda é mostrado."""
+        tasks = self.__dict__.get("_db_tasks", {})
+        for key, task in list(tasks.items()):
+            if not task.write:
+                tasks.pop(key).cancel()
+        self._set_busy(bool(tasks))
+
+    def has_pending_write(self):
+        return any(task.write for task in self.__dict__.get("_db_tasks", {}).values())
+
+    def _poll_db_task(self, key, task, deadline, on_success, on_error):
+        tasks = self.__dict__.get("_db_tasks", {})
+        if task.abandoned:
+            return
+        if not task.future.done():
+            if deadline is not None and time.monotonic() > deadline:
+                if task.write and not task.future.cancel():
+                    # A escrita já está rodando e pode gravar: avisa uma vez e espera o resultado real
+                    messagebox.showwarning("Slow Database", "The database is taking longer than usual. "
+                                           "The result will be shown when it arrives; do not submit again.")
+                    self.after(POLL_INTERVAL_MS, self._poll_db_task, key, task, None, on_success, on_error)
+                    return
+                task.cancel() # Ainda na fila (nem escritas chegaram a rodar): seguro desistir
+                tasks.pop(key, None)
+                self._set_busy(bool(tasks))
+                self._report_db_error(DbTimeout("The database did not answer in time."), on_error)
+                return
+            self.after(POLL_INTERVAL_MS, self._poll_db_task, key, task, deadline, on_success, on_error)
+            return
+
+        tasks.pop(key, None)
+        self._set_busy(bool(tasks))
+        for fn, args, kwargs in task.ui_calls:
+            fn(*args, **kwargs)
+        try:
+            result = task.future.result()
+        except CancelledError:
+            return
+        except Exception as e:
+            self._report_db_error(e, on_error)
+            return
+        if on_success is not None:
+            on_success(result)
+
+    def _report_db_error(self, error, on_error):
+        if on_error is not None:
+            on_error(error)
+        elif isinstance(error, DbTimeout):
+            messagebox.showerror("Timeout", str(error))
+        else:
+            messagebox.showerror("Database Error", f"An unexpected error occurred: {error}")
+
+    def _set_busy(self, busy):
+        try:
+            self.configure(cursor="watch" if busy else "")
+        except Exception:
+            pass # Janela já destruída, ou mock nos testes
+
+    def destroy(self):
+        if self.has_pending_write():
+            messagebox.showwarning("Please Wait", "A save is still in progress. Close the window after it finishes.")
+            return
+        self.cancel_db_tasks()
+        super().destroy()
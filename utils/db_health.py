@@ -0,0 +1,165 @@
+import threading
+import time
+
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_COOL_DOWN = 15
+
+STATE_CLOSED = "closed"       # Banco respondendo: chamadas normais
+STATE_OPEN = "open"           # Banco fora: chamadas falham na hora até o fim do cool-down
+STATE_HALF_OPEN = "half_open" # Teste em segundo plano em andamento (chamadas continuam falhando na hora)
+
+# Classes de operação e seus timeouts (segundos): login ao abrir conexão física e de cada consulta
+OP_READ = "read"
+OP_WRITE = "write"
+OP_BULK = "bulk"
+DEFAULT_DB_TIMEOUTS = {
+    OP_READ: {"login": 5, "query": 30},
+    OP_WRITE: {"login": 10, "query": 60},
+    OP_BULK: {"login": 15, "query": 600},
+}
+
+class CircuitOpenError(Exception):
+    """Banco marcado como indisponível: a chamada nem tentou conectar."""
+
+class CircuitBreaker:
+    """
+    Saúde da conexão com o banco. Depois de `failure_threshold` falhas seguidas
+    ao conectar, o circuito abre: novas conexões falham na hora (CircuitOpenError)
+    em vez de esperar o timeout de login. Uma thread testa o banco com `probe` a
+    cada `cool_down` segundos e fecha o circuito assim que ele responder.
+    """
+
+    def __init__(self, probe, failure_threshold=DEFAULT_FAILURE_THRESHOLD, cool_down=DEFAULT_COOL_DOWN):
+        self.probe = probe
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.next_probe_at = None
+        self.last_error = None
+        self.trips = 0
+        self.fast_failures = 0
+        self._listeners = []
+        self.configure(failure_threshold, cool_down)
+
+    def add_listener(self, callback):
+        """Registra callback(estado), chamado (na thread que mudou o estado) quando o circuito abre ou fecha."""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, state):
+        for callback in list(self._listeners):
+            try:
+                callback(state)
+            except Exception:
+                pass # Um listener com erro não muda o estado do circuito
+
+    def configure(self, failure_threshold=None, cool_down=None):
+        with self._lock:
+            if failure_threshold is not None:
+                self.failure_threshold = max(1, int(failure_threshold))
+            if cool_down is not None:
+                self.cool_down = max(0.1, float(cool_down))
+
+    @property
+    def is_open(self):
+        return self.state != STATE_CLOSED
+
+    def check(self):
+        """Levanta CircuitOpenError se o circuito estiver aberto; chamado antes de abrir uma conexão física."""
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return
+            self.fast_failures += 1
+            retry_in = max(0.0, (self.next_probe_at or time.monotonic()) - time.monotonic())
+        raise CircuitOpenError(f"Database unavailable ({self.last_error}); retrying in background in {retry_in:.0f}s.")
+
+    def record_success(self):
+        with self._lock:
+            recovered = self.state != STATE_CLOSED
+            self.failures = 0
+            self.state = STATE_CLOSED
+            self.opened_at = None
+            self.next_probe_at = None
+        if recovered:
+            self._notify(STATE_CLOSED)
+
+    def record_failure(self, error):
+        """Conta uma falha de conexão. Retorna True se esta falha abriu o circuito."""
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)
+            if self.state != STATE_CLOSED or self.failures < self.failure_threshold:
+                return False
+            self.state = STATE_OPEN
+            self.opened_at = time.monotonic()
+            self.next_probe_at = self.opened_at + self.cool_down
+            self.trips += 1
+            start_probe = self._thread is None or not self._thread.is_alive()
+            if start_probe:
+                self._thread = threading.Thread(target=self._probe_loop, name="db-health-probe", daemon=True)
+        if start_probe:
+            self._thread.start()
+        self._notify(STATE_OPEN)
+        return True
+
+    def _probe_loop(self):
+        while True:
+            with self._lock:
+                if self.state == STATE_CLOSED:
+                    return
+                wait = (self.next_probe_at or 0) - time.monotonic()
+            if wait > 0:
+                self._wake.wait(wait)
+                self._wake.clear()
+                continue
+            with self._lock:
+                self.state = STATE_HALF_OPEN
+            try:
+                self.probe()
+            except Exception as e:
+                with self._lock:
+                    self.state = STATE_OPEN
+                    self.last_error = str(e)
+                    self.next_probe_at = time.monotonic() + self.cool_down
+                continue
+            self.record_success()
+            return
+
+    def probe_now(self):
+        """Antecipa o próximo teste (ex.: botão "tentar agora")."""
+        with self._lock:
+            if self.state == STATE_OPEN:
+                self.next_probe_at = time.monotonic()
+        self._wake.set()
+
+    def status(self):
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "last_error": self.last_error,
+                "down_seconds": now - self.opened_at if self.opened_at is not None else None,
+                "retry_in": max(0.0, self.next_probe_at - now) if self.next_probe_at is not None else None,
+                "trips": self.trips,
+                "fast_failures": self.fast_failures,
+            }
+
+def breaker_settings(app_settings):
+    return {
+        "failure_threshold": app_settings.get("DB_BREAKER_FAILURE_THRESHOLD", DEFAULT_FAILURE_THRESHOLD),
+        "cool_down": app_settings.get("DB_BREAKER_COOL_DOWN", DEFAULT_COOL_DOWN),
+    }
+
+def operation_timeouts(app_settings, operation):
+    """{"login": s, "query": s} da classe de operação, completando com os padrões o que faltar no DB_TIMEOUTS."""
+    timeouts = dict(DEFAULT_DB_TIMEOUTS.get(operation, DEFAULT_DB_TIMEOUTS[OP_READ]))
+    timeouts.update(app_settings.get("DB_TIMEOUTS", {}).get(operation, {}))
+    return timeouts
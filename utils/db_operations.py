@@ -1,7 +1,75 @@
-import pyodbc
+import threading
 from tkinter import messagebox
-from utils.config_manager import DB_CONFIG, CLIENT_FIELDS_CONFIG, INTERNAL_DEFAULT_FIELDS
+from utils.client_cache import ClientCache, SECONDARY_KEYS, cache_settings
+from utils.config_manager import ConfigManager
+from utils.connection_pool import ConnectionPool, PoolTimeout
+from utils.db_backend import create_backend
+from utils.db_executor import call_on_ui
+from utils.db_health import CircuitBreaker, CircuitOpenError, breaker_settings, operation_timeouts, OP_READ, OP_WRITE, OP_BULK
+from utils.query_metrics import get_query_metrics, metrics_settings, tracked
+from utils.identifier_resolver import plan_lookups, LOOKUP_ORDER, MATCH_RAZAO, MATCH_XCLIENTES
+from utils.name_index import fold
+from utils.schema_cache import SchemaCache, DEFAULT_SCHEMA_CACHE_PATH, derive_max_lengths
+from utils.statement_cache import get_compiled_statements, invalidate_compiled_statements, PROJECTION_LIST
+from utils.write_journal import (
+    WriteJournal, find_conflict, journal_settings, JOURNAL_INSERT, JOURNAL_UPDATE, JOURNAL_DELETE,
+    STATUS_DONE, STATUS_CONFLICT, STATUS_FAILED
+)
 from datetime import datetime
+import time
+
+config_manager = ConfigManager()
+
+_backend = None
+_backend_lock = threading.Lock()
+_pool = None
+_pool_lock = threading.Lock()
+_mutation_listeners = []
+_client_cache = ClientCache(**cache_settings(config_manager.APP_SETTINGS))
+_metrics = get_query_metrics()
+_metrics.configure(**metrics_settings(config_manager.APP_SETTINGS))
+_snapshot = None
+_snapshot_lock = threading.Lock()
+_name_index = None
+_name_index_lock = threading.Lock()
+_schema_cache = None
+_schema_cache_lock = threading.Lock()
+_breaker = CircuitBreaker(lambda: _probe_database(), **breaker_settings(config_manager.APP_SETTINGS))
+_operation_local = threading.local() # Timeout de login da classe de operação que está abrindo a conexão
+_journal = None
+_journal_lock = threading.Lock()
+_journal_wake = threading.Event()
+_replay_lock = threading.Lock()
+
+SCHEMA_TABLE = "FBCLIENTES" # Nome da tabela de clientes no INFORMATION_SCHEMA (sem banco/esquema)
+
+class MutationResult:
+    """
+    Resultado de um update/delete bem-sucedido, com as imagens da linha antes e
+    depois da alteração devolvidas pelo próprio lote (after é None em deletes).
+    changed_fields lista os campos gravados; vazio quando o update não tinha o que mudar.
+    """
+
+    def __init__(self, client_id, before=None, after=None, changed_fields=None):
+        self.client_id = client_id
+        self.before = before
+        self.after = after
+        self.changed_fields = changed_fields
+
+    def __repr__(self):
+        return (f"MutationResult(client_id={self.client_id!r}, before={self.before!r}, "
+                f"after={self.after!r}, changed_fields={self.changed_fields!r})")
+
+class QueuedWrite:
+    """Escrita guardada no diário offline (banco fora do ar); será reenviada quando a conexão voltar."""
+
+    def __init__(self, entry_id, operation, client_id):
+        self.entry_id = entry_id
+        self.operation = operation
+        self.client_id = client_id
+
+    def __repr__(self):
+        return f"QueuedWrite(entry_id={self.entry_id!r}, operation={self.operation!r}, client_id={self.client_id!r})"
 
 def log_operation(operation_type, client_id, before_data=None, after_data=None):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -12,214 +80,889 @@ def log_operation(operation_type, client_id, before_data=None, after_data=None):
         log_entry += f", After: {after_data}"
     print(log_entry) # For now, print to console. Can be extended to file logging.
 
-def connect_to_database():
-    """Conecta ao banco de dados"""
+def add_mutation_listener(callback):
+    """Registra callback(operação, client_id, antes, depois), chamado após cada insert/update/delete gravado."""
+    if callback not in _mutation_listeners:
+        _mutation_listeners.append(callback)
+
+def remove_mutation_listener(callback):
+    if callback in _mutation_listeners:
+        _mutation_listeners.remove(callback)
+
+def _notify_mutation(operation, client_id, before=None, after=None):
+    for callback in list(_mutation_listeners):
+        callback(operation, client_id, before, after)
+
+def get_client_cache():
+    """Cache LRU/TTL de linhas de cliente usado por resolve_client."""
+    return _client_cache
+
+def _update_client_cache(operation, client_id, before, after):
+    if operation == "delete":
+        _client_cache.invalidate(client_id)
+    elif operation == "update" and after:
+        _client_cache.merge(after)
+    elif operation == "update":
+        _client_cache.invalidate(client_id)
+    else:
+        _client_cache.put(after)
+
+add_mutation_listener(_update_client_cache)
+
+def get_snapshot():
+    """
+    Cópia local da FBCLIENTES (utils.snapshot), criada e sincronizada em segundo
+    plano quando SNAPSHOT_ENABLED está ligado. Retorna None se desligada ou sem
+    SNAPSHOT_VERSION_COLUMN (sem versão cada ciclo releria a tabela inteira).
+    """
+    global _snapshot
+    settings = config_manager.APP_SETTINGS
+    if not settings.get("SNAPSHOT_ENABLED") or not settings.get("SNAPSHOT_VERSION_COLUMN"):
+        return None
+    with _snapshot_lock:
+        if _snapshot is None:
+            from utils.snapshot import ClientSnapshot
+            _snapshot = ClientSnapshot(
+                settings.get("SNAPSHOT_PATH", "fbclientes_snapshot.db"),
+                get_backend(),
+                config_manager.CLIENT_FIELDS_CONFIG,
+                lambda: acquire_connection(OP_BULK),
+                version_column=settings.get("SNAPSHOT_VERSION_COLUMN"),
+                sync_interval=settings.get("SNAPSHOT_SYNC_INTERVAL", 10),
+                reconcile_every=settings.get("SNAPSHOT_RECONCILE_EVERY", 30)
+            )
+            add_mutation_listener(_snapshot.apply_mutation)
+            _snapshot.add_listener(_on_snapshot_change)
+            _snapshot.start()
+        return _snapshot
+
+def _on_snapshot_change(operation, client_id, before, after):
+    """Linhas gravadas por outras estações, trazidas pelo delta da cópia local."""
+    _client_cache.invalidate(client_id)
+    index = _name_index
+    if index is not None:
+        index.apply_mutation(operation, client_id, before, after)
+
+def _close_snapshot():
+    global _snapshot
+    with _snapshot_lock:
+        if _snapshot is not None:
+            remove_mutation_listener(_snapshot.apply_mutation)
+            _snapshot.close()
+            _snapshot = None
+
+def get_snapshot_status():
+    """Status da cópia local (linhas, linhas no servidor, atraso), ou None se desligada."""
+    snapshot = get_snapshot()
+    return snapshot.status() if snapshot else None
+
+def _name_rows():
+    snapshot = get_snapshot()
+    if snapshot is not None and snapshot.ready:
+        return snapshot.name_rows()
+    from utils.bulk_export import iter_client_rows
+    return ((row["XCLIENTES"], row["RAZAO"]) for row in iter_client_rows(columns=["XCLIENTES", "RAZAO"]))
+
+def _build_name_index(index):
     try:
-        conn_str = ';'.join(f"{key}={value}" for key, value in DB_CONFIG.items())
-        conn = pyodbc.connect(conn_str)
-        return conn
-    except pyodbc.Error as e:
-        messagebox.showerror("Database Connection Error", f"Failed to connect to the database: {e}")
+        index.build(_name_rows())
+    except Exception as e:
+        log_operation("Name Index Build Failed", None, after_data={"error": str(e)})
+
+def get_name_index():
+    """
+    Índice de trigramas de RAZAO (utils.name_index), montado em segundo plano a
+    partir da cópia local ou do banco quando NAME_INDEX_ENABLED está ligado.
+    Retorna None se desligado; index.ready indica se a carga terminou.
+    """
+    global _name_index
+    if not config_manager.APP_SETTINGS.get("NAME_INDEX_ENABLED"):
+        return None
+    with _name_index_lock:
+        if _name_index is None:
+            from utils.name_index import NameIndex
+            _name_index = NameIndex()
+            add_mutation_listener(_name_index.apply_mutation)
+            threading.Thread(target=_build_name_index, args=(_name_index,), name="name-index-build", daemon=True).start()
+        return _name_index
+
+def _drop_name_index():
+    global _name_index
+    with _name_index_lock:
+        if _name_index is not None:
+            remove_mutation_listener(_name_index.apply_mutation)
+            _name_index = None
+
+def search_client_names(query, limit=10):
+    """Os `limit` clientes com RAZAO mais parecida com `query` (aceita erros de digitação e palavras parciais)."""
+    index = get_name_index()
+    if index is None or not index.ready:
+        return []
+    return index.search(query, limit)
+
+def get_schema_cache():
+    """
+    Metadados da FBCLIENTES (utils.schema_cache): tipos, tamanhos, nulidade e
+    índices. Usa na hora o arquivo salvo na última sessão e confere a versão
+    do esquema em segundo plano. Ao carregar, o backend recebe o TableSchema.
+    """
+    global _schema_cache
+    with _schema_cache_lock:
+        if _schema_cache is None:
+            backend = get_backend()
+            _schema_cache = SchemaCache(
+                config_manager.APP_SETTINGS.get("SCHEMA_CACHE_PATH", DEFAULT_SCHEMA_CACHE_PATH),
+                backend,
+                lambda: acquire_connection(OP_READ),
+                SCHEMA_TABLE,
+                on_loaded=backend.set_schema
+            )
+            _schema_cache.start()
+        return _schema_cache
+
+def _drop_schema_cache():
+    global _schema_cache
+    with _schema_cache_lock:
+        _schema_cache = None
+
+def get_table_schema():
+    """TableSchema da FBCLIENTES, ou None enquanto não foi carregado."""
+    with _schema_cache_lock:
+        cache = _schema_cache
+    return cache.schema if cache is not None else None
+
+def get_validation_rules():
+    """
+    Regras (max_length, required) por campo para validate_fields. O max_length
+    vem do tamanho real da coluna quando os metadados já foram carregados.
+    """
+    fields_config = config_manager.CLIENT_FIELDS_CONFIG
+    max_lengths = derive_max_lengths(fields_config, get_table_schema())
+    return {field["name"]: (max_lengths[field["name"]], field["required"]) for field in fields_config}
+
+def get_write_journal():
+    """
+    Diário durável (utils.write_journal) das escritas feitas com o banco fora do
+    ar, ou None se WRITE_JOURNAL_ENABLED estiver desligado. Na primeira chamada
+    começa a thread que reenvia a fila quando a conexão volta.
+    """
+    global _journal
+    if not config_manager.APP_SETTINGS.get("WRITE_JOURNAL_ENABLED"):
+        return None
+    with _journal_lock:
+        if _journal is None:
+            _journal = WriteJournal(journal_settings(config_manager.APP_SETTINGS)["path"])
+            _journal.purge_done() # Reenviadas em sessões anteriores
+            _breaker.add_listener(_on_health_changed)
+            threading.Thread(target=_journal_replay_loop, name="write-journal-replay", daemon=True).start()
+        return _journal
+
+def _on_health_changed(state):
+    if state == "closed":
+        _journal_wake.set() # Conexão de volta: reenvia sem esperar o intervalo
+
+def _journal_replay_loop():
+    while True:
+        _journal_wake.wait(journal_settings(config_manager.APP_SETTINGS)["interval"])
+        _journal_wake.clear()
+        journal = _journal
+        if journal is None:
+            return
+        if _breaker.is_open or not journal.counts().get("pending"):
+            continue
+        try:
+            replay_write_journal()
+        except Exception as e:
+            log_operation("Journal Replay Failed", None, after_data={"error": str(e)})
+
+def _queue_write(operation, client_id, data, base=None):
+    """Guarda a escrita no diário. Retorna QueuedWrite, ou None se o diário estiver desligado."""
+    journal = get_write_journal()
+    if journal is None:
         return None
+    entry_id = journal.append(operation, client_id, data, base)
+    log_operation(f"Queued Offline ({operation})", client_id, before_data=base, after_data=data)
+    return QueuedWrite(entry_id, operation, client_id)
 
+def _schema_errors(backend, statements, client_data, names):
+    """Valida localmente os campos `names` contra os metadados da tabela, antes de ir ao servidor."""
+    if backend.schema is None:
+        return []
+    names = tuple(names)
+    values = dict(zip(statements.columns_for(names), (client_data.get(name) for name in names)))
+    return backend.schema.validate(values)
+
+def get_backend():
+    """Backend de armazenamento escolhido por DB_CONFIG["BACKEND"] (sqlserver ou sqlite)."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_backend(config_manager.DB_CONFIG)
+        return _backend
+
+def _open_raw_connection():
+    """
+    Abre uma conexão física usando o DB_CONFIG atual. Com o circuito aberto
+    falha na hora (CircuitOpenError), sem esperar o timeout de login.
+    """
+    _breaker.check()
+    backend = get_backend()
+    try:
+        conn = backend.connect(login_timeout=getattr(_operation_local, "login_timeout", None))
+    except backend.errors as e:
+        _breaker.record_failure(e)
+        raise
+    _breaker.record_success()
+    _metrics.add_connect_time(0, login=True) # O tempo entra pelo connect_to_database, que inclui este
+    return conn
+
+def _probe_database():
+    """Teste do CircuitBreaker: conexão física nova (fora do pool) e o ping do backend."""
+    backend = get_backend()
+    conn = backend.connect(login_timeout=operation_timeouts(config_manager.APP_SETTINGS, OP_READ)["login"])
+    try:
+        conn.cursor().execute(backend.ping_query)
+    finally:
+        conn.close()
+
+def _pool_settings():
+    settings = config_manager.APP_SETTINGS
+    return {
+        "max_size": settings.get("DB_POOL_MAX_SIZE", 4),
+        "idle_timeout": settings.get("DB_POOL_IDLE_TIMEOUT", 300),
+        "ping_interval": settings.get("DB_POOL_PING_INTERVAL", 30),
+        "acquire_timeout": settings.get("DB_POOL_ACQUIRE_TIMEOUT", 30),
+    }
+
+def _on_config_changed(changed_sections):
+    global _backend
+    if "DB_CONFIG" in changed_sections:
+        from utils.id_allocator import reset_xclientes_allocator
+        with _backend_lock:
+            _backend = None
+        reset_xclientes_allocator()
+    if "DB_CONFIG" in changed_sections or "CLIENT_FIELDS_CONFIG" in changed_sections:
+        _client_cache.clear()
+    if changed_sections & {"DB_CONFIG", "CLIENT_FIELDS_CONFIG", "APP_SETTINGS"}:
+        _close_snapshot() # Recriada no próximo uso com a configuração nova
+    if changed_sections & {"DB_CONFIG", "APP_SETTINGS"}:
+        _drop_name_index()
+    if "DB_CONFIG" in changed_sections:
+        _drop_schema_cache()
+        _breaker.record_success() # Servidor novo: as falhas do anterior não contam
+    if "APP_SETTINGS" in changed_sections:
+        _client_cache.configure(**cache_settings(config_manager.APP_SETTINGS))
+        _metrics.configure(**metrics_settings(config_manager.APP_SETTINGS))
+        _breaker.configure(**breaker_settings(config_manager.APP_SETTINGS))
+    if "CLIENT_FIELDS_CONFIG" in changed_sections:
+        invalidate_compiled_statements()
+        if _backend is not None:
+            _backend.schema_changed()
+        if _pool is not None:
+            _pool.clear_prepared_statements()
+    if _pool is None:
+        return
+    if "DB_CONFIG" in changed_sections:
+        _pool.rebuild()
+    if "APP_SETTINGS" in changed_sections:
+        _pool.configure(**_pool_settings())
+
+def get_connection_pool():
+    """Retorna o pool de conexões compartilhado, criando-o no primeiro uso."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(_open_raw_connection, ping_query=get_backend().ping_query,
+                                   cursor_wrapper=_metrics.wrap_cursor, **_pool_settings())
+        return _pool
+
+config_manager.add_listener(_on_config_changed)
+
+def get_pool_stats():
+    """Estatísticas do pool (hits, waits, creates, discards, open, idle, in_use)."""
+    return get_connection_pool().stats()
+
+def get_cache_stats():
+    """Estatísticas do cache de clientes (hits, misses, evictions, entries, bytes)."""
+    return _client_cache.stats()
+
+def get_metrics():
+    """Métricas das chamadas de banco (utils.query_metrics): percentis por operação, ações recentes."""
+    return _metrics
+
+def get_circuit_breaker():
+    """Monitor de saúde da conexão (utils.db_health) usado por todas as conexões do pool."""
+    return _breaker
+
+def get_health_status():
+    """Estado do circuito (closed/open/half_open), falhas, último erro e segundos até o próximo teste."""
+    return _breaker.status()
+
+def acquire_connection(operation=OP_READ):
+    """
+    Empresta uma conexão do pool com os timeouts de login e de consulta da classe
+    de operação (OP_READ, OP_WRITE ou OP_BULK, ver DB_TIMEOUTS). Levanta os erros:
+    CircuitOpenError, PoolTimeout ou os do driver.
+    """
+    timeouts = operation_timeouts(config_manager.APP_SETTINGS, operation)
+    _operation_local.login_timeout = timeouts["login"]
+    try:
+        conn = get_connection_pool().acquire()
+    finally:
+        _operation_local.login_timeout = None
+    get_backend().set_query_timeout(conn.raw, timeouts["query"])
+    return conn
+
+def connect_to_database(operation=OP_READ, report_errors=True):
+    """
+    Empresta uma conexão do pool. conn.close() devolve a conexão ao pool.
+    Com o banco fora do ar só a falha que abre o circuito mostra mensagem; as
+    seguintes retornam None na hora e o estado aparece no banner do menu principal.
+    report_errors=False não mostra nada (quem chama guarda a escrita no diário offline).
+    """
+    start = time.perf_counter()
+    try:
+        return acquire_connection(operation)
+    except CircuitOpenError:
+        _metrics.note_error()
+        return None
+    except (PoolTimeout,) + get_backend().errors as e:
+        _metrics.note_error()
+        if report_errors and _breaker.is_open:
+            call_on_ui(messagebox.showerror, "Database Unavailable",
+                       f"Failed to connect to the database: {e}\n\n"
+                       f"New attempts will fail immediately while the connection is retried in the background.")
+        elif report_errors:
+            call_on_ui(messagebox.showerror, "Database Connection Error", f"Failed to connect to the database: {e}")
+        return None
+    finally:
+        _metrics.add_connect_time(time.perf_counter() - start)
+
+def get_client_statements():
+    """Instruções compiladas (INSERT/UPDATE/SELECT) para a configuração de campos atual."""
+    return get_compiled_statements(config_manager.CLIENT_FIELDS_CONFIG, get_backend().client_table)
+
+@tracked("insert")
 def insert_client_data(client_data):
     """
     Insere um novo cliente na tabela FBCLIENTES ou indica se o cliente já existe.
     Retorna Verdadeiro em caso de inserção bem-sucedida, Falso se o cliente já existir ou em caso de erro.
+    Com o banco fora do ar e o diário offline ligado, retorna um QueuedWrite; sem
+    XCLIENTES (não foi possível reservar), o id é reservado no reenvio.
     """
-    conn = connect_to_database()
-    if conn is None:
+    backend = get_backend()
+    statements = get_client_statements()
+    errors = _schema_errors(backend, statements, client_data, statements.insert_names)
+    if errors:
+        call_on_ui(messagebox.showerror, "Validation Error", "\n".join(errors))
         return False
 
-    try:
-        cursor = conn.cursor()
+    conn = None
+    if client_data.get("XCLIENTES") is not None:
+        conn = connect_to_database(OP_WRITE, report_errors=get_write_journal() is None)
+    if conn is None:
+        return _queue_write(JOURNAL_INSERT, client_data.get("XCLIENTES"), client_data) or False
 
-        insert_columns = [field["db_column"] for field in CLIENT_FIELDS_CONFIG]
-        
-        placeholders = ', '.join(['?'] * len(insert_columns))
-        columns_str = ', '.join(insert_columns)
-
-        query = f'''
-        DECLARE @Status INT;
-
-        IF NOT EXISTS (SELECT 1 FROM SM11_PROD.dbo.FBCLIENTES WHERE XCLIENTES = ?)
-            BEGIN
-                INSERT INTO SM11_PROD.dbo.FBCLIENTES
-                    ({columns_str})
-                VALUES ({placeholders});
-                SET @Status = 1; -- Successfully inserted
-            END
-        ELSE
-            BEGIN
-                SET @Status = 0; -- Client already exists
-            END
-
-        SELECT @Status AS Resultado; -- Return the status
-        '''
-        values_for_insert_statement = [client_data.get(field["name"]) for field in CLIENT_FIELDS_CONFIG]
-        
-        values_to_insert = (client_data.get("XCLIENTES"),) + tuple(values_for_insert_statement)
-        
-        cursor.execute(query, values_to_insert)
+    try:
+        inserted = backend.insert_client(conn, statements, client_data)
         conn.commit()
+        if not inserted:
+            # XCLIENTES já existe: não descarta o cadastro em silêncio
+            log_operation("Insert Skipped (XCLIENTES exists)", client_data.get("XCLIENTES"), after_data=client_data)
+            return False
+        _notify_mutation("insert", client_data.get("XCLIENTES"),
+                         after=statements.row_to_dict(statements.bulk_insert_values(client_data)))
         return True
-    except pyodbc.Error as e:
-        messagebox.showerror("Database Error", f"An error occurred during insertion: {e}")
+    except backend.errors as e:
+        conn.rollback()
+        call_on_ui(messagebox.showerror, "Database Error", f"An error occurred during insertion: {e}")
         return False
     finally:
         if conn:
             conn.close()
 
-def update_client_data(client_data):
+@tracked("update")
+def update_client_data(client_data, before_data=None):
     """
     Atualiza os dados de um cliente na tabela FBCLIENTES.
-    Retorna Verdadeiro em caso de atualização bem-sucedida, Falso se o cliente não existir ou em caso de erro.
+    Com before_data (a linha atual), só as colunas alteradas entram no UPDATE, e
+    nada é enviado ao banco quando nenhuma coluna mudou.
+    Imagem antes, UPDATE e imagem depois rodam na mesma transação (no SQL Server, em um único lote).
+    Retorna um MutationResult com as duas imagens, ou False se o cliente não existir ou em caso de erro.
+    Com o banco fora do ar e o diário offline ligado, retorna um QueuedWrite (before_data
+    vira a base da detecção de conflito no reenvio).
     """
-    conn = connect_to_database()
-    if conn is None:
+    client_id = client_data.get("XCLIENTES")
+    statements = get_client_statements()
+
+    if before_data is not None:
+        changed = statements.changed_fields(client_data, before_data)
+        if not changed:
+            return MutationResult(client_id, before=before_data, after=before_data, changed_fields=())
+    else:
+        changed = statements.update_names
+
+    backend = get_backend()
+    errors = _schema_errors(backend, statements, client_data, changed)
+    if errors:
+        call_on_ui(messagebox.showerror, "Validation Error", "\n".join(errors))
         return False
 
-    client_id = client_data.get("XCLIENTES")
-    before_data = get_client_data(client_id) # Fetch current data before update
+    conn = connect_to_database(OP_WRITE, report_errors=get_write_journal() is None)
+    if conn is None:
+        data = {name: client_data.get(name) for name in ("XCLIENTES",) + tuple(changed)}
+        return _queue_write(JOURNAL_UPDATE, client_id, data, before_data) or False
 
     try:
-        cursor = conn.cursor()
-
-        # Define as colunas a serem atualizadas
-        update_columns = [field["db_column"] for field in CLIENT_FIELDS_CONFIG if field["name"] != "XCLIENTES"]
-        # Cria a string de placeholders para os valores de atualização
-        placeholders = ', '.join([f"{col} = ?" for col in update_columns])
-        print("placerouder", placeholders)
-        query = f'''
-        DECLARE @Status INT;
-
-        IF EXISTS (SELECT 1 FROM SM11_PROD.dbo.FBCLIENTES WHERE XCLIENTES = ?)
-            BEGIN
-                UPDATE SM11_PROD.dbo.FBCLIENTES
-                SET {placeholders}
-                WHERE XCLIENTES = ?;
-                SET @Status = 1; -- Successfully updated
-            END
-        ELSE
-            BEGIN
-                SET @Status = 0; -- Client does not exist
-            END
-
-        SELECT @Status AS Resultado; -- Return the status
-        '''
-        
-        # Obtém os valores a serem atualizados (sem incluir o campo 'XCLIENTES' que é a chave)
-        values_for_update_statement = [client_data.get(field["name"]) for field in CLIENT_FIELDS_CONFIG if field["name"] != "XCLIENTES"]
-        # Coloca o valor de XCLIENTES no início e no final dos valores para a atualização
-        values_to_update = (client_data.get("XCLIENTES"),) + tuple(values_for_update_statement) + (client_data.get("XCLIENTES"),)
-        
-        cursor.execute(query, values_to_update)
+        before_row, after_row = backend.update_client(conn, statements, changed, client_data)
         conn.commit()
 
+        if before_row is None:
+            return False # Client does not exist
+
         # Log the update operation
-        log_operation("Update", client_id, before_data=before_data, after_data=client_data)
-        
-        return True
-        
-    except pyodbc.Error as e:
-        messagebox.showerror("Database Error", f"An error occurred during update: {e}")
+        log_operation("Update", client_id, before_data=before_row, after_data=after_row)
+        _notify_mutation("update", client_id, before=before_row, after=after_row)
+
+        return MutationResult(client_id, before=before_row, after=after_row, changed_fields=changed)
+
+    except backend.errors as e:
+        conn.rollback()
+        call_on_ui(messagebox.showerror, "Database Error", f"An error occurred during update: {e}")
         return False
     finally:
         if conn:
             conn.close()
 
+@tracked("delete")
 def delete_client_data(identifier):
     """
-    Deletes a client from the FBCLIENTES table based on XCLIENTES.
-    Returns True on successful deletion, False otherwise.
+    Deletes a client from the FBCLIENTES table based on XCLIENTES, CGC, RAZAO, or INSCRICAO.
+    The identifier is resolved, the before image captured and the row deleted in a single batch.
+    Returns a MutationResult with the before image, None if the client was not found, False on error.
+    With the database unreachable and the offline journal enabled, returns a QueuedWrite;
+    a name that the local snapshot cannot resolve to an XCLIENTES is not queued (returns False).
     """
-    conn = connect_to_database()
-    if conn is None:
-        return False
+    lookups = plan_lookups(identifier, config_manager.CLIENT_FIELDS_CONFIG)
+    if not lookups:
+        return None
 
-    client_id = identifier
-    before_data = get_client_data(client_id) # Fetch current data before deletion
+    backend = get_backend()
+    conn = connect_to_database(OP_WRITE, report_errors=get_write_journal() is None)
+    if conn is None:
+        # A cópia local, se pronta, já dá o XCLIENTES e a imagem para detectar conflito no reenvio
+        snapshot = get_snapshot()
+        before_data = snapshot.resolve(lookups)[0] if snapshot is not None and snapshot.ready else None
+        client_id = before_data.get("XCLIENTES") if before_data else None
+        if client_id is None and _matches_by_name(lookups):
+            # Só pelo nome (LIKE) o reenvio poderia excluir outro cliente: não entra na fila
+            if get_write_journal() is not None:
+                call_on_ui(messagebox.showerror, "Database Error",
+                           "The database is unavailable. A client identified only by name cannot be deleted offline; "
+                           "use XCLIENTES, CGC or INSCRICAO.")
+            return False
+        return _queue_write(JOURNAL_DELETE, client_id, {"identifier": identifier}, before_data) or False
 
     try:
-        cursor = conn.cursor()
-        # First, try to get the client data using the identifier
-        if before_data and "XCLIENTES" in before_data:
-            xclientes_to_delete = before_data["XCLIENTES"]
-            cursor.execute("DELETE FROM SM11_PROD.dbo.FBCLIENTES WHERE XCLIENTES = ?", xclientes_to_delete)
-            rows_affected = cursor.rowcount
-            conn.commit()
-            
-            if rows_affected > 0:
-                log_operation("Delete", client_id, before_data=before_data)
-                return True
-            else:
-                return False # Client not found or XCLIENTES not available
-        else:
-            return False # Client not found or XCLIENTES not available
-    except pyodbc.Error as e:
-        messagebox.showerror("Database Error", f"An error occurred during deletion: {e}")
+        before_data, _ = backend.delete_client(conn, get_client_statements(), lookups)
+        conn.commit()
+
+        if before_data is None:
+            return None # Client not found
+        client_id = before_data.get("XCLIENTES")
+
+        log_operation("Delete", client_id, before_data=before_data)
+        _notify_mutation("delete", client_id, before=before_data)
+        return MutationResult(client_id, before=before_data)
+    except backend.errors as e:
+        conn.rollback()
+        call_on_ui(messagebox.showerror, "Database Error", f"An error occurred during deletion: {e}")
         return False
     finally:
         if conn:
             conn.close()
 
-def get_client_data(identifier):
+@tracked("resolve")
+def resolve_client(identifier):
     """
-    Fetches client data from the FBCLIENTES table based on XCLIENTES, CGC, RAZAO, or INSCRICAO.
-    Returns a dictionary of client data if found, None otherwise.
+    Resolve um identificador (XCLIENTES, CGC, RAZAO ou INSCRICAO) em uma única ida ao banco.
+    Retorna (dados_do_cliente, chave_que_casou) ou (None, None) se não encontrar.
+    Quando a busca de maior prioridade é por chave exata, o cache de clientes responde primeiro.
     """
+    lookups = plan_lookups(identifier, config_manager.CLIENT_FIELDS_CONFIG)
+    if not lookups:
+        return None, None
+
+    # Nome: um cliente com exatamente esse nome no índice de trigramas ganha do primeiro LIKE '%x%'
+    # que o servidor achar. Fora isso o LIKE continua valendo: o índice é aproximado e pode não ter
+    # nomes gravados por outras estações
+    if lookups[0][0] == MATCH_RAZAO and len(str(identifier).strip()) >= 3:
+        index = get_name_index()
+        if index is not None and index.ready:
+            for match in index.exact(identifier):
+                client_data, _ = _resolve_lookups([(MATCH_XCLIENTES, "XCLIENTES", "=", match.client_id)])
+                if client_data is not None and fold(client_data.get("RAZAO")) == fold(identifier):
+                    return client_data, MATCH_RAZAO
+
+    return _resolve_lookups(lookups)
+
+def _resolve_lookups(lookups):
+    # Só a primeira busca pode vir do cache: as seguintes dependem das anteriores não acharem nada
+    match_key, column, operator, param = lookups[0]
+    cacheable = operator == "=" and column in ("XCLIENTES",) + SECONDARY_KEYS and _client_cache.enabled
+    if cacheable:
+        cached = _client_cache.get(column, param)
+        if cached is not None:
+            return cached, match_key
+
+    # Com a cópia local pronta, buscas não vão ao servidor (só as mutações vão)
+    snapshot = get_snapshot()
+    if snapshot is not None and snapshot.ready:
+        return snapshot.resolve(lookups)
+
+    backend = get_backend()
     conn = connect_to_database()
     if conn is None:
-        return None
+        return None, None
 
     try:
-        cursor = conn.cursor()
-        client_row = None
-        
-        # Try to fetch by XCLIENTES
-        cursor.execute("SELECT * FROM SM11_PROD.dbo.FBCLIENTES WHERE XCLIENTES = ?", identifier)
-        client_row = cursor.fetchone()
-
-        if client_row is None:
-            # Try to fetch by CGC
-            cursor.execute("SELECT * FROM SM11_PROD.dbo.FBCLIENTES WHERE CGC = ?", identifier)
-            client_row = cursor.fetchone()
-
-        if client_row is None:
-            # Try to fetch by RAZAO (Name)
-            cursor.execute("SELECT * FROM SM11_PROD.dbo.FBCLIENTES WHERE RAZAO LIKE ?", f"%{identifier}%")
-            client_row = cursor.fetchone()
-
-        if client_row is None:
-            # Try to fetch by INSCRICAO
-            cursor.execute("SELECT * FROM SM11_PROD.dbo.FBCLIENTES WHERE INSCRICAO = ?", identifier)
-            client_row = cursor.fetchone()
-
-        if client_row:
-            columns = [column[0] for column in cursor.description]
-            return dict(zip(columns, client_row))
-        else:
-            return None
-    except pyodbc.Error as e:
-        messagebox.showerror("Database Error", f"An error occurred while fetching client data: {e}")
-        return None
+        client_data, match_key = backend.resolve_client(conn, get_client_statements(), lookups)
+        if client_data is not None and cacheable:
+            _client_cache.put(client_data)
+        return client_data, match_key
+    except backend.errors as e:
+        call_on_ui(messagebox.showerror, "Database Error", f"An error occurred while fetching client data: {e}")
+        return None, None
     finally:
         if conn:
             conn.close()
 
-def get_table_columns(table_name="FBCLIENTES"):
+@tracked("batch_resolve")
+def resolve_clients_batch(identifiers):
+    """
+    Resolve vários identificadores de uma vez. Todas as buscas de todos eles vão
+    para uma tabela temporária e são respondidas por uma única consulta com
+    junções; para cada identificador vale a busca de maior prioridade que casou.
+    Nomes vão pelo LIKE, nunca pelo índice de trigramas: o resultado alimenta o
+    delete em lote, e um nome só parecido apagaria outro cliente.
+    Retorna [(identificador, dados, match_key)] na ordem de entrada, sem repetidos
+    (dados None quando não encontrado; só as colunas da PROJECTION_LIST), ou None em caso de erro.
+    """
+    identifiers = list(dict.fromkeys(str(identifier).strip() for identifier in identifiers if str(identifier).strip()))
+
+    batch = []
+    for position, identifier in enumerate(identifiers):
+        for match_key, column, _, param in plan_lookups(identifier, config_manager.CLIENT_FIELDS_CONFIG):
+            batch.append((position, LOOKUP_ORDER.index(match_key), match_key, column, param))
+
+    rows = []
+    snapshot = get_snapshot()
+    if batch and snapshot is not None and snapshot.ready:
+        rows = snapshot.resolve_batch(batch)
+    elif batch:
+        backend = get_backend()
+        conn = connect_to_database()
+        if conn is None:
+            return None
+        try:
+            rows = backend.resolve_batch(conn, get_client_statements(), batch)
+        except backend.errors as e:
+            call_on_ui(messagebox.showerror, "Database Error", f"An error occurred while fetching client data: {e}")
+            return None
+        finally:
+            conn.rollback() # Só a tabela temporária foi escrita
+            conn.close()
+
+    best = {}
+    for position, priority, match_key, client_data in rows:
+        rank = (priority, str(client_data.get("XCLIENTES")))
+        if position not in best or rank < best[position][0]:
+            best[position] = (rank, client_data, match_key)
+    return [
+        (identifier,) + (best[position][1:] if position in best else (None, None))
+        for position, identifier in enumerate(identifiers)
+    ]
+
+@tracked("batch_delete")
+def delete_clients_batch(client_ids):
+    """
+    Apaga os XCLIENTES confirmados em uma única transação (tudo ou nada).
+    Retorna um MutationResult por cliente apagado (os que já não existiam ficam de fora),
+    ou False em caso de erro.
+    """
+    client_ids = list(dict.fromkeys(str(client_id).strip() for client_id in client_ids if str(client_id).strip()))
+    if not client_ids:
+        return []
+
+    backend = get_backend()
+    conn = connect_to_database(OP_WRITE)
+    if conn is None:
+        return False
+
+    try:
+        before_rows = backend.delete_batch(conn, get_client_statements(), client_ids)
+        conn.commit()
+    except backend.errors as e:
+        conn.rollback()
+        call_on_ui(messagebox.showerror, "Database Error", f"An error occurred during deletion: {e}")
+        return False
+    finally:
+        conn.close()
+
+    results = []
+    for before_data in before_rows:
+        client_id = before_data.get("XCLIENTES")
+        _notify_mutation("delete", client_id, before=before_data)
+        results.append(MutationResult(client_id, before=before_data))
+    # Um único registro para o lote, com a imagem de cada linha apagada (como no delete simples)
+    log_operation("Batch Delete", ", ".join(str(result.client_id) for result in results),
+                  before_data=[result.before for result in results])
+    return results
+
+@tracked("search")
+def search_clients(identifier, after_key=None, page_size=None):
+    """
+    Todos os clientes que casam com o identificador (XCLIENTES, CGC, RAZAO ou
+    INSCRICAO), em páginas ordenadas por XCLIENTES. Cada registro traz só as
+    colunas da projeção de lista (PROJECTION_LIST). Para nomes, com o índice de
+    nomes pronto, a primeira página começa pelos mais parecidos (search_client_names),
+    que acham também nomes digitados com erro; a lista não repete quem já mostrou.
+    Retorna (registros, próxima_chave); próxima_chave é None na última página.
+    """
+    lookups = plan_lookups(identifier, config_manager.CLIENT_FIELDS_CONFIG)
+    if not lookups:
+        return [], None
+    page_size = page_size or config_manager.APP_SETTINGS.get("SEARCH_PAGE_SIZE", 50)
+    columns = get_client_statements().projection(PROJECTION_LIST).columns
+
+    records = _search_page(columns, lookups, after_key, page_size + 1)
+    if records is None:
+        return [], None
+    # Uma linha a mais que a página indica que ainda há o que carregar
+    next_key = None
+    if len(records) > page_size:
+        records = records[:page_size]
+        next_key = records[-1]["XCLIENTES"]
+
+    if after_key is None and lookups[0][0] == MATCH_RAZAO:
+        ranked = _ranked_name_records(identifier, columns)
+        shown = {record["XCLIENTES"] for record in ranked}
+        records = ranked + [record for record in records if record["XCLIENTES"] not in shown]
+    return records, next_key
+
+def _search_page(columns, lookups, after_key, limit):
+    """Uma página do search_page, da cópia local se pronta, senão do servidor. None se falhou."""
+    snapshot = get_snapshot()
+    if snapshot is not None and snapshot.ready:
+        return snapshot.search_page(columns, lookups, after_key, limit)
+    backend = get_backend()
+    conn = connect_to_database()
+    if conn is None:
+        return None
+    try:
+        return backend.search_page(conn, columns, lookups, after_key, limit)
+    except backend.errors as e:
+        call_on_ui(messagebox.showerror, "Database Error", f"An error occurred while searching clients: {e}")
+        return None
+    finally:
+        conn.close()
+
+def _ranked_name_records(identifier, columns):
+    """Registros de lista dos nomes mais parecidos, na ordem do índice; quem não existe mais fica de fora."""
+    matches = search_client_names(identifier, config_manager.APP_SETTINGS.get("NAME_SEARCH_LIMIT", 10))
+    if not matches:
+        return []
+    key_lookups = [(MATCH_XCLIENTES, "XCLIENTES", "=", match.client_id) for match in matches]
+    records = _search_page(columns, key_lookups, None, len(matches)) or []
+    by_key = {str(record["XCLIENTES"]).strip(): record for record in records}
+    return [by_key[match.client_id] for match in matches if match.client_id in by_key]
+
+def get_client_data(identifier):
+    """
+    Fetches client data from the FBCLIENTES table based on XCLIENTES, CGC, RAZAO, or INSCRICAO.
+    Returns a dictionary of client data if found, None otherwise.
+    """
+    client_data, _ = resolve_client(identifier)
+    return client_data
+
+@tracked("table_columns")
+def get_table_columns(table_name=SCHEMA_TABLE):
     """Fetches column names from the specified table in the database."""
+    schema = get_table_schema() if table_name == SCHEMA_TABLE else None
+    if schema is not None:
+        return list(schema.column_names) # Já carregado nesta sessão: sem ida ao banco
+
+    backend = get_backend()
     conn = connect_to_database()
     if conn is None:
         return []
     try:
-        cursor = conn.cursor()
-        cursor.execute(f"SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME = '{table_name}' AND TABLE_SCHEMA = 'dbo'")
-        columns = [row[0] for row in cursor.fetchall()]
-        return columns
-    except pyodbc.Error as e:
-        messagebox.showerror("Database Error", f"Error fetching table columns: {e}")
+        return backend.table_columns(conn, table_name)
+    except backend.errors as e:
+        call_on_ui(messagebox.showerror, "Database Error", f"Error fetching table columns: {e}")
         return []
     finally:
         if conn:
             conn.close()
+
+class ReplayReport:
+    """Resultado de um reenvio do diário offline: quantas entradas gravadas, em conflito, com falha e em quantas transações."""
+
+    def __init__(self):
+        self.done = 0
+        self.conflicts = 0
+        self.failed = 0
+        self.transactions = 0
+        self.stopped = None # Motivo quando o reenvio parou no meio (banco caiu de novo)
+
+    def __repr__(self):
+        return (f"ReplayReport(done={self.done}, conflicts={self.conflicts}, failed={self.failed}, "
+                f"transactions={self.transactions}, stopped={self.stopped!r})")
+
+def _matches_by_name(lookups):
+    """True se o identificador pode casar pelo nome (LIKE), não só por chave exata."""
+    return any(operator != "=" for _, _, operator, _ in lookups)
+
+def _replay_entries(conn, backend, statements, entries, blocked):
+    """
+    Aplica as entradas na transação aberta, na ordem, conferindo cada uma contra a
+    imagem atual da linha (travada). Retorna [(entrada, status, erro, mutação)];
+    status None deixa a entrada pendente (cliente parado por um conflito anterior).
+    """
+    column_of = dict(zip(statements.insert_names, statements.insert_columns))
+    for entry in entries:
+        if entry.operation == JOURNAL_DELETE and entry.client_id is None:
+            # Só por chave exata: um LIKE no reenvio poderia achar outro cliente
+            lookups = plan_lookups(entry.data.get("identifier", ""), config_manager.CLIENT_FIELDS_CONFIG)
+            exact = lookups and not _matches_by_name(lookups)
+            found, _ = backend.resolve_client(conn, statements, lookups) if exact else (None, None)
+            entry.client_id = str(found["XCLIENTES"]) if found else None
+        elif entry.operation == JOURNAL_INSERT and entry.client_id is None:
+            from utils.id_allocator import get_xclientes_allocator
+            # Reservado na conexão do reenvio: não pega outra do pool (que pode ser de tamanho 1) no meio da transação
+            entry.client_id = str(get_xclientes_allocator().reserve_block(1, conn)[0])
+            entry.data["XCLIENTES"] = entry.client_id
+
+    current = backend.fetch_for_update(conn, statements, list(dict.fromkeys(
+        entry.client_id for entry in entries if entry.client_id is not None)))
+    outcomes = []
+    for entry in entries:
+        key = entry.client_id
+        if key in blocked:
+            outcomes.append((entry, None, None, None))
+            continue
+        before = current.get(key)
+        reason = find_conflict(entry, before, column_of) if key is not None else "client not found"
+        if reason:
+            if key is not None:
+                blocked.add(key)
+            outcomes.append((entry, STATUS_CONFLICT, reason, None))
+            continue
+
+        cursor = conn.cursor()
+        if entry.operation == JOURNAL_INSERT:
+            values = statements.bulk_insert_values(entry.data)
+            cursor.execute(statements.bulk_insert_sql, values)
+            after = statements.row_to_dict(values)
+            mutation = ("insert", None, after)
+        elif entry.operation == JOURNAL_UPDATE:
+            names = statements.changed_fields(entry.data, before)
+            after = dict(before)
+            if names:
+                sql, names = statements.update_by_key(names)
+                cursor.execute(sql, tuple(entry.data.get(name) for name in names) + (key,))
+                after.update({column_of[name]: entry.data.get(name) for name in names})
+            mutation = ("update", before, after) if names else None
+        else:
+            cursor.execute(statements.delete_by_key_sql, (key,))
+            after = None
+            mutation = ("delete", before, None)
+        current[key] = after
+        outcomes.append((entry, STATUS_DONE, None, mutation))
+    return outcomes
+
+def _connection_alive(conn, backend):
+    try:
+        conn.cursor().execute(backend.ping_query).fetchall()
+        return True
+    except backend.errors:
+        return False
+
+@tracked("journal_replay")
+def replay_write_journal():
+    """
+    Reenvia as escritas pendentes do diário offline, em ordem, em transações de
+    até WRITE_JOURNAL_BATCH_SIZE entradas. Entradas em conflito com a linha atual
+    ficam marcadas para o operador e seguram as seguintes do mesmo cliente. Se uma
+    transação falhar, as entradas dela são reenviadas uma a uma para isolar a culpada.
+    Retorna um ReplayReport, ou None se o diário estiver desligado ou já reenviando.
+    """
+    journal = get_write_journal()
+    if journal is None or not _replay_lock.acquire(blocking=False):
+        return None
+    report = ReplayReport()
+    try:
+        entries = journal.replayable()
+        if not entries:
+            return report
+        backend = get_backend()
+        statements = get_client_statements()
+        try:
+            conn = acquire_connection(OP_WRITE)
+        except (CircuitOpenError, PoolTimeout) + backend.errors as e:
+            report.stopped = str(e)
+            return report
+
+        batch_size = max(1, int(journal_settings(config_manager.APP_SETTINGS)["batch_size"]))
+        # Clientes com entrada parada (conflito/falha): vale também para as resolvidas só agora (delete por CGC etc.)
+        blocked = {entry.client_id for entry in journal.entries((STATUS_CONFLICT, STATUS_FAILED))
+                   if entry.client_id is not None}
+        pending_batches = [entries[i:i + batch_size] for i in range(0, len(entries), batch_size)]
+        try:
+            while pending_batches:
+                batch = pending_batches.pop(0)
+                attempt_blocked = set(blocked) # Só vale se a transação for gravada
+                # Ids reservados/resolvidos na transação somem com o rollback: a entrada volta sem eles
+                unresolved = [(entry, entry.data.get("XCLIENTES")) for entry in batch if entry.client_id is None]
+                try:
+                    outcomes = _replay_entries(conn, backend, statements, batch, attempt_blocked)
+                    conn.commit()
+                    report.transactions += 1
+                    blocked = attempt_blocked
+                except backend.errors as e:
+                    conn.rollback()
+                    for entry, xclientes in unresolved:
+                        entry.client_id = None
+                        if entry.operation == JOURNAL_INSERT:
+                            entry.data["XCLIENTES"] = xclientes
+                    if not _connection_alive(conn, backend):
+                        report.stopped = str(e) # Caiu de novo: o resto continua pendente
+                        break
+                    if len(batch) > 1:
+                        pending_batches[:0] = [[entry] for entry in batch]
+                        continue
+                    outcomes = [(batch[0], STATUS_FAILED, str(e), None)]
+                    if batch[0].client_id is not None:
+                        blocked.add(batch[0].client_id)
+
+                for entry, status, error, mutation in outcomes:
+                    if status is None:
+                        continue
+                    journal.mark(entry.id, status, error, client_id=entry.client_id)
+                    if status == STATUS_DONE:
+                        report.done += 1
+                        if mutation is not None:
+                            operation, before, after = mutation
+                            log_operation(f"Journal Replay ({operation})", entry.client_id, before_data=before, after_data=after)
+                            _notify_mutation(operation, entry.client_id, before=before, after=after)
+                    elif status == STATUS_CONFLICT:
+                        report.conflicts += 1
+                    else:
+                        report.failed += 1
+        finally:
+            conn.close()
+        if report.done:
+            journal.purge_done()
+        return report
+    finally:
+        _replay_lock.release()
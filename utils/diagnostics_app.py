@@ -0,0 +1,81 @@
+from datetime import datetime
+from utils.db_operations import get_metrics, get_pool_stats, get_cache_stats
+from utils.diagnostics_gui import DiagnosticsGUI
+from utils.cep_integration import get_cep_cache_stats, get_cep_client, get_offline_cep_database
+
+REFRESH_INTERVAL_MS = 1000
+
+class DiagnosticsApp(DiagnosticsGUI):
+    def __init__(self, master=None):
+        super().__init__(master)
+        self._refresh_job = None
+        self.refresh()
+
+    def refresh(self):
+        """Redesenha os números ao vivo, a cada REFRESH_INTERVAL_MS enquanto a janela estiver aberta."""
+        self.display_stats(self.format_stats())
+        self._refresh_job = self.after(REFRESH_INTERVAL_MS, self.refresh)
+
+    def destroy(self):
+        # Sem isso o after seguiria chamando refresh numa janela já destruída
+        if self._refresh_job is not None:
+            self.after_cancel(self._refresh_job)
+            self._refresh_job = None
+        super().destroy()
+
+    def reset_metrics(self):
+        get_metrics().clear()
+        self.display_stats(self.format_stats())
+
+    def format_stats(self):
+        metrics = get_metrics()
+        summary = metrics.summary()
+        lines = [f"Operations (last {sum(row['count'] for row in summary.values())} samples, ms)"]
+        lines.append(f"{'kind':<14}{'count':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"
+                     f"{'connect':>9}{'exec':>9}{'fetch':>9}{'rows':>8}{'bytes':>9}{'trips':>7}{'errors':>7}")
+        for kind, row in summary.items():
+            lines.append(
+                f"{kind:<14}{row['count']:>7}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['max_ms']:>9.1f}"
+                f"{row['avg_connect_ms']:>9.1f}{row['avg_execute_ms']:>9.1f}{row['avg_fetch_ms']:>9.1f}"
+                f"{row['avg_rows']:>8.1f}{row['avg_bytes']:>9.0f}{row['avg_round_trips']:>7.1f}{row['errors']:>7}"
+            )
+        lines.append(f"Slow operations (>= {metrics.slow_threshold_ms} ms): {metrics.slow_count}, logged to {metrics.slow_log_path}")
+
+        lines.append("")
+        lines.append("Recent actions")
+        for action in metrics.recent_actions():
+            started = datetime.fromtimestamp(action.started_at).strftime("%H:%M:%S")
+            lines.append(f"{started}  {action.name:<45}{action.total_ms:>9.1f} ms  {action.round_trips:>3} round trips  "
+                         f"{action.rows:>5} rows  {action.bytes:>8} bytes")
+
+        pool = get_pool_stats()
+        cache = get_cache_stats()
+        lines.append("")
+        lines.append(f"Connection pool: {pool['in_use']} in use, {pool['idle']} idle, max {pool['max_size']}, "
+                     f"{pool['creates']} logins, {pool['waits']} waits")
+        lines.append(f"Client cache: {cache['entries']} entries, {cache['hits']} hits, {cache['misses']} misses "
+                     f"(hit ratio {cache['hit_ratio']:.0%})")
+        cep = get_cep_cache_stats()
+        lines.append(f"CEP cache: {cep['memory_entries']} in memory, {cep['disk_entries']} on disk, "
+                     f"{cep['memory_hits']} memory hits, {cep['disk_hits']} disk hits ({cep['negative_hits']} not found), "
+                     f"{cep['misses']} misses (hit ratio {cep['hit_ratio']:.0%})")
+        client = get_cep_client().stats()
+        lines.append(f"CEP client: {client['requests']} requests, {client['retries']} retries, {client['failures']} failures, "
+                     f"{client['rejected']} rejected (queue full), {client['coalesced']} coalesced, {client['skipped']} superseded, {client['queued']} queued, {client['workers']} workers")
+        offline = get_offline_cep_database()
+        if offline is not None:
+            offline_stats = offline.stats()
+            lines.append(f"Offline CEP database: {offline_stats['records']} CEPs, {offline_stats['hits']} hits "
+                         f"in {offline_stats['lookups']} lookups ({offline_stats['path']})")
+        for source, latency in cep["latency"].items():
+            if latency["count"]:
+                lines.append(f"  CEP lookups from {source:<8}{latency['count']:>6}  p50 {latency['p50_ms']:>8.2f} ms  "
+                             f"p95 {latency['p95_ms']:>8.2f} ms")
+        return "\n".join(lines)
+
+if __name__ == "__main__":
+    import customtkinter as ctk
+    root = ctk.CTk()
+    root.withdraw() # Hide the main root window
+    app = DiagnosticsApp(root)
+    root.mainloop()
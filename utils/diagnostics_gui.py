@@ -0,0 +1,46 @@
+import customtkinter as ctk
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.centerWindow import centerWindow
+from utils.config_manager import APP_SETTINGS
+
+class DiagnosticsGUI(ctk.CTkToplevel):
+    def __init__(self, master=None):
+        super().__init__(master)
+        self.title("Database Diagnostics")
+        self.geometry(centerWindow.center_window(self, master, APP_SETTINGS["APP_WIDTH"], APP_SETTINGS["APP_HEIGHT"]))
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        self.create_widgets()
+
+    def create_widgets(self):
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+
+        # Texto em fonte monoespaçada para as colunas alinharem
+        self.stats_textbox = ctk.CTkTextbox(self, wrap="none", state="disabled", font=("Courier New", 12))
+        self.stats_textbox.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
+
+        button_frame = ctk.CTkFrame(self)
+        button_frame.grid(row=1, column=0, padx=10, pady=(0, 10), sticky="ew")
+        button_frame.columnconfigure(0, weight=1)
+        button_frame.columnconfigure(1, weight=1)
+
+        btn_reset = ctk.CTkButton(button_frame, text="Reset", command=self.reset_metrics)
+        btn_reset.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
+
+        btn_close = ctk.CTkButton(button_frame, text="Close", command=self.on_close)
+        btn_close.grid(row=0, column=1, padx=10, pady=10, sticky="nsew")
+
+    def display_stats(self, text):
+        self.stats_textbox.configure(state="normal")
+        self.stats_textbox.delete("1.0", "end")
+        self.stats_textbox.insert("1.0", text)
+        self.stats_textbox.configure(state="disabled")
+
+    def on_close(self):
+        self.destroy()
@@ -0,0 +1,182 @@
+import sqlite3
+import threading
+
+DEFAULT_BLOCK_SIZE = 20
+
+class SqlServerIdStore:
+    """
+    Contador de ids em uma tabela do SQL Server (uma linha por sequência).
+    Cada reserve() incrementa o contador de forma atômica (UPDLOCK/HOLDLOCK) e
+    devolve o primeiro id do bloco. Na primeira vez a sequência é semeada com o
+    maior XCLIENTES existente.
+    """
+
+    def __init__(self, connect, counter_table, client_table):
+        self._connect = connect
+        self.counter_table = counter_table
+        self.client_table = client_table
+        self._schema_checked = False
+
+    def ensure_schema(self, cursor):
+        if self._schema_checked:
+            return
+        cursor.execute(f'''
+        IF OBJECT_ID(N'{self.counter_table}', N'U') IS NULL
+            CREATE TABLE {self.counter_table} (
+                NAME VARCHAR(50) NOT NULL PRIMARY KEY,
+                NEXT_VALUE BIGINT NOT NULL
+            );
+        ''')
+        self._schema_checked = True
+
+    def reserve(self, name, count, conn=None):
+        """
+        Primeiro id de um bloco de `count`. Com `conn`, roda na conexão (e na
+        transação) de quem chama, que faz o commit; senão empresta uma do pool.
+        """
+        own = conn is None
+        if own:
+            conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            self.ensure_schema(cursor)
+            cursor.execute(f'''
+            SET NOCOUNT ON;
+            DECLARE @next BIGINT;
+
+            UPDATE {self.counter_table} WITH (UPDLOCK, HOLDLOCK)
+            SET @next = NEXT_VALUE = NEXT_VALUE + ?
+            WHERE NAME = ?;
+
+            IF @next IS NULL
+                BEGIN
+                    -- Primeira reserva: semeia a partir do maior XCLIENTES já existente
+                    SELECT @next = ISNULL(MAX(TRY_CAST(XCLIENTES AS BIGINT)), 0) + 1 + ?
+                    FROM {self.client_table} WITH (TABLOCK, HOLDLOCK);
+                    INSERT INTO {self.counter_table} (NAME, NEXT_VALUE) VALUES (?, @next);
+                END
+
+            SELECT @next - ? AS FirstId;
+            ''', (count, name, count, name, count))
+            first = int(cursor.fetchone()[0])
+            if own:
+                conn.commit()
+            return first
+        except Exception:
+            if own:
+                conn.rollback()
+            raise
+        finally:
+            if own:
+                conn.close()
+
+class SqliteIdStore:
+    """
+    Equivalente em SQLite do SqlServerIdStore, para testes e uso offline.
+    Com client_table, a primeira reserva é semeada com o maior XCLIENTES da tabela.
+    """
+
+    def __init__(self, path, seed=1, client_table=None):
+        self.path = path
+        self.seed = seed
+        self.client_table = client_table
+        conn = self._open()
+        try:
+            conn.execute("CREATE TABLE IF NOT EXISTS id_counters (name TEXT PRIMARY KEY, next_value INTEGER NOT NULL)")
+        finally:
+            conn.close()
+
+    def _open(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def _initial_value(self, cursor):
+        if self.client_table is None:
+            return self.seed
+        row = cursor.execute(f"SELECT MAX(CAST(XCLIENTES AS INTEGER)) FROM {self.client_table}").fetchone()
+        return max(self.seed, (row[0] or 0) + 1)
+
+    def reserve(self, name, count, conn=None):
+        if conn is not None:
+            return self._reserve_on(conn.cursor(), name, count)
+        conn = self._open()
+        try:
+            # BEGIN IMMEDIATE pega o lock de escrita antes da leitura: nenhum outro processo intercala
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT next_value FROM id_counters WHERE name = ?", (name,)).fetchone()
+            first = row[0] if row else self._initial_value(conn)
+            conn.execute("INSERT OR REPLACE INTO id_counters (name, next_value) VALUES (?, ?)", (name, first + count))
+            conn.execute("COMMIT")
+            return first
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _reserve_on(self, cursor, name, count):
+        # Na conexão de quem chama (mesmo arquivo): o UPDATE abre a transação e pega o lock de escrita antes da leitura
+        cursor.execute("UPDATE id_counters SET next_value = next_value + ? WHERE name = ?", (count, name))
+        if cursor.rowcount:
+            return cursor.execute("SELECT next_value FROM id_counters WHERE name = ?", (name,)).fetchone()[0] - count
+        first = self._initial_value(cursor)
+        cursor.execute("INSERT INTO id_counters (name, next_value) VALUES (?, ?)", (name, first + count))
+        return first
+
+class IdAllocator:
+    """
+    Entrega ids únicos reservando blocos no store e servindo-os localmente.
+    Ids de um bloco não usados até o fim do processo são perdidos (ficam buracos),
+    mas nunca são entregues duas vezes.
+    """
+
+    def __init__(self, store, name="XCLIENTES", block_size=DEFAULT_BLOCK_SIZE):
+        self.store = store
+        self.name = name
+        self.block_size = max(1, int(block_size))
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+
+    def next_id(self):
+        with self._lock:
+            if self._next >= self._end:
+                first = self.store.reserve(self.name, self.block_size)
+                self._next, self._end = first, first + self.block_size
+            value = self._next
+            self._next += 1
+        return str(value)
+
+    def reserve_block(self, count, conn=None):
+        """
+        Modo em lote: reserva `count` ids consecutivos direto no store. Com `conn`,
+        a reserva vai na transação dessa conexão (sem emprestar outra do pool) e só
+        vale depois do commit de quem chama; num rollback os ids voltam ao contador.
+        """
+        if count <= 0:
+            return []
+        first = self.store.reserve(self.name, count, conn)
+        return [str(first + offset) for offset in range(count)]
+
+_allocator = None
+_allocator_lock = threading.Lock()
+
+def get_xclientes_allocator():
+    """Alocador de XCLIENTES compartilhado pelo processo."""
+    global _allocator
+    with _allocator_lock:
+        if _allocator is None:
+            from utils.config_manager import ConfigManager
+            from utils.db_health import OP_WRITE
+            from utils.db_operations import get_backend, acquire_connection
+
+            store = get_backend().id_store(lambda: acquire_connection(OP_WRITE))
+            block_size = ConfigManager().APP_SETTINGS.get("XCLIENTES_BLOCK_SIZE", DEFAULT_BLOCK_SIZE)
+            _allocator = IdAllocator(store, "XCLIENTES", block_size)
+        return _allocator
+
+def reset_xclientes_allocator():
+    """Descarta o alocador compartilhado (ex.: o backend mudou); o próximo uso cria outro."""
+    global _allocator
+    with _allocator_lock:
+        _allocator = None
@@ -0,0 +1,148 @@
+import re
+
+# Ordem de prioridade da busca: XCLIENTES > CGC > RAZAO > INSCRICAO
+MATCH_XCLIENTES = "XCLIENTES"
+MATCH_CGC = "CGC"
+MATCH_RAZAO = "RAZAO"
+MATCH_INSCRICAO = "INSCRICAO"
+
+SHAPE_DIGITS = "digits"
+SHAPE_CNPJ = "cnpj"
+SHAPE_DOCUMENT = "document"
+SHAPE_TEXT = "text"
+
+CNPJ_PATTERN = re.compile(r"\d{2}\.\d{3}\.\d{3}/\d{4}-\d{2}")
+DOCUMENT_PATTERN = re.compile(r"[\d./\-\s]+")
+
+# Quais buscas fazem sentido para cada formato de identificador.
+# Nomes (RAZAO) formados só por dígitos e pontuação não existem na prática,
+# então a busca por LIKE (scan completo) só roda para texto livre.
+LOOKUPS_BY_SHAPE = {
+    SHAPE_DIGITS: (MATCH_XCLIENTES, MATCH_CGC, MATCH_INSCRICAO),
+    SHAPE_CNPJ: (MATCH_CGC,),
+    SHAPE_DOCUMENT: (MATCH_CGC, MATCH_INSCRICAO),
+    SHAPE_TEXT: (MATCH_RAZAO, MATCH_INSCRICAO),
+}
+
+LOOKUP_ORDER = (MATCH_XCLIENTES, MATCH_CGC, MATCH_RAZAO, MATCH_INSCRICAO)
+
+# Junções da busca em lote: coluna da FBCLIENTES e operador usado contra o valor da tabela temporária
+BATCH_JOINS = ((MATCH_XCLIENTES, "="), (MATCH_CGC, "="), (MATCH_INSCRICAO, "="), (MATCH_RAZAO, "LIKE"))
+DEFAULT_KEY_LENGTH = 100 # Tamanho de XCLIENTES (e das colunas temporárias) quando nem o banco nem a configuração dizem
+BATCH_SEPARATORS = re.compile(r"[\n\r\t;]+") # Vírgula não separa: aparece em razões sociais
+
+def detect_identifier_shape(identifier):
+    """Classifica o identificador: só dígitos, CNPJ formatado, documento com pontuação ou texto livre."""
+    value = str(identifier).strip()
+    if value.isdigit():
+        return SHAPE_DIGITS
+    if CNPJ_PATTERN.fullmatch(value):
+        return SHAPE_CNPJ
+    if DOCUMENT_PATTERN.fullmatch(value):
+        return SHAPE_DOCUMENT
+    return SHAPE_TEXT
+
+def _column_max_lengths(fields_config):
+    return {field["db_column"]: field.get("max_length") for field in fields_config}
+
+def plan_lookups(identifier, fields_config):
+    """
+    Retorna a lista de buscas (match_key, coluna, operador, parâmetro) que podem
+    encontrar o identificador, na ordem de prioridade.
+    Buscas por igualdade são puladas quando o valor não cabe na coluna.
+    """
+    value = str(identifier).strip()
+    if not value:
+        return []
+    allowed = LOOKUPS_BY_SHAPE[detect_identifier_shape(value)]
+    max_lengths = _column_max_lengths(fields_config)
+
+    lookups = []
+    for match_key in LOOKUP_ORDER:
+        if match_key not in allowed:
+            continue
+        if match_key == MATCH_RAZAO:
+            lookups.append((match_key, "RAZAO", "LIKE", f"%{value}%"))
+            continue
+        max_length = max_lengths.get(match_key)
+        if max_length and len(value) > max_length:
+            continue
+        lookups.append((match_key, match_key, "=", value))
+    return lookups
+
+def parse_identifiers(text):
+    """Identificadores de uma lista colada (um por linha ou separados por ponto e vírgula), sem repetidos."""
+    return list(dict.fromkeys(value.strip() for value in BATCH_SEPARATORS.split(text or "") if value.strip()))
+
+def build_batch_resolve_sql(table, lookup_table, projection):
+    """
+    Junta a tabela temporária de buscas (POS, PRIO, MATCH_KEY, COL, VAL) com a de
+    clientes, uma junção por coluna, em uma única consulta. Cada linha traz
+    POS, PRIO e MATCH_KEY da busca que casou seguidos da projeção do cliente
+    (colunas com o alias "c.", ver statement_cache.Projection).
+    """
+    parts = [
+        f"SELECT b.POS, b.PRIO, b.MATCH_KEY, {projection} FROM {lookup_table} b "
+        f"JOIN {table} c ON c.{column} {operator} b.VAL WHERE b.COL = '{column}'"
+        for column, operator in BATCH_JOINS
+    ]
+    return "\nUNION ALL\n".join(parts)
+
+def _resolver_prelude(lookups, table, key_length):
+    """
+    Instruções que preenchem @key (XCLIENTES) e @match com a primeira busca que encontrar.
+    @key é VARCHAR do tamanho da coluna: NVARCHAR faria o SQL Server converter a coluna
+    (não a variável) em c.XCLIENTES = @key, e o seek na chave viraria scan.
+    """
+    statements = [
+        "SET NOCOUNT ON;",
+        f"DECLARE @key VARCHAR({int(key_length)}) = NULL, @match VARCHAR(20) = NULL;",
+    ]
+    for idx, (match_key, column, operator, _) in enumerate(lookups):
+        guard = "" if idx == 0 else "IF @key IS NULL "
+        statements.append(
+            f"{guard}SELECT TOP 1 @key = XCLIENTES, @match = '{match_key}' FROM {table} WHERE {column} {operator} ?;"
+        )
+    return statements
+
+def build_resolver_sql(lookups, table, projection, key_length=DEFAULT_KEY_LENGTH):
+    """
+    Monta um único lote T-SQL que testa as buscas em ordem e para na primeira
+    que encontrar um cliente, devolvendo a linha e a chave que casou (MATCH_KEY).
+    """
+    statements = _resolver_prelude(lookups, table, key_length)
+    statements.append(
+        f"SELECT @match AS MATCH_KEY, {projection} FROM {table} c WHERE @key IS NOT NULL AND c.XCLIENTES = @key;"
+    )
+    return "\n".join(statements)
+
+def build_search_page_sql(lookups, table, columns, after_key=None, limit=50, limit_style="top"):
+    """
+    Página de todos os clientes que casam com qualquer uma das buscas, em ordem
+    de XCLIENTES, começando depois de after_key (paginação por chave, sem OFFSET).
+    limit_style "top" usa TOP (n) (SQL Server); "limit" usa LIMIT n (SQLite).
+    Retorna (sql, parâmetros).
+    """
+    conditions = " OR ".join(f"{column} {operator} ?" for _, column, operator, _ in lookups)
+    params = [lookup[3] for lookup in lookups]
+    top = f"TOP ({int(limit)}) " if limit_style == "top" else ""
+    sql = f"SELECT {top}{', '.join(columns)} FROM {table} WHERE ({conditions})"
+    if after_key is not None:
+        sql += " AND XCLIENTES > ?"
+        params.append(after_key)
+    sql += " ORDER BY XCLIENTES"
+    if limit_style == "limit":
+        sql += f" LIMIT {int(limit)}"
+    return sql, params
+
+def build_resolve_and_delete_sql(lookups, table, projection, key_length=DEFAULT_KEY_LENGTH):
+    """
+    Resolve o identificador, devolve a imagem da linha (travada com UPDLOCK) e a
+    apaga, tudo no mesmo lote. Retorna a linha com MATCH_KEY, ou nada se não encontrar.
+    """
+    statements = _resolver_prelude(lookups, table, key_length)
+    statements.append(
+        f"SELECT @match AS MATCH_KEY, {projection} FROM {table} c WITH (UPDLOCK, HOLDLOCK) WHERE @key IS NOT NULL AND c.XCLIENTES = @key;"
+    )
+    statements.append(f"DELETE FROM {table} WHERE @key IS NOT NULL AND XCLIENTES = @key;")
+    return "\n".join(statements)
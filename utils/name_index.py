@@ -0,0 +1,181 @@
+import heapq
+import threading
+import unicodedata
+from array import array
+
+DEFAULT_LIMIT = 10
+DEFAULT_MIN_SCORE = 0.4
+MAX_CANDIDATES = 2000
+RARE_TRIGRAM_FRACTION = 0.05 # Trigramas em mais de 5% dos nomes ("LTD", "COM") não geram candidatos sozinhos
+
+def fold(text):
+    """Remove acentos, passa para minúsculas e troca pontuação por espaço."""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+    return " ".join("".join(ch if ch.isalnum() else " " for ch in stripped).split())
+
+def trigrams(folded):
+    """Trigramas de cada palavra, com dois espaços antes e um depois (como o pg_trgm)."""
+    grams = set()
+    for word in folded.split():
+        padded = f"  {word} "
+        for idx in range(len(padded) - 2):
+            grams.add(padded[idx:idx + 3])
+    return grams
+
+class NameMatch:
+    __slots__ = ("client_id", "name", "score")
+
+    def __init__(self, client_id, name, score):
+        self.client_id = client_id
+        self.name = name
+        self.score = score
+
+    def __repr__(self):
+        return f"NameMatch({self.client_id!r}, {self.name!r}, {self.score:.2f})"
+
+class NameIndex:
+    """
+    Índice invertido de trigramas sobre RAZAO. Cada trigrama aponta para um
+    array('I') de ids internos de documento (crescentes, só com append).
+    Alterações marcam o documento antigo como removido e acrescentam um novo;
+    quando os removidos passam de 1/4 do total o índice é compactado.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+        self._pending = None # Mutações recebidas durante o build(), reaplicadas no fim
+        self.ready = False
+
+    def _reset(self):
+        self._postings = {} # trigrama -> array('I') de ids de documento
+        self._keys = [] # id -> XCLIENTES (None quando removido)
+        self._names = [] # id -> RAZAO original
+        self._doc_of = {} # XCLIENTES -> id
+        self._dead = 0
+
+    def __len__(self):
+        return len(self._doc_of)
+
+    def build(self, rows):
+        """Recria o índice a partir de (XCLIENTES, RAZAO)."""
+        with self._lock:
+            self._pending = []
+        rows = list(rows) # Lido fora do lock: buscas continuam respondendo com o índice anterior
+        with self._lock:
+            self._reset()
+            for client_id, name in rows:
+                self._add(client_id, name)
+            pending, self._pending = self._pending, None
+            for mutation in pending:
+                self.apply_mutation(*mutation)
+            self.ready = True
+
+    def add(self, client_id, name):
+        """Insere ou substitui o nome de um cliente."""
+        with self._lock:
+            self._add(client_id, name)
+            self._maybe_compact()
+
+    def remove(self, client_id):
+        with self._lock:
+            self._remove(str(client_id).strip())
+            self._maybe_compact()
+
+    def _add(self, client_id, name):
+        client_id = str(client_id).strip()
+        self._remove(client_id)
+        doc = len(self._keys)
+        self._keys.append(client_id)
+        self._names.append(name or "")
+        self._doc_of[client_id] = doc
+        for gram in trigrams(fold(name)):
+            posting = self._postings.get(gram)
+            if posting is None:
+                posting = self._postings[gram] = array("I")
+            posting.append(doc)
+
+    def _remove(self, client_id):
+        doc = self._doc_of.pop(client_id, None)
+        if doc is not None:
+            self._keys[doc] = None
+            self._dead += 1
+
+    def _maybe_compact(self):
+        if self._dead > 1000 and self._dead * 4 > len(self._keys):
+            live = [(key, self._names[doc]) for doc, key in enumerate(self._keys) if key is not None]
+            ready = self.ready
+            self._reset()
+            for client_id, name in live:
+                self._add(client_id, name)
+            self.ready = ready
+
+    def search(self, query, limit=DEFAULT_LIMIT, min_score=DEFAULT_MIN_SCORE):
+        """
+        Os `limit` nomes mais parecidos com a consulta, do melhor para o pior.
+        O score combina a fração dos trigramas da consulta presentes no nome
+        (palavras parciais) com a similaridade de Jaccard (nomes mais curtos
+        primeiro); nomes que contêm a consulta inteira sempre entram.
+        """
+        folded_query = fold(query)
+        query_grams = trigrams(folded_query)
+        if not query_grams:
+            return []
+
+        with self._lock:
+            postings = sorted((self._postings.get(gram, ()) for gram in query_grams), key=len)
+            rare_limit = max(1, int(len(self._keys) * RARE_TRIGRAM_FRACTION))
+            counts = {}
+            for idx, posting in enumerate(postings):
+                # Os trigramas raros geram os candidatos; os comuns só contam para quem já é candidato
+                if idx >= 3 and len(posting) > rare_limit:
+                    break
+                for doc in posting:
+                    counts[doc] = counts.get(doc, 0) + 1
+
+            candidates = heapq.nlargest(MAX_CANDIDATES, counts.items(), key=lambda item: item[1])
+            scored = []
+            for doc, _ in candidates:
+                client_id = self._keys[doc]
+                if client_id is None:
+                    continue
+                name = self._names[doc]
+                folded_name = fold(name)
+                name_grams = trigrams(folded_name)
+                shared = len(query_grams & name_grams)
+                score = 0.8 * shared / len(query_grams) + 0.2 * shared / len(query_grams | name_grams)
+                if folded_query in folded_name:
+                    score = max(score, 0.9 + 0.1 * len(folded_query) / max(1, len(folded_name)))
+                if score >= min_score:
+                    scored.append(NameMatch(client_id, name, score))
+
+        return heapq.nlargest(limit, scored, key=lambda match: match.score)
+
+    def exact(self, query, limit=DEFAULT_LIMIT):
+        """Os nomes iguais à consulta depois de fold() (sem acentos, maiúsculas e pontuação)."""
+        folded_query = fold(query)
+        return [match for match in self.search(query, limit) if fold(match.name) == folded_query]
+
+    def apply_mutation(self, operation, client_id, before, after):
+        """Listener de mutações do db_operations."""
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((operation, client_id, before, after))
+        if operation == "delete":
+            self.remove(client_id)
+        elif after and "RAZAO" in after:
+            self.add(client_id, after.get("RAZAO"))
+
+    def stats(self):
+        with self._lock:
+            posting_bytes = sum(posting.itemsize * len(posting) for posting in self._postings.values())
+            return {
+                "ready": self.ready,
+                "documents": len(self._doc_of),
+                "removed": self._dead,
+                "trigrams": len(self._postings),
+                "posting_bytes": posting_bytes,
+            }
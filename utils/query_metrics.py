@@ -0,0 +1,335 @@
+import functools
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+from utils.logger import LOG_DIR
+
+DEFAULT_BUFFER_SIZE = 1000
+DEFAULT_SLOW_THRESHOLD_MS = 500
+SLOW_QUERY_LOG_FILE = os.path.join(LOG_DIR, "slow_queries.log")
+PERCENTILES = (50, 95, 99)
+MAX_SAMPLE_STATEMENTS = 5
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+
+def sql_fingerprint(sql):
+    """Texto do SQL sem valores: espaços colapsados e literais de texto trocados por ?. Os parâmetros nunca entram."""
+    if not isinstance(sql, str):
+        return None
+    return _WHITESPACE.sub(" ", _STRING_LITERAL.sub("?", sql)).strip()
+
+def _row_bytes(row):
+    """Tamanho aproximado de uma linha: texto/binário pelo comprimento, o resto 8 bytes."""
+    size = 0
+    for value in row:
+        if isinstance(value, (str, bytes, bytearray)):
+            size += len(value)
+        elif value is not None:
+            size += 8
+    return size
+
+def percentile(sorted_values, pct):
+    """Percentil pelo método nearest-rank sobre uma lista já ordenada."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-pct * len(sorted_values) // 100)) # ceil sem float
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+class QuerySample:
+    """
+    Uma operação de banco: tempos (ms) de conexão, execução e fetch, linhas,
+    bytes, idas ao servidor e os comandos SQL executados (sem os parâmetros).
+    """
+
+    __slots__ = ("kind", "action", "started_at", "connect_ms", "execute_ms", "fetch_ms",
+                 "total_ms", "rows", "bytes", "round_trips", "errors", "statements")
+
+    def __init__(self, kind, action=None):
+        self.kind = kind
+        self.action = action
+        self.started_at = time.time()
+        self.connect_ms = 0.0
+        self.execute_ms = 0.0
+        self.fetch_ms = 0.0
+        self.total_ms = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.round_trips = 0
+        self.errors = 0
+        self.statements = []
+
+    def add_statement(self, sql):
+        fingerprint = sql_fingerprint(sql)
+        if fingerprint and fingerprint not in self.statements and len(self.statements) < MAX_SAMPLE_STATEMENTS:
+            self.statements.append(fingerprint)
+
+    def as_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+class ActionSample:
+    """Uma ação do operador (uma tarefa de tela): soma das operações de banco que ela fez."""
+
+    __slots__ = ("name", "started_at", "total_ms", "queries", "round_trips", "rows", "bytes", "errors")
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = time.time()
+        self.total_ms = 0.0
+        self.queries = 0
+        self.round_trips = 0
+        self.rows = 0
+        self.bytes = 0
+        self.errors = 0
+
+class InstrumentedCursor:
+    """
+    Repassa tudo ao cursor DB-API real, medindo execute/fetch na operação em
+    andamento (QueryMetrics.track) da thread atual. Sem operação em andamento
+    não mede nada.
+    """
+
+    def __init__(self, cursor, metrics):
+        object.__setattr__(self, "_cursor", cursor)
+        object.__setattr__(self, "_metrics", metrics)
+
+    def _timed(self, field, fn, *args):
+        sample = self._metrics.current()
+        if sample is None:
+            return fn(*args)
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        except Exception:
+            sample.errors += 1
+            raise
+        finally:
+            setattr(sample, field, getattr(sample, field) + (time.perf_counter() - start) * 1000)
+
+    def _execute(self, fn, *args):
+        sample = self._metrics.current()
+        if sample is not None:
+            sample.round_trips += 1
+            if args:
+                sample.add_statement(args[0])
+        result = self._timed("execute_ms", fn, *args)
+        return self if result is self._cursor else result # Encadeamento (cursor.execute(...).fetchone()) continua medido
+
+    def execute(self, *args):
+        return self._execute(self._cursor.execute, *args)
+
+    def executemany(self, *args):
+        return self._execute(self._cursor.executemany, *args)
+
+    def _count(self, rows):
+        sample = self._metrics.current()
+        if sample is not None and rows:
+            sample.rows += len(rows)
+            sample.bytes += sum(_row_bytes(row) for row in rows)
+        return rows
+
+    def fetchone(self):
+        row = self._timed("fetch_ms", self._cursor.fetchone)
+        self._count([row] if row is not None else [])
+        return row
+
+    def fetchmany(self, *args):
+        return self._count(self._timed("fetch_ms", self._cursor.fetchmany, *args))
+
+    def fetchall(self):
+        return self._count(self._timed("fetch_ms", self._cursor.fetchall))
+
+    def nextset(self):
+        return self._timed("fetch_ms", self._cursor.nextset)
+
+    def __iter__(self):
+        if self._metrics.current() is None:
+            return iter(self._cursor)
+        return self._iter_counted()
+
+    def _iter_counted(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value) # ex.: cursor.fast_executemany = True
+
+class QueryMetrics:
+    """
+    Métricas das chamadas de banco: as últimas `buffer_size` operações e ações
+    ficam num buffer circular em memória, de onde saem os percentis por tipo
+    de operação. Operações acima de slow_threshold_ms vão para o log de consultas lentas.
+    """
+
+    def __init__(self, buffer_size=DEFAULT_BUFFER_SIZE, slow_threshold_ms=DEFAULT_SLOW_THRESHOLD_MS,
+                 slow_log_path=SLOW_QUERY_LOG_FILE):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._samples = deque(maxlen=max(1, int(buffer_size)))
+        self._actions = deque(maxlen=max(1, int(buffer_size)))
+        self.slow_threshold_ms = slow_threshold_ms
+        self.slow_log_path = slow_log_path
+        self.slow_count = 0
+
+    def configure(self, buffer_size=None, slow_threshold_ms=None):
+        with self._lock:
+            if buffer_size is not None and int(buffer_size) != self._samples.maxlen:
+                self._samples = deque(self._samples, maxlen=max(1, int(buffer_size)))
+                self._actions = deque(self._actions, maxlen=max(1, int(buffer_size)))
+            if slow_threshold_ms is not None:
+                self.slow_threshold_ms = slow_threshold_ms
+
+    def wrap_cursor(self, cursor):
+        return InstrumentedCursor(cursor, self)
+
+    def current(self):
+        """Operação em andamento na thread atual, ou None."""
+        return getattr(self._local, "sample", None)
+
+    def add_connect_time(self, seconds, login=False):
+        """Tempo para obter a conexão; login=True quando foi aberta uma conexão física (uma ida a mais)."""
+        sample = self.current()
+        if sample is not None:
+            sample.connect_ms += seconds * 1000
+            if login:
+                sample.round_trips += 1
+
+    def note_error(self):
+        sample = self.current()
+        if sample is not None:
+            sample.errors += 1
+
+    @contextmanager
+    def track(self, kind):
+        """
+        Mede o bloco como uma operação do tipo `kind` (resolve, update, delete, ...).
+        Blocos que não chegaram a ir ao banco (ex.: respondidos pelo cache) não entram nas métricas.
+        """
+        outer = self.current()
+        if outer is not None:
+            yield outer # Operação dentro de outra: conta na de fora
+            return
+        action = getattr(self._local, "action", None)
+        sample = QuerySample(kind, action.name if action else None)
+        self._local.sample = sample
+        start = time.perf_counter()
+        try:
+            yield sample
+        except Exception:
+            sample.errors += 1
+            raise
+        finally:
+            self._local.sample = None
+            sample.total_ms = (time.perf_counter() - start) * 1000
+            if sample.round_trips or sample.errors:
+                if action is not None:
+                    action.queries += 1
+                    action.round_trips += sample.round_trips
+                    action.rows += sample.rows
+                    action.bytes += sample.bytes
+                    action.errors += sample.errors
+                self._record(sample)
+
+    def run_action(self, name, fn, *args, **kwargs):
+        """Roda fn como uma ação do operador, somando as operações de banco que ela fizer."""
+        action = ActionSample(name)
+        outer = getattr(self._local, "action", None)
+        self._local.action = action
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._local.action = outer
+            action.total_ms = (time.perf_counter() - start) * 1000
+            if action.queries:
+                with self._lock:
+                    self._actions.append(action)
+
+    def _record(self, sample):
+        with self._lock:
+            self._samples.append(sample)
+            slow = self.slow_threshold_ms is not None and sample.total_ms >= self.slow_threshold_ms
+            if slow:
+                self.slow_count += 1
+        if slow and self.slow_log_path:
+            self._write_slow(sample)
+
+    def _write_slow(self, sample):
+        entry = sample.as_dict()
+        entry["timestamp"] = datetime.fromtimestamp(sample.started_at).strftime("%d-%m-%Y %H:%M:%S")
+        entry["threshold_ms"] = self.slow_threshold_ms
+        try:
+            os.makedirs(os.path.dirname(self.slow_log_path) or ".", exist_ok=True)
+            with open(self.slow_log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        except OSError:
+            pass # O log de lentidão nunca derruba a operação
+
+    def summary(self):
+        """Por tipo de operação: quantidade, percentis e máximo do tempo total, médias de linhas/bytes/idas."""
+        with self._lock:
+            samples = list(self._samples)
+        by_kind = {}
+        for sample in samples:
+            by_kind.setdefault(sample.kind, []).append(sample)
+        summary = {}
+        for kind, kind_samples in sorted(by_kind.items()):
+            totals = sorted(sample.total_ms for sample in kind_samples)
+            count = len(kind_samples)
+            row = {"count": count, "max_ms": totals[-1]}
+            for pct in PERCENTILES:
+                row[f"p{pct}_ms"] = percentile(totals, pct)
+            for field in ("connect_ms", "execute_ms", "fetch_ms", "rows", "bytes", "round_trips"):
+                row[f"avg_{field}"] = sum(getattr(sample, field) for sample in kind_samples) / count
+            row["errors"] = sum(sample.errors for sample in kind_samples)
+            summary[kind] = row
+        return summary
+
+    def recent_actions(self, limit=20):
+        """As últimas ações do operador, da mais recente para a mais antiga."""
+        with self._lock:
+            return list(self._actions)[-limit:][::-1]
+
+    def recent_samples(self, limit=20):
+        with self._lock:
+            return list(self._samples)[-limit:][::-1]
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+            self._actions.clear()
+            self.slow_count = 0
+
+def tracked(kind, metrics=None):
+    """Decorador: cada chamada da função é uma operação `kind` nas métricas."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with (metrics or _metrics).track(kind):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def metrics_settings(app_settings):
+    """Argumentos do QueryMetrics.configure a partir do APP_SETTINGS."""
+    return {
+        "buffer_size": app_settings.get("QUERY_METRICS_BUFFER_SIZE", DEFAULT_BUFFER_SIZE),
+        "slow_threshold_ms": app_settings.get("SLOW_QUERY_THRESHOLD_MS", DEFAULT_SLOW_THRESHOLD_MS),
+    }
+
+_metrics = QueryMetrics()
+
+def get_query_metrics():
+    """Métricas compartilhadas do processo."""
+    return _metrics
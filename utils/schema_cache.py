@@ -0,0 +1,174 @@
+import json
+import os
+import re
+import threading
+
+DEFAULT_SCHEMA_CACHE_PATH = "schema_cache.json"
+TYPE_LENGTH_PATTERN = re.compile(r"\s*([A-Za-z ]+?)\s*(?:\(\s*(-?\d+|MAX)\s*(?:,\s*(\d+)\s*)?\))?\s*$", re.IGNORECASE)
+
+def parse_declared_type(declared):
+    """'VARCHAR(100)' -> ('varchar', 100); 'NVARCHAR(MAX)' -> ('nvarchar', -1); 'TEXT' -> ('text', None)."""
+    match = TYPE_LENGTH_PATTERN.match(declared or "")
+    if not match:
+        return (declared or "").lower(), None
+    length = match.group(2)
+    if length is None:
+        return match.group(1).lower(), None
+    return match.group(1).lower(), -1 if length.upper() == "MAX" else int(length)
+
+class ColumnInfo:
+    """Uma coluna: tipo, tamanho máximo (-1 = MAX, None = sem limite), se aceita NULL, precisão e escala."""
+
+    __slots__ = ("name", "data_type", "max_length", "nullable", "precision", "scale")
+
+    def __init__(self, name, data_type, max_length=None, nullable=True, precision=None, scale=None):
+        self.name = name
+        self.data_type = (data_type or "").lower()
+        self.max_length = max_length
+        self.nullable = bool(nullable)
+        self.precision = precision
+        self.scale = scale
+
+    def as_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __repr__(self):
+        return f"ColumnInfo({self.name!r}, {self.data_type!r}, {self.max_length!r}, nullable={self.nullable})"
+
+class TableSchema:
+    """Colunas e índices de uma tabela, com o carimbo de versão do esquema no banco."""
+
+    def __init__(self, table, columns, indexes=None, version=None):
+        self.table = table
+        self.columns = {column.name.upper(): column for column in columns}
+        self.column_names = [column.name for column in columns]
+        self.indexes = indexes or {} # nome do índice -> [colunas, na ordem da chave]
+        self.version = version
+
+    def column(self, name):
+        return self.columns.get(str(name).upper())
+
+    def max_length(self, name):
+        """Tamanho máximo de texto da coluna, ou None quando desconhecido/ilimitado."""
+        info = self.column(name)
+        if info is None or not info.max_length or info.max_length < 0:
+            return None
+        return info.max_length
+
+    def validate(self, values_by_column):
+        """Erros que o servidor devolveria (texto maior que a coluna, NULL em coluna NOT NULL), sem ir ao banco."""
+        errors = []
+        for name, value in values_by_column.items():
+            info = self.column(name)
+            if info is None:
+                continue
+            if value is None and not info.nullable:
+                errors.append(f"'{name}' cannot be empty.")
+            max_length = self.max_length(name)
+            if max_length and isinstance(value, str) and len(value) > max_length:
+                errors.append(f"'{name}' o campo passou do maximo de {max_length} characters.")
+        return errors
+
+    def to_dict(self):
+        return {
+            "table": self.table,
+            "version": self.version,
+            "columns": [self.columns[name.upper()].as_dict() for name in self.column_names],
+            "indexes": self.indexes,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["table"], [ColumnInfo(**column) for column in data["columns"]],
+                   data.get("indexes"), data.get("version"))
+
+def derive_max_lengths(fields_config, schema):
+    """
+    max_length de cada campo: o menor entre o tamanho da coluna no banco e o da
+    configuração. A configuração só restringe, nunca passa do que o banco aceita.
+    """
+    lengths = {}
+    for field in fields_config:
+        db_length = schema.max_length(field["db_column"]) if schema is not None else None
+        configured = field.get("max_length")
+        lengths[field["name"]] = min(db_length, configured) if db_length and configured else db_length or configured
+    return lengths
+
+class SchemaCache:
+    """
+    Metadados da tabela de clientes lidos do banco uma vez por sessão. O último
+    resultado fica num arquivo JSON junto com o carimbo de versão do esquema:
+    ao abrir, o arquivo é usado na hora e a versão é conferida em segundo plano,
+    relendo INFORMATION_SCHEMA só se a tabela mudou.
+    """
+
+    def __init__(self, path, backend, connect, table_name, on_loaded=None):
+        self.path = path
+        self.backend = backend
+        self.connect = connect
+        self.table_name = table_name
+        self.on_loaded = on_loaded
+        self.schema = None
+        self.verified = False # True depois de conferir a versão com o banco nesta sessão
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._load_persisted()
+
+    def _load_persisted(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("backend") != self.backend.name or data.get("table") != self.table_name:
+            return # Arquivo de outro banco/tabela
+        try:
+            self._set(TableSchema.from_dict(data["schema"]))
+        except (KeyError, TypeError):
+            pass
+
+    def _persist(self, schema):
+        data = {"backend": self.backend.name, "table": self.table_name, "schema": schema.to_dict()}
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self.last_error = str(e) # O cache em memória continua valendo
+
+    def _set(self, schema):
+        with self._lock:
+            self.schema = schema
+        if self.on_loaded:
+            self.on_loaded(schema)
+
+    @property
+    def ready(self):
+        return self.schema is not None
+
+    def refresh(self, force=False):
+        """Confere a versão do esquema no banco e relê os metadados se mudou (ou se force)."""
+        conn = self.connect()
+        try:
+            version = self.backend.schema_version(conn, self.table_name)
+            current = self.schema
+            if force or current is None or current.version != version:
+                schema = self.backend.describe_table(conn, self.table_name)
+                schema.version = version
+                self._persist(schema)
+                self._set(schema)
+        finally:
+            conn.close()
+        self.verified = True
+        self.last_error = None
+        return self.schema
+
+    def start(self):
+        """Confere a versão em segundo plano; até lá vale o que veio do arquivo (ou nada)."""
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                self.last_error = str(e)
+        threading.Thread(target=run, name="schema-cache", daemon=True).start()
@@ -0,0 +1,69 @@
+import tkinter as tk
+import customtkinter as ctk
+
+LOAD_MORE_THRESHOLD = 0.9 # Pede a próxima página quando a rolagem passa de 90% da lista
+
+def format_result(record):
+    """Uma linha da lista: XCLIENTES - RAZAO (CGC) CIDADE/ESTADO."""
+    text = f"{record.get('XCLIENTES', '')} - {record.get('RAZAO') or ''}"
+    if record.get("CGC"):
+        text += f" ({record['CGC']})"
+    place = "/".join(str(record[column]) for column in ("CIDADE", "ESTADO") if record.get(column))
+    if place:
+        text += f" {place}"
+    return text
+
+class SearchResultsList(ctk.CTkFrame):
+    """
+    Lista de resultados da busca, carregada por páginas. on_load_more(after_key)
+    é chamado quando a rolagem chega perto do fim e ainda há páginas; quem chama
+    responde com add_page(). on_select(registro) recebe o registro leve clicado.
+    """
+
+    def __init__(self, master, on_select, on_load_more, **kwargs):
+        super().__init__(master, **kwargs)
+        self.on_select = on_select
+        self.on_load_more = on_load_more
+        self.records = []
+        self.next_key = None
+        self.loading = False
+
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+        self.listbox = tk.Listbox(self, height=8, exportselection=False, activestyle="none")
+        self.listbox.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.listbox.yview)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.listbox.configure(yscrollcommand=self._on_scroll)
+        self.listbox.bind("<<ListboxSelect>>", self._on_select)
+
+    def reset(self):
+        self.listbox.delete(0, tk.END)
+        self.records = []
+        self.next_key = None
+        self.loading = False
+
+    def add_page(self, records, next_key):
+        # Os nomes mais parecidos vêm no topo da primeira página e reaparecem nas seguintes
+        shown = {record.get("XCLIENTES") for record in self.records}
+        records = [record for record in records if record.get("XCLIENTES") not in shown]
+        self.records.extend(records)
+        for record in records:
+            self.listbox.insert(tk.END, format_result(record))
+        self.next_key = next_key
+        self.loading = False
+
+    def load_failed(self):
+        self.loading = False
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        # Também dispara quando a página cabe inteira na lista, até preenchê-la
+        if self.next_key is not None and not self.loading and float(last) >= LOAD_MORE_THRESHOLD:
+            self.loading = True
+            self.on_load_more(self.next_key)
+
+    def _on_select(self, event=None):
+        selection = self.listbox.curselection()
+        if selection:
+            self.on_select(self.records[selection[0]])
@@ -0,0 +1,239 @@
+import sqlite3
+import threading
+import time
+
+from utils.sqlite_backend import SqliteBackend, CLIENT_TABLE as SNAPSHOT_TABLE
+from utils.statement_cache import get_compiled_statements
+
+DEFAULT_SYNC_INTERVAL = 10
+DEFAULT_RECONCILE_EVERY = 30
+FETCH_CHUNK = 1000
+MMAP_SIZE = 256 * 1024 * 1024
+
+class ClientSnapshot:
+    """
+    Cópia local (SQLite com mmap) das colunas configuradas da FBCLIENTES.
+    A primeira sincronização copia tudo; as seguintes trazem só as linhas com
+    versão (rowversion) maior que a última vista, por isso version_column é
+    obrigatória. Exclusões feitas por outros processos são detectadas comparando
+    contagens e, se diferirem, as chaves. Mutações deste processo são aplicadas
+    na hora via apply_mutation; as que chegam do servidor (outras estações) são
+    repassadas aos listeners de add_listener.
+    """
+
+    def __init__(self, path, source_backend, fields_config, connect_source, version_column=None,
+                 sync_interval=DEFAULT_SYNC_INTERVAL, reconcile_every=DEFAULT_RECONCILE_EVERY):
+        if not version_column:
+            raise ValueError("The snapshot needs SNAPSHOT_VERSION_COLUMN: without it every sync re-reads the whole table.")
+        self.path = path
+        self.source = source_backend
+        self.fields_config = fields_config
+        self.columns = tuple(field["db_column"] for field in fields_config)
+        self.connect_source = connect_source
+        self.version_column = version_column
+        self.sync_interval = sync_interval
+        self.reconcile_every = max(1, int(reconcile_every))
+        self.statements = get_compiled_statements(fields_config, SNAPSHOT_TABLE)
+        self._local_backend = SqliteBackend(path)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        self._local_backend.ensure_schema(self._conn)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS snapshot_meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+        # Busca em lote escreve numa tabela temporária e desfaz no fim: conexão própria, para o
+        # rollback nunca alcançar o que a sincronização gravou
+        self._batch_lock = threading.Lock()
+        self._batch_conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._batch_conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        # Carga inicial com as mesmas colunas já feita (mesmo em execuções anteriores): a próxima sincronização é um delta.
+        # Só responde buscas depois de uma sincronização bem-sucedida neste processo, senão serviria a cópia velha
+        self._bootstrapped = self._meta("bootstrapped") == "1" and self._meta("columns") == ",".join(self.columns)
+        self._ready = False
+        self._listeners = []
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._cycles = 0
+        self.last_sync_at = None
+        self.last_error = None
+        self.server_rows = None
+        self.rows_applied = 0
+
+    # --- metadados ---
+
+    def _meta(self, key, default=None):
+        row = self._conn.execute("SELECT value FROM snapshot_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO snapshot_meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    @property
+    def ready(self):
+        """True depois da primeira sincronização deste processo; até lá as buscas vão ao servidor."""
+        return self._ready
+
+    def add_listener(self, callback):
+        """
+        Registra callback(operação, client_id, antes, depois) para as linhas que o
+        delta trouxe ("update") e as exclusões conciliadas ("delete"). A carga inicial não é repassada.
+        """
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def _notify(self, changes):
+        for callback in list(self._listeners):
+            for operation, client_id, after in changes:
+                callback(operation, client_id, None, after)
+
+    # --- leitura ---
+
+    def resolve(self, lookups):
+        """Mesmo contrato do backend.resolve_client, respondido pela cópia local."""
+        with self._lock:
+            return self._local_backend.resolve_client(self._conn, self.statements, lookups)
+
+    def resolve_batch(self, batch_lookups):
+        """Mesmo contrato do backend.resolve_batch, respondido pela cópia local (só o que já foi confirmado)."""
+        with self._batch_lock:
+            try:
+                return self._local_backend.resolve_batch(self._batch_conn, self.statements, batch_lookups)
+            finally:
+                self._batch_conn.rollback() # Só a tabela temporária foi escrita
+
+    def search_page(self, columns, lookups, after_key, limit):
+        """Mesmo contrato do backend.search_page, respondido pela cópia local."""
+        with self._lock:
+            return self._local_backend.search_page(self._conn, columns, lookups, after_key, limit)
+
+    def name_rows(self):
+        """(XCLIENTES, RAZAO) de todas as linhas locais, para montar o índice de nomes."""
+        with self._lock:
+            return self._conn.execute(f"SELECT XCLIENTES, RAZAO FROM {SNAPSHOT_TABLE}").fetchall()
+
+    def row_count(self):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {SNAPSHOT_TABLE}").fetchone()[0]
+
+    # --- sincronização ---
+
+    def _upsert(self, rows):
+        placeholders = ', '.join(['?'] * len(self.columns))
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO {SNAPSHOT_TABLE} ({', '.join(self.columns)}) VALUES ({placeholders})",
+            rows
+        )
+
+    def sync_once(self):
+        """Um ciclo: carga inicial ou delta, e a conciliação de exclusões quando for a vez."""
+        bootstrapped = self._bootstrapped
+        with self._lock:
+            last_version = int(self._meta("last_version", 0)) if bootstrapped else 0
+        sql, params = self.source.delta_query(self.columns, self.version_column, last_version)
+
+        conn = self.connect_source()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            applied = 0
+            if not bootstrapped:
+                with self._lock:
+                    self._conn.execute(f"DELETE FROM {SNAPSHOT_TABLE}")
+            while True:
+                rows = cursor.fetchmany(FETCH_CHUNK) # Lido fora do lock: as buscas locais não esperam a rede
+                if not rows:
+                    break
+                values = [tuple(row)[:-1] for row in rows]
+                last_version = max(last_version, max(int(row[-1] or 0) for row in rows))
+                with self._lock: # Bloco e versão na mesma transação: nunca uma sem a outra
+                    self._upsert(values)
+                    self._set_meta("last_version", last_version)
+                    self._conn.commit()
+                applied += len(rows)
+                if bootstrapped: # Só depois de confirmado
+                    self._notify([("update", after["XCLIENTES"], after) for after in (dict(zip(self.columns, row)) for row in values)])
+            with self._lock:
+                self._set_meta("last_version", last_version)
+                self._set_meta("bootstrapped", 1)
+                self._set_meta("columns", ",".join(self.columns))
+                self._conn.commit()
+            self._bootstrapped = True
+            self._ready = True
+
+            self._cycles += 1
+            if bootstrapped and self._cycles % self.reconcile_every == 0:
+                self._reconcile_deletes(cursor)
+            else:
+                cursor.execute(f"SELECT COUNT(*) FROM {self.source.client_table}")
+                self.server_rows = cursor.fetchone()[0]
+        finally:
+            conn.close()
+
+        self.rows_applied += applied
+        self.last_sync_at = time.time()
+        self.last_error = None
+        return applied
+
+    def _reconcile_deletes(self, cursor):
+        cursor.execute(f"SELECT COUNT(*) FROM {self.source.client_table}")
+        self.server_rows = cursor.fetchone()[0]
+        if self.server_rows == self.row_count():
+            return
+        cursor.execute(f"SELECT XCLIENTES FROM {self.source.client_table}")
+        server_keys = {str(row[0]).strip() for row in cursor.fetchall()}
+        with self._lock:
+            local_keys = [row[0] for row in self._conn.execute(f"SELECT XCLIENTES FROM {SNAPSHOT_TABLE}")]
+            stale = [(key,) for key in local_keys if str(key).strip() not in server_keys]
+            self._conn.executemany(f"DELETE FROM {SNAPSHOT_TABLE} WHERE XCLIENTES = ?", stale)
+            self._conn.commit()
+        self._notify([("delete", key, None) for key, in stale])
+
+    def apply_mutation(self, operation, client_id, before, after):
+        """Listener de mutações do db_operations: a tela vê a própria alteração sem esperar o delta."""
+        with self._lock:
+            if operation == "delete":
+                self._conn.execute(f"DELETE FROM {SNAPSHOT_TABLE} WHERE XCLIENTES = ?", (client_id,))
+            elif after:
+                self._upsert([tuple(after.get(column) for column in self.columns)])
+            self._conn.commit()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="fbclientes-snapshot", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sync_once()
+            except Exception as e:
+                self.last_error = str(e) # Continua servindo a última cópia boa
+            self._stop.wait(self.sync_interval)
+
+    def status(self):
+        """Linhas locais e no servidor, atraso desde a última sincronização e último erro."""
+        lag = time.time() - self.last_sync_at if self.last_sync_at else None
+        with self._lock:
+            last_version = self._meta("last_version")
+        return {
+            "ready": self.ready,
+            "rows": self.row_count(),
+            "server_rows": self.server_rows,
+            "lag_seconds": lag,
+            "rows_applied": self.rows_applied,
+            "last_version": last_version,
+            "last_error": self.last_error,
+        }
+
+    def close(self):
+        self.stop()
+        with self._lock:
+            self._conn.close()
+        with self._batch_lock:
+            self._batch_conn.close()
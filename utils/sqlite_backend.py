@@ -0,0 +1,235 @@
+import sqlite3
+import threading
+from functools import lru_cache
+
+from utils.db_backend import DatabaseBackend, BACKEND_SQLITE
+from utils.identifier_resolver import build_batch_resolve_sql
+from utils.statement_cache import PROJECTION_LIST, PROJECTION_AUDIT
+from utils.schema_cache import ColumnInfo, TableSchema, parse_declared_type
+
+CLIENT_TABLE = "FBCLIENTES"
+
+# Mesmos índices da FBCLIENTES de produção usados pelas buscas do identifier_resolver
+CLIENT_INDEXES = (
+    ("IX_FBCLIENTES_CGC", "CGC"),
+    ("IX_FBCLIENTES_INSCRICAO", "INSCRICAO"),
+    ("IX_FBCLIENTES_RAZAO", "RAZAO"),
+)
+
+def _column_definition(field):
+    column = field["db_column"]
+    max_length = field.get("max_length")
+    definition = f"{column} VARCHAR({max_length})" if max_length else f"{column} TEXT"
+    if column == "XCLIENTES":
+        definition += " NOT NULL PRIMARY KEY"
+    elif column == "RAZAO":
+        definition += " COLLATE NOCASE" # SQL Server usa collation case-insensitive
+    return definition
+
+def build_schema_sql(fields_config, table=CLIENT_TABLE):
+    """CREATE TABLE/INDEX equivalentes à FBCLIENTES para a configuração de campos."""
+    columns = ",\n    ".join(_column_definition(field) for field in fields_config)
+    statements = [f"CREATE TABLE IF NOT EXISTS {table} (\n    {columns}\n)"]
+    configured = {field["db_column"] for field in fields_config}
+    for index_name, column in CLIENT_INDEXES:
+        if column in configured:
+            statements.append(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({column})")
+    return statements
+
+@lru_cache(maxsize=64)
+def _insert_sql(table, columns):
+    placeholders = ', '.join(['?'] * len(columns))
+    return (f"INSERT INTO {table} ({', '.join(columns)}) SELECT {placeholders} "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE XCLIENTES = ?)")
+
+@lru_cache(maxsize=64)
+def _update_sql(table, columns):
+    set_clause = ', '.join(f"{column} = ?" for column in columns)
+    return f"UPDATE {table} SET {set_clause} WHERE XCLIENTES = ?"
+
+@lru_cache(maxsize=64)
+def _lookup_sql(table, column, operator):
+    return f"SELECT XCLIENTES FROM {table} WHERE {column} {operator} ? LIMIT 1"
+
+class SqliteBackend(DatabaseBackend):
+    """
+    Backend embutido (arquivo SQLite) com o mesmo esquema e índices da FBCLIENTES,
+    para testes de carga, benchmarks e demonstrações sem o SQL Server.
+    """
+
+    name = BACKEND_SQLITE
+    client_table = CLIENT_TABLE
+    errors = (sqlite3.Error,)
+    limit_style = "limit"
+
+    def __init__(self, path):
+        self.path = path
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def connect(self, login_timeout=None):
+        # Arquivo local: não há login, login_timeout é ignorado.
+        # O pool empresta a conexão para threads diferentes (uma por vez)
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        self.ensure_schema(conn)
+        return conn
+
+    def ensure_schema(self, conn):
+        """Cria a tabela e os índices, e acrescenta colunas novas do CLIENT_FIELDS_CONFIG."""
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            from utils.config_manager import ConfigManager
+            fields_config = ConfigManager().CLIENT_FIELDS_CONFIG
+            for statement in build_schema_sql(fields_config, self.client_table):
+                conn.execute(statement)
+            existing = {row[1].upper() for row in conn.execute(f"PRAGMA table_info({self.client_table})")}
+            for field in fields_config:
+                if field["db_column"].upper() not in existing:
+                    conn.execute(f"ALTER TABLE {self.client_table} ADD COLUMN {_column_definition(field)}")
+            conn.commit()
+            self._schema_ready = True
+
+    def schema_changed(self):
+        with self._schema_lock:
+            self._schema_ready = False
+
+    def _ready(self, conn):
+        if not self._schema_ready:
+            self.ensure_schema(conn.raw if hasattr(conn, "raw") else conn)
+
+    def id_store(self, connect):
+        from utils.id_allocator import SqliteIdStore
+        self.connect().close() # Garante a FBCLIENTES antes de semear o contador com o maior XCLIENTES
+        return SqliteIdStore(self.path, client_table=self.client_table)
+
+    def insert_client(self, conn, statements, client_data):
+        self._ready(conn)
+        cursor = conn.cursor()
+        cursor.execute(
+            _insert_sql(self.client_table, statements.insert_columns),
+            statements.bulk_insert_values(client_data) + (client_data.get("XCLIENTES"),)
+        )
+        return cursor.rowcount == 1
+
+    def update_client(self, conn, statements, names, client_data):
+        self._ready(conn)
+        column_of = dict(zip(statements.insert_names, statements.insert_columns))
+        names = tuple(name for name in statements.update_names if name in names)
+        xclientes = client_data.get("XCLIENTES")
+
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE") # Trava de escrita já na leitura da imagem antes (como o UPDLOCK)
+        audit = statements.projection(PROJECTION_AUDIT)
+        before_row = audit.row_to_dict(cursor.execute(audit.by_key_sql, (xclientes,)).fetchone())
+        if before_row is None:
+            return None, None
+        cursor.execute(
+            _update_sql(self.client_table, tuple(column_of[name] for name in names)),
+            tuple(client_data.get(name) for name in names) + (xclientes,)
+        )
+        after_row = audit.row_to_dict(cursor.execute(audit.by_key_sql, (xclientes,)).fetchone())
+        return before_row, after_row
+
+    def _find_key(self, cursor, lookups):
+        for match_key, column, operator, param in lookups:
+            row = cursor.execute(_lookup_sql(self.client_table, column, operator), (param,)).fetchone()
+            if row is not None:
+                return row[0], match_key
+        return None, None
+
+    def resolve_client(self, conn, statements, lookups):
+        self._ready(conn)
+        cursor = conn.cursor()
+        key, match_key = self._find_key(cursor, lookups)
+        if key is None:
+            return None, None
+        return statements.row_to_dict(cursor.execute(statements.select_sql, (key,)).fetchone()), match_key
+
+    def delete_client(self, conn, statements, lookups):
+        self._ready(conn)
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        key, match_key = self._find_key(cursor, lookups)
+        if key is None:
+            return None, None
+        audit = statements.projection(PROJECTION_AUDIT)
+        before_row = audit.row_to_dict(cursor.execute(audit.by_key_sql, (key,)).fetchone())
+        cursor.execute(f"DELETE FROM {self.client_table} WHERE XCLIENTES = ?", (key,))
+        return before_row, match_key
+
+    def resolve_batch(self, conn, statements, batch_lookups):
+        self._ready(conn)
+        cursor = conn.cursor()
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS batch_lookups (POS INTEGER, PRIO INTEGER, MATCH_KEY TEXT, COL TEXT, VAL TEXT)")
+        cursor.execute("DELETE FROM temp.batch_lookups")
+        cursor.executemany("INSERT INTO temp.batch_lookups (POS, PRIO, MATCH_KEY, COL, VAL) VALUES (?, ?, ?, ?, ?)", batch_lookups)
+        projection = statements.projection(PROJECTION_LIST)
+        rows = cursor.execute(build_batch_resolve_sql(self.client_table, "temp.batch_lookups", projection.aliased_list)).fetchall()
+        return [(row[0], row[1], row[2], projection.row_to_dict(row[3:])) for row in rows]
+
+    def delete_batch(self, conn, statements, client_ids):
+        self._ready(conn)
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS batch_keys (XCLIENTES TEXT PRIMARY KEY)")
+        cursor.execute("DELETE FROM temp.batch_keys")
+        cursor.executemany("INSERT INTO temp.batch_keys (XCLIENTES) VALUES (?)", [(client_id,) for client_id in client_ids])
+        keys = "XCLIENTES IN (SELECT XCLIENTES FROM temp.batch_keys)"
+        audit = statements.projection(PROJECTION_AUDIT)
+        before_rows = [
+            audit.row_to_dict(row)
+            for row in cursor.execute(f"SELECT {audit.select_list} FROM {self.client_table} WHERE {keys}")
+        ]
+        cursor.execute(f"DELETE FROM {self.client_table} WHERE {keys}")
+        return before_rows
+
+    def fetch_for_update(self, conn, statements, client_ids):
+        self._ready(conn)
+        cursor = conn.cursor()
+        if not (conn.raw if hasattr(conn, "raw") else conn).in_transaction:
+            cursor.execute("BEGIN IMMEDIATE") # Trava de escrita já na leitura, como o UPDLOCK
+        if not client_ids:
+            return {}
+        audit = statements.projection(PROJECTION_AUDIT)
+        placeholders = ', '.join(['?'] * len(client_ids))
+        rows = [
+            audit.row_to_dict(row)
+            for row in cursor.execute(f"SELECT {audit.select_list} FROM {self.client_table} WHERE XCLIENTES IN ({placeholders})", list(client_ids))
+        ]
+        return {str(row["XCLIENTES"]): row for row in rows}
+
+    def search_page(self, conn, columns, lookups, after_key, limit):
+        self._ready(conn)
+        return super().search_page(conn, columns, lookups, after_key, limit)
+
+    def delta_query(self, columns, version_column, since):
+        column_list = ', '.join(columns)
+        if not version_column:
+            return f"SELECT {column_list}, 0 AS SYNC_VERSION FROM {self.client_table}", ()
+        return (f"SELECT {column_list}, {version_column} AS SYNC_VERSION FROM {self.client_table} "
+                f"WHERE {version_column} > ? ORDER BY {version_column}", (since,))
+
+    def table_columns(self, conn, table_name):
+        self._ready(conn)
+        return [row[0] for row in conn.cursor().execute("SELECT name FROM pragma_table_info(?)", (table_name,))]
+
+    def describe_table(self, conn, table_name):
+        self._ready(conn)
+        cursor = conn.cursor()
+        columns = []
+        for name, declared, notnull, primary_key in cursor.execute(
+                "SELECT name, type, \"notnull\", pk FROM pragma_table_info(?)", (table_name,)).fetchall():
+            data_type, max_length = parse_declared_type(declared)
+            columns.append(ColumnInfo(name, data_type, max_length, not (notnull or primary_key)))
+        indexes = {}
+        for index_name, column_name in cursor.execute(
+                "SELECT il.name, ii.name FROM pragma_index_list(?) il JOIN pragma_index_info(il.name) ii "
+                "ORDER BY il.name, ii.seqno", (table_name,)).fetchall():
+            indexes.setdefault(index_name, []).append(column_name)
+        return TableSchema(table_name, columns, indexes)
+
+    def schema_version(self, conn, table_name):
+        self._ready(conn)
+        return str(conn.cursor().execute("PRAGMA schema_version").fetchone()[0])
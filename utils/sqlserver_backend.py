@@ -0,0 +1,248 @@
+from utils.db_backend import DatabaseBackend, BACKEND_SQLSERVER
+from utils.schema_cache import ColumnInfo, TableSchema
+from utils.identifier_resolver import build_batch_resolve_sql, BATCH_JOINS, DEFAULT_KEY_LENGTH
+from utils.statement_cache import PROJECTION_LIST, PROJECTION_DETAIL, PROJECTION_AUDIT
+
+CLIENT_TABLE = "SM11_PROD.dbo.FBCLIENTES"
+XCLIENTES_COUNTER_TABLE = "SM11_PROD.dbo.FBCLIENTES_SEQ"
+
+# Tipo ODBC (constante do pyodbc) de cada DATA_TYPE do INFORMATION_SCHEMA usado no setinputsizes.
+# varchar vai como SQL_VARCHAR: um parâmetro NVARCHAR contra coluna VARCHAR força conversão e scan do índice.
+SQL_TYPE_NAMES = {
+    "varchar": "SQL_VARCHAR", "char": "SQL_CHAR", "text": "SQL_LONGVARCHAR",
+    "nvarchar": "SQL_WVARCHAR", "nchar": "SQL_WCHAR", "ntext": "SQL_WLONGVARCHAR",
+    "int": "SQL_INTEGER", "bigint": "SQL_BIGINT", "smallint": "SQL_SMALLINT", "tinyint": "SQL_TINYINT",
+    "bit": "SQL_BIT", "decimal": "SQL_DECIMAL", "numeric": "SQL_NUMERIC", "float": "SQL_DOUBLE", "real": "SQL_REAL",
+    "datetime": "SQL_TYPE_TIMESTAMP", "datetime2": "SQL_TYPE_TIMESTAMP", "smalldatetime": "SQL_TYPE_TIMESTAMP",
+    "date": "SQL_TYPE_DATE",
+}
+
+def _pyodbc():
+    # Importado sob demanda: o backend SQLite roda sem driver ODBC instalado
+    import pyodbc
+    return pyodbc
+
+class SqlServerBackend(DatabaseBackend):
+    """Backend de produção: SQL Server via pyodbc, lotes T-SQL do statement_cache/identifier_resolver."""
+
+    name = BACKEND_SQLSERVER
+    client_table = CLIENT_TABLE
+    counter_table = XCLIENTES_COUNTER_TABLE
+
+    def __init__(self, odbc_config):
+        self.odbc_config = odbc_config
+        self.errors = (_pyodbc().Error,)
+        self._input_sizes = {}
+
+    def connect(self, login_timeout=None):
+        conn_str = ';'.join(f"{key}={value}" for key, value in self.odbc_config.items())
+        if login_timeout:
+            return _pyodbc().connect(conn_str, timeout=int(login_timeout))
+        return _pyodbc().connect(conn_str)
+
+    def set_query_timeout(self, raw_conn, seconds):
+        raw_conn.timeout = int(seconds or 0) # 0 = sem limite
+
+    def id_store(self, connect):
+        from utils.id_allocator import SqlServerIdStore
+        return SqlServerIdStore(connect, self.counter_table, self.client_table)
+
+    def insert_client(self, conn, statements, client_data):
+        cursor = conn.prepared_cursor(statements.insert_sql)
+        self.bind_input_sizes(cursor, ("XCLIENTES",) + statements.insert_columns)
+        cursor.execute(statements.insert_sql, statements.insert_values(client_data))
+        return cursor.fetchone()[0] == 1
+
+    def update_client(self, conn, statements, names, client_data):
+        if tuple(names) == statements.update_names:
+            sql, params = statements.update_sql, statements.update_values(client_data)
+            names = statements.update_names
+        else:
+            sql, names = statements.partial_update(names)
+            params = statements.partial_update_values(client_data, names)
+        cursor = conn.prepared_cursor(sql)
+        self.bind_input_sizes(cursor, ("XCLIENTES",) + statements.columns_for(names) + ("XCLIENTES", "XCLIENTES"))
+        cursor.execute(sql, params)
+        before_row = statements.audit_row_to_dict(cursor.fetchone())
+        after_row = statements.audit_row_to_dict(cursor.fetchone()) if cursor.nextset() else None
+        return before_row, after_row
+
+    def resolve_client(self, conn, statements, lookups):
+        sql = statements.resolver_sql(lookups, PROJECTION_DETAIL, key_length=self._column_length(statements, "XCLIENTES"))
+        cursor = conn.prepared_cursor(sql)
+        cursor.execute(sql, [lookup[3] for lookup in lookups])
+        return self._match_row(cursor, cursor.fetchone())
+
+    def delete_client(self, conn, statements, lookups):
+        sql = statements.resolver_sql(lookups, PROJECTION_AUDIT, delete=True,
+                                      key_length=self._column_length(statements, "XCLIENTES"))
+        cursor = conn.prepared_cursor(sql)
+        cursor.execute(sql, [lookup[3] for lookup in lookups])
+        row = cursor.fetchone()
+        result = self._match_row(cursor, row)
+        while cursor.nextset(): # O DELETE só termina de rodar quando o lote é consumido até o fim
+            pass
+        return result
+
+    def _column_length(self, statements, column):
+        """Tamanho da coluna: o do banco (schema_cache) quando conhecido, senão o da configuração."""
+        length = self.schema.max_length(column) if self.schema is not None else None
+        return length or statements.max_lengths.get(column) or DEFAULT_KEY_LENGTH
+
+    def resolve_batch(self, conn, statements, batch_lookups):
+        # VARCHAR com a collation do banco, como as colunas da FBCLIENTES: NVARCHAR forçaria conversão
+        # implícita e scan do índice na junção, e a collation do tempdb pode ser outra ("collation conflict")
+        columns = {column for column, _ in BATCH_JOINS if column in statements.insert_columns}
+        size = max((self._column_length(statements, column) for column in columns), default=DEFAULT_KEY_LENGTH) + 2 # '%' do LIKE
+        # Valor maior que a coluna não casa com nada (e não cabe na tabela temporária)
+        batch_lookups = [lookup for lookup in batch_lookups if len(str(lookup[4])) <= size]
+        if not batch_lookups:
+            return []
+        cursor = self.bulk_cursor(conn)
+        cursor.execute(
+            "IF OBJECT_ID('tempdb..#batch_lookups') IS NOT NULL DROP TABLE #batch_lookups;"
+            "CREATE TABLE #batch_lookups (POS INT, PRIO INT, MATCH_KEY VARCHAR(20), COL VARCHAR(20), "
+            f"VAL VARCHAR({size}) COLLATE DATABASE_DEFAULT);"
+        )
+        try:
+            cursor.executemany("INSERT INTO #batch_lookups (POS, PRIO, MATCH_KEY, COL, VAL) VALUES (?, ?, ?, ?, ?)", batch_lookups)
+            projection = statements.projection(PROJECTION_LIST) # Só o que a lista do lote mostra
+            cursor.execute(build_batch_resolve_sql(self.client_table, "#batch_lookups", projection.aliased_list))
+            return [(row[0], row[1], row[2], projection.row_to_dict(row[3:])) for row in cursor.fetchall()]
+        finally:
+            cursor.execute("DROP TABLE #batch_lookups")
+
+    def delete_batch(self, conn, statements, client_ids):
+        key_length = self._column_length(statements, "XCLIENTES")
+        client_ids = [client_id for client_id in client_ids if len(client_id) <= key_length] # Maiores não existem
+        if not client_ids:
+            return []
+        cursor = self.bulk_cursor(conn)
+        cursor.execute(
+            "IF OBJECT_ID('tempdb..#batch_keys') IS NOT NULL DROP TABLE #batch_keys;"
+            f"CREATE TABLE #batch_keys (XCLIENTES VARCHAR({key_length}) COLLATE DATABASE_DEFAULT PRIMARY KEY);"
+        )
+        try:
+            cursor.executemany("INSERT INTO #batch_keys (XCLIENTES) VALUES (?)", [(client_id,) for client_id in client_ids])
+            cursor.execute(
+                f"SELECT {statements.projection(PROJECTION_AUDIT).aliased_list} FROM {self.client_table} c WITH (UPDLOCK, HOLDLOCK) "
+                f"JOIN #batch_keys k ON c.XCLIENTES = k.XCLIENTES"
+            )
+            before_rows = [statements.audit_row_to_dict(row) for row in cursor.fetchall()]
+            cursor.execute(f"DELETE c FROM {self.client_table} c JOIN #batch_keys k ON c.XCLIENTES = k.XCLIENTES")
+            return before_rows
+        finally:
+            cursor.execute("DROP TABLE #batch_keys")
+
+    def fetch_for_update(self, conn, statements, client_ids):
+        if not client_ids:
+            return {}
+        audit = statements.projection(PROJECTION_AUDIT)
+        placeholders = ', '.join(['?'] * len(client_ids))
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT {audit.select_list} FROM {self.client_table} WITH (UPDLOCK, HOLDLOCK) WHERE XCLIENTES IN ({placeholders})",
+            list(client_ids)
+        )
+        rows = [audit.row_to_dict(row) for row in cursor.fetchall()]
+        return {str(row["XCLIENTES"]): row for row in rows}
+
+    @staticmethod
+    def _match_row(cursor, row):
+        if row is None:
+            return None, None
+        columns = [column[0] for column in cursor.description]
+        client_data = dict(zip(columns, row))
+        match_key = client_data.pop("MATCH_KEY")
+        return client_data, match_key
+
+    def delta_query(self, columns, version_column, since):
+        column_list = ', '.join(columns)
+        if not version_column:
+            return f"SELECT {column_list}, 0 AS SYNC_VERSION FROM {self.client_table}", ()
+        # MIN_ACTIVE_ROWVERSION: não avança além de transações ainda abertas, senão as perderíamos
+        return (
+            f"SELECT {column_list}, CAST({version_column} AS BIGINT) AS SYNC_VERSION FROM {self.client_table} "
+            f"WHERE {version_column} > CAST(CAST(? AS BIGINT) AS BINARY(8)) AND {version_column} < MIN_ACTIVE_ROWVERSION() "
+            f"ORDER BY {version_column}",
+            (since,)
+        )
+
+    def bulk_cursor(self, conn):
+        cursor = conn.cursor()
+        cursor.fast_executemany = True
+        return cursor
+
+    def set_schema(self, schema):
+        self.schema = schema
+        self._input_sizes = {}
+
+    def bind_input_sizes(self, cursor, columns):
+        """setinputsizes com tipo e tamanho reais de cada coluna, para o pyodbc não adivinhar a cada execute."""
+        if self.schema is None:
+            return
+        columns = tuple(columns)
+        sizes = self._input_sizes.get(columns)
+        if sizes is None:
+            sizes = self._input_sizes[columns] = self._build_input_sizes(columns)
+        if sizes:
+            cursor.setinputsizes(sizes)
+
+    def _build_input_sizes(self, columns):
+        pyodbc = _pyodbc()
+        sizes = []
+        for column in columns:
+            info = self.schema.column(column)
+            type_name = SQL_TYPE_NAMES.get(info.data_type) if info else None
+            if type_name is None:
+                sizes.append(None) # Coluna desconhecida: o pyodbc decide
+                continue
+            if info.max_length:
+                size = 0 if info.max_length < 0 else info.max_length # 0 = (MAX)
+            else:
+                size = info.precision or 0
+            sizes.append((getattr(pyodbc, type_name), size, info.scale or 0))
+        return sizes if any(sizes) else None
+
+    def table_columns(self, conn, table_name):
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME = ? AND TABLE_SCHEMA = 'dbo'",
+            (table_name,)
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+    def describe_table(self, conn, table_name):
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT COLUMN_NAME, DATA_TYPE, CHARACTER_MAXIMUM_LENGTH, IS_NULLABLE, NUMERIC_PRECISION, NUMERIC_SCALE "
+            "FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME = ? AND TABLE_SCHEMA = 'dbo' ORDER BY ORDINAL_POSITION",
+            (table_name,)
+        )
+        columns = [
+            ColumnInfo(name, data_type, max_length, nullable == "YES", precision, scale)
+            for name, data_type, max_length, nullable, precision, scale in cursor.fetchall()
+        ]
+        cursor.execute(
+            "SELECT i.name, c.name FROM sys.indexes i "
+            "JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id "
+            "JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id "
+            "WHERE i.object_id = OBJECT_ID(?) AND ic.is_included_column = 0 ORDER BY i.name, ic.key_ordinal",
+            (f"dbo.{table_name}",)
+        )
+        indexes = {}
+        for index_name, column_name in cursor.fetchall():
+            indexes.setdefault(index_name, []).append(column_name)
+        return TableSchema(table_name, columns, indexes)
+
+    def schema_version(self, conn, table_name):
+        # modify_date muda com ALTER TABLE; a contagem de índices cobre CREATE/DROP INDEX
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT CONVERT(VARCHAR(33), o.modify_date, 126) + ':' + "
+            "CAST((SELECT COUNT(*) FROM sys.indexes i WHERE i.object_id = o.object_id) AS VARCHAR(10)) "
+            "FROM sys.objects o WHERE o.object_id = OBJECT_ID(?)",
+            (f"dbo.{table_name}",)
+        )
+        row = cursor.fetchone()
+        return row[0] if row else None
@@ -0,0 +1,227 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from utils.identifier_resolver import build_resolver_sql, build_resolve_and_delete_sql, DEFAULT_KEY_LENGTH
+
+MAX_CACHED_CONFIGS = 8
+MAX_PARTIAL_UPDATES = 64
+MAX_RESOLVER_PLANS = 32
+
+# Colunas das listas de resultados (registros leves), quando configuradas
+LIST_COLUMNS = ("XCLIENTES", "RAZAO", "CGC", "CIDADE", "ESTADO")
+
+# Projeções nomeadas: cada leitura traz só as colunas do seu consumidor, nunca SELECT *
+PROJECTION_LIST = "list"     # listas de resultados e buscas em lote
+PROJECTION_DETAIL = "detail" # formulários (todas as colunas configuradas)
+PROJECTION_AUDIT = "audit"   # imagens antes/depois gravadas no log de atividades
+
+def fields_fingerprint(fields_config):
+    """Impressão digital da configuração de campos (nome + coluna, em ordem)."""
+    payload = json.dumps([(field["name"], field["db_column"]) for field in fields_config])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+class Projection:
+    """Colunas de uma leitura nomeada (sempre com a chave XCLIENTES) e os textos SELECT já montados."""
+
+    __slots__ = ("name", "columns", "select_list", "aliased_list", "by_key_sql")
+
+    def __init__(self, name, columns, table):
+        columns = tuple(dict.fromkeys(columns))
+        if "XCLIENTES" not in columns:
+            columns = ("XCLIENTES",) + columns
+        self.name = name
+        self.columns = columns
+        self.select_list = ', '.join(columns)
+        # Com o alias "c." usado pelos lotes do identifier_resolver
+        self.aliased_list = ', '.join(f"c.{col}" for col in columns)
+        self.by_key_sql = f"SELECT {self.select_list} FROM {table} WHERE XCLIENTES = ?"
+
+    def row_to_dict(self, row):
+        return dict(zip(self.columns, row)) if row is not None else None
+
+class CompiledClientStatements:
+    """
+    Textos SQL de INSERT/UPDATE/SELECT da FBCLIENTES e os extratores de valores,
+    montados uma única vez para uma configuração de campos.
+    """
+
+    def __init__(self, fields_config, table):
+        self.fingerprint = fields_fingerprint(fields_config)
+        self.table = table
+
+        self.insert_names = tuple(field["name"] for field in fields_config)
+        self.insert_columns = tuple(field["db_column"] for field in fields_config)
+        self.update_names = tuple(field["name"] for field in fields_config if field["name"] != "XCLIENTES")
+        self.update_columns = tuple(field["db_column"] for field in fields_config if field["name"] != "XCLIENTES")
+        self.max_lengths = {field["db_column"]: field.get("max_length") for field in fields_config}
+
+        self.projections = {
+            PROJECTION_LIST: Projection(PROJECTION_LIST, [col for col in LIST_COLUMNS if col in self.insert_columns], table),
+            PROJECTION_DETAIL: Projection(PROJECTION_DETAIL, self.insert_columns, table),
+            # Hoje as mesmas colunas do detalhe; separada para o log não depender do que o formulário mostra
+            PROJECTION_AUDIT: Projection(PROJECTION_AUDIT, self.insert_columns, table),
+        }
+
+        columns_str = ', '.join(self.insert_columns)
+        placeholders = ', '.join(['?'] * len(self.insert_columns))
+
+        self.insert_sql = f'''
+        SET NOCOUNT ON;
+        DECLARE @Status INT;
+
+        IF NOT EXISTS (SELECT 1 FROM {table} WHERE XCLIENTES = ?)
+            BEGIN
+                INSERT INTO {table}
+                    ({columns_str})
+                VALUES ({placeholders});
+                SET @Status = 1; -- Successfully inserted
+            END
+        ELSE
+            BEGIN
+                SET @Status = 0; -- Client already exists
+            END
+
+        SELECT @Status AS Resultado; -- Return the status
+        '''
+
+        self.update_sql = self._build_update_sql(self.update_columns)
+        self._name_to_column = dict(zip(self.insert_names, self.insert_columns))
+        self._partial_updates = OrderedDict()
+        self._resolver_plans = OrderedDict()
+        self._sql_lock = threading.Lock()
+
+        self.select_sql = self.projections[PROJECTION_DETAIL].by_key_sql
+        self._plain_updates = OrderedDict()
+        self.delete_by_key_sql = f"DELETE FROM {table} WHERE XCLIENTES = ?"
+
+        # INSERT simples para carga em lote (ids já reservados, sem IF NOT EXISTS)
+        self.bulk_insert_sql = f"INSERT INTO {table} ({columns_str}) VALUES ({placeholders})"
+
+    def _build_update_sql(self, columns):
+        # Imagem antes, UPDATE e imagem depois no mesmo lote (três result sets).
+        # Não usa OUTPUT deleted/inserted porque a FBCLIENTES tem triggers, e o
+        # SQL Server recusa OUTPUT sem INTO em tabelas com trigger.
+        set_clause = ', '.join(f"{col} = ?" for col in columns)
+        audit_columns = self.projections[PROJECTION_AUDIT].select_list
+        return f'''
+        SET NOCOUNT ON;
+        SELECT {audit_columns} FROM {self.table} WITH (UPDLOCK, HOLDLOCK) WHERE XCLIENTES = ?;
+        UPDATE {self.table}
+        SET {set_clause}
+        WHERE XCLIENTES = ?;
+        SELECT {audit_columns} FROM {self.table} WHERE XCLIENTES = ?;
+        '''
+
+    def _cached_sql(self, cache, limit, key, build):
+        # LRU pequeno: o texto é montado uma vez por formato e reaproveitado
+        with self._sql_lock:
+            sql = cache.pop(key, None)
+            if sql is None:
+                sql = build()
+            cache[key] = sql
+            while len(cache) > limit:
+                cache.popitem(last=False)
+        return sql
+
+    def partial_update(self, changed_names):
+        """
+        UPDATE só das colunas alteradas. Retorna (sql, nomes_na_ordem); o texto é
+        montado uma vez por subconjunto de colunas e reaproveitado.
+        """
+        names = tuple(name for name in self.update_names if name in changed_names)
+        sql = self._cached_sql(self._partial_updates, MAX_PARTIAL_UPDATES, names,
+                               lambda: self._build_update_sql([self._name_to_column[name] for name in names]))
+        return sql, names
+
+    def update_by_key(self, changed_names):
+        """
+        UPDATE simples (sem imagens nem lote T-SQL) das colunas alteradas, em SQL
+        comum aos dois backends, para reenvios dentro de uma transação já aberta.
+        Retorna (sql, nomes_na_ordem); parâmetros: valores dos nomes seguidos do XCLIENTES.
+        """
+        names = tuple(name for name in self.update_names if name in changed_names)
+        sql = self._cached_sql(self._plain_updates, MAX_PARTIAL_UPDATES, names, lambda: (
+            f"UPDATE {self.table} SET {', '.join(f'{self._name_to_column[name]} = ?' for name in names)} WHERE XCLIENTES = ?"
+        ))
+        return sql, names
+
+    def projection(self, name):
+        """Projeção nomeada (PROJECTION_LIST, PROJECTION_DETAIL ou PROJECTION_AUDIT)."""
+        return self.projections[name]
+
+    def resolver_sql(self, lookups, projection=PROJECTION_DETAIL, delete=False, key_length=DEFAULT_KEY_LENGTH):
+        """
+        Lote T-SQL do identifier_resolver com a projeção pedida (delete=True: resolve,
+        devolve a imagem e apaga). Montado uma vez por formato de busca (colunas e operadores).
+        key_length: tamanho da coluna XCLIENTES, para a variável @key ter o mesmo tipo.
+        """
+        shape = (tuple(lookup[:3] for lookup in lookups), projection, delete, key_length)
+        builder = build_resolve_and_delete_sql if delete else build_resolver_sql
+        return self._cached_sql(self._resolver_plans, MAX_RESOLVER_PLANS, shape,
+                                lambda: builder(lookups, self.table, self.projections[projection].aliased_list, key_length))
+
+    def columns_for(self, names):
+        """Colunas do banco dos campos `names`, na mesma ordem."""
+        return tuple(self._name_to_column[name] for name in names)
+
+    def partial_update_values(self, client_data, names):
+        xclientes = client_data.get("XCLIENTES")
+        return (xclientes,) + tuple(client_data.get(name) for name in names) + (xclientes, xclientes)
+
+    def changed_fields(self, client_data, before_data):
+        """
+        Nomes dos campos cujo valor no formulário difere da imagem antes (por coluna).
+        NULL e "" são tratados como iguais, e espaços à direita (colunas CHAR) são ignorados.
+        """
+        def normalize(value):
+            return "" if value is None else str(value).rstrip()
+
+        return tuple(
+            name for name in self.update_names
+            if name in client_data
+            and normalize(client_data.get(name)) != normalize(before_data.get(self._name_to_column[name]))
+        )
+
+    def insert_values(self, client_data):
+        """Parâmetros do insert_sql: XCLIENTES do IF NOT EXISTS seguido das colunas configuradas."""
+        xclientes = client_data.get("XCLIENTES")
+        return (xclientes,) + tuple(client_data.get(name) for name in self.insert_names)
+
+    def bulk_insert_values(self, client_data):
+        """Parâmetros do bulk_insert_sql, na ordem das colunas configuradas."""
+        return tuple(client_data.get(name) for name in self.insert_names)
+
+    def update_values(self, client_data):
+        """Parâmetros do update_sql: XCLIENTES da imagem antes, colunas, XCLIENTES do WHERE e da imagem depois."""
+        xclientes = client_data.get("XCLIENTES")
+        return (xclientes,) + tuple(client_data.get(name) for name in self.update_names) + (xclientes, xclientes)
+
+    def row_to_dict(self, row):
+        """Converte uma linha do select_sql em dicionário por coluna."""
+        return self.projections[PROJECTION_DETAIL].row_to_dict(row)
+
+    def audit_row_to_dict(self, row):
+        """Converte uma imagem antes/depois (update_sql, deletes) em dicionário por coluna."""
+        return self.projections[PROJECTION_AUDIT].row_to_dict(row)
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def get_compiled_statements(fields_config, table):
+    """Retorna as instruções compiladas para a configuração, montando-as só na primeira vez."""
+    key = (fields_fingerprint(fields_config), table)
+    with _cache_lock:
+        compiled = _cache.get(key)
+        if compiled is None:
+            if len(_cache) >= MAX_CACHED_CONFIGS:
+                _cache.pop(next(iter(_cache)))
+            compiled = CompiledClientStatements(fields_config, table)
+            _cache[key] = compiled
+        return compiled
+
+def invalidate_compiled_statements():
+    """Descarta todas as instruções compiladas (chamado quando os campos mudam)."""
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,191 @@
+import json
+import sqlite3
+import threading
+import time
+
+DEFAULT_JOURNAL_PATH = "write_journal.db"
+DEFAULT_REPLAY_BATCH_SIZE = 50
+DEFAULT_REPLAY_INTERVAL = 30
+
+JOURNAL_INSERT = "insert"
+JOURNAL_UPDATE = "update"
+JOURNAL_DELETE = "delete"
+
+STATUS_PENDING = "pending"   # Esperando o banco voltar
+STATUS_DONE = "done"         # Reenviado e gravado
+STATUS_CONFLICT = "conflict" # A linha mudou no servidor desde que foi lida: precisa de decisão do operador
+STATUS_FAILED = "failed"     # O banco recusou (erro de dados); não é tentado de novo sozinho
+
+def _normalize(value):
+    # Mesma comparação do changed_fields: NULL == "" e espaços à direita (CHAR) ignorados
+    return "" if value is None else str(value).rstrip()
+
+class JournalEntry:
+    """Uma escrita guardada: operação, XCLIENTES, dados enviados e a imagem lida antes (base) para detectar conflito."""
+
+    __slots__ = ("id", "created_at", "operation", "client_id", "data", "base", "status", "attempts", "last_error")
+
+    def __init__(self, id, created_at, operation, client_id, data, base, status, attempts, last_error):
+        self.id = id
+        self.created_at = created_at
+        self.operation = operation
+        self.client_id = client_id
+        self.data = data
+        self.base = base
+        self.status = status
+        self.attempts = attempts
+        self.last_error = last_error
+
+    @classmethod
+    def from_row(cls, row):
+        row = list(row)
+        row[4] = json.loads(row[4]) if row[4] else {}
+        row[5] = json.loads(row[5]) if row[5] else None
+        return cls(*row)
+
+    def __repr__(self):
+        return f"JournalEntry({self.id}, {self.operation!r}, {self.client_id!r}, {self.status!r})"
+
+def find_conflict(entry, current, column_of):
+    """
+    Motivo do conflito da entrada contra a linha atual do servidor (None se pode aplicar).
+    column_of: nome do campo -> coluna do banco. `current` é a imagem atual (None se a linha não existe).
+    Update: um campo alterado pelo operador também mudou no servidor (para outro valor) desde a leitura.
+    Delete: a linha mudou desde que foi lida.
+    """
+    if entry.operation == JOURNAL_INSERT:
+        if current is not None:
+            return f"XCLIENTES {entry.client_id} already exists"
+        return None
+    if current is None:
+        return "client no longer exists" if entry.operation == JOURNAL_UPDATE else "client not found"
+    if not entry.base:
+        return None
+    if entry.operation == JOURNAL_UPDATE:
+        for name, value in entry.data.items():
+            column = column_of.get(name)
+            if column is None or name == "XCLIENTES":
+                continue
+            base_value = _normalize(entry.base.get(column))
+            server_value = _normalize(current.get(column))
+            if server_value != base_value and server_value != _normalize(value):
+                return f"{name} changed on the server ({entry.base.get(column)!r} -> {current.get(column)!r})"
+        return None
+    changed = [column for column, value in entry.base.items() if _normalize(current.get(column)) != _normalize(value)]
+    if changed:
+        return f"changed on the server since it was read ({', '.join(changed)})"
+    return None
+
+class WriteJournal:
+    """
+    Fila durável (SQLite, synchronous=FULL) das escritas feitas com o banco fora
+    do ar. Cada append só retorna depois de gravado em disco; a ordem de
+    reenvio é a ordem de entrada (id). Entradas em conflito ou com falha
+    seguram as seguintes do mesmo cliente até o operador decidir.
+    """
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS write_journal ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, created_at REAL NOT NULL, operation TEXT NOT NULL, "
+            "client_id TEXT, data TEXT NOT NULL, base TEXT, status TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS IX_write_journal_status ON write_journal (status, id)")
+        self._conn.commit()
+
+    def append(self, operation, client_id, data, base=None):
+        """Guarda uma escrita; retorna o id da entrada."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO write_journal (created_at, operation, client_id, data, base, status) VALUES (?, ?, ?, ?, ?, ?)",
+                (time.time(), operation, None if client_id is None else str(client_id),
+                 json.dumps(data, ensure_ascii=False, default=str),
+                 json.dumps(base, ensure_ascii=False, default=str) if base is not None else None, STATUS_PENDING)
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def _select(self, where="", params=()):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, created_at, operation, client_id, data, base, status, attempts, last_error "
+                f"FROM write_journal {where} ORDER BY id", params
+            ).fetchall()
+        return [JournalEntry.from_row(row) for row in rows]
+
+    def entries(self, statuses=(STATUS_PENDING, STATUS_CONFLICT, STATUS_FAILED)):
+        """Entradas com os status dados, em ordem de entrada (para a tela da fila)."""
+        placeholders = ', '.join('?' * len(statuses))
+        return self._select(f"WHERE status IN ({placeholders})", tuple(statuses))
+
+    def replayable(self):
+        """
+        Pendentes em ordem, menos as de clientes com uma entrada anterior em
+        conflito ou com falha (reenviá-las passaria na frente da que está parada).
+        """
+        blocked = {}
+        for entry in self.entries((STATUS_CONFLICT, STATUS_FAILED)):
+            if entry.client_id is not None:
+                blocked.setdefault(entry.client_id, entry.id)
+        return [
+            entry for entry in self.entries((STATUS_PENDING,))
+            if entry.client_id is None or blocked.get(entry.client_id, entry.id + 1) > entry.id
+        ]
+
+    def mark(self, entry_id, status, error=None, client_id=None):
+        """Novo status da entrada (conta a tentativa); client_id preenche o XCLIENTES reservado no reenvio."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE write_journal SET status = ?, last_error = ?, attempts = attempts + 1, "
+                "client_id = COALESCE(?, client_id) WHERE id = ?",
+                (status, error, None if client_id is None else str(client_id), entry_id)
+            )
+            self._conn.commit()
+
+    def retry(self, entry_id):
+        """
+        Volta uma entrada em conflito/falha para a fila (o operador decidiu reenviar
+        mesmo assim): sem a base, o update/delete vale sobre o que está no servidor,
+        e um insert cujo XCLIENTES já existe recebe um id novo no reenvio.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE write_journal SET status = ?, base = NULL, "
+                "client_id = CASE WHEN operation = ? THEN NULL ELSE client_id END "
+                "WHERE id = ? AND status IN (?, ?)",
+                (STATUS_PENDING, JOURNAL_INSERT, entry_id, STATUS_CONFLICT, STATUS_FAILED)
+            )
+            self._conn.commit()
+
+    def discard(self, entry_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM write_journal WHERE id = ? AND status != ?", (entry_id, STATUS_DONE))
+            self._conn.commit()
+
+    def purge_done(self, older_than_seconds=7 * 24 * 3600):
+        with self._lock:
+            self._conn.execute("DELETE FROM write_journal WHERE status = ? AND created_at < ?",
+                               (STATUS_DONE, time.time() - older_than_seconds))
+            self._conn.commit()
+
+    def counts(self):
+        """Quantidade de entradas por status."""
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM write_journal GROUP BY status").fetchall())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def journal_settings(app_settings):
+    return {
+        "path": app_settings.get("WRITE_JOURNAL_PATH", DEFAULT_JOURNAL_PATH),
+        "batch_size": app_settings.get("WRITE_JOURNAL_BATCH_SIZE", DEFAULT_REPLAY_BATCH_SIZE),
+        "interval": app_settings.get("WRITE_JOURNAL_REPLAY_INTERVAL", DEFAULT_REPLAY_INTERVAL),
+    }
@@ -0,0 +1,98 @@
+from tkinter import messagebox
+from datetime import datetime
+from utils.db_operations import get_write_journal, replay_write_journal
+from utils.db_executor import DbTaskMixin
+from utils.write_journal import STATUS_PENDING, STATUS_CONFLICT, STATUS_FAILED
+from utils.write_journal_gui import WriteJournalGUI
+
+REFRESH_INTERVAL_MS = 2000
+
+def format_entry(entry):
+    """Uma linha da fila: id, hora, status, operação, XCLIENTES e o motivo do conflito/falha."""
+    created = datetime.fromtimestamp(entry.created_at).strftime("%d-%m %H:%M:%S")
+    client = entry.client_id or entry.data.get("identifier") or "(novo)"
+    line = f"{entry.id:>6}  {created}  {entry.status:<9}{entry.operation:<8}{client}"
+    if entry.last_error:
+        line += f"  - {entry.last_error}"
+    return line
+
+class WriteJournalApp(DbTaskMixin, WriteJournalGUI):
+    def __init__(self, master=None):
+        super().__init__(master)
+        self.entries = []
+        self.last_report = None
+        self._refresh_job = None
+        self.refresh()
+
+    def refresh(self):
+        """Relê a fila a cada REFRESH_INTERVAL_MS enquanto a janela estiver aberta."""
+        self.show_entries()
+        self._refresh_job = self.after(REFRESH_INTERVAL_MS, self.refresh)
+
+    def destroy(self):
+        # Com uma reexecução em andamento a janela continua aberta (DbTaskMixin.destroy avisa), e a lista também
+        if self._refresh_job is not None and not self.has_pending_write():
+            self.after_cancel(self._refresh_job)
+            self._refresh_job = None
+        super().destroy()
+
+    def show_entries(self):
+        journal = get_write_journal()
+        if journal is None:
+            self.entries = []
+            self.display_entries([], "Diário offline desligado (WRITE_JOURNAL_ENABLED).")
+            return
+        self.entries = journal.entries((STATUS_PENDING, STATUS_CONFLICT, STATUS_FAILED))
+        counts = journal.counts()
+        summary = (f"Pendentes: {counts.get(STATUS_PENDING, 0)}  Conflitos: {counts.get(STATUS_CONFLICT, 0)}  "
+                   f"Falhas: {counts.get(STATUS_FAILED, 0)}")
+        if self.last_report is not None:
+            report = self.last_report
+            summary += (f"  |  Último reenvio: {report.done} gravadas em {report.transactions} transações, "
+                        f"{report.conflicts} conflitos, {report.failed} falhas")
+        self.display_entries([format_entry(entry) for entry in self.entries], summary)
+
+    def selected_entry(self):
+        index = self.selected_index()
+        if index is None or index >= len(self.entries):
+            messagebox.showerror("Error", "Select an entry first.")
+            return None
+        return self.entries[index]
+
+    def handle_replay(self):
+        self.run_db_task(replay_write_journal, on_success=self.show_replay_result, key="replay", write=True)
+
+    def show_replay_result(self, report):
+        if report is None:
+            return # Diário desligado ou reenvio já em andamento
+        self.last_report = report
+        if report.stopped:
+            messagebox.showerror("Database Error", f"Replay stopped: {report.stopped}")
+        self.show_entries()
+
+    def handle_retry_selected(self):
+        entry = self.selected_entry()
+        if entry is None:
+            return
+        if entry.status == STATUS_PENDING:
+            messagebox.showinfo("Fila Offline", "This entry is already waiting to be sent.")
+            return
+        # Sem a base antiga: o operador decidiu que a escrita vale sobre o que está no servidor
+        get_write_journal().retry(entry.id)
+        self.show_entries()
+
+    def handle_discard_selected(self):
+        entry = self.selected_entry()
+        if entry is None:
+            return
+        if not messagebox.askyesno("Confirm Discard", f"Discard queued {entry.operation} of {entry.client_id or 'new client'}? It will not be sent."):
+            return
+        get_write_journal().discard(entry.id)
+        self.show_entries()
+
+if __name__ == "__main__":
+    import customtkinter as ctk
+    root = ctk.CTk()
+    root.withdraw() # Hide the main root window
+    app = WriteJournalApp(root)
+    root.mainloop()
@@ -0,0 +1,71 @@
+import tkinter as tk
+import customtkinter as ctk
+import sys
+import os
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.centerWindow import centerWindow
+from utils.config_manager import APP_SETTINGS
+
+class WriteJournalGUI(ctk.CTkToplevel):
+    def __init__(self, master=None):
+        super().__init__(master)
+        self.title("Fila Offline")
+        self.geometry(centerWindow.center_window(self, master, APP_SETTINGS["APP_WIDTH"], APP_SETTINGS["APP_HEIGHT"]))
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        self.create_widgets()
+
+    def create_widgets(self):
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        self.summary_label = ctk.CTkLabel(self, text="")
+        self.summary_label.grid(row=0, column=0, padx=10, pady=(10, 0), sticky="w")
+
+        # Uma linha por entrada pendente, em conflito ou com falha, na ordem de reenvio
+        list_frame = ctk.CTkFrame(self)
+        list_frame.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
+        list_frame.grid_rowconfigure(0, weight=1)
+        list_frame.grid_columnconfigure(0, weight=1)
+        self.entries_listbox = tk.Listbox(list_frame, exportselection=False, activestyle="none", font=("Courier New", 11))
+        self.entries_listbox.grid(row=0, column=0, sticky="nsew")
+        scrollbar = ctk.CTkScrollbar(list_frame, command=self.entries_listbox.yview)
+        scrollbar.grid(row=0, column=1, sticky="ns")
+        self.entries_listbox.configure(yscrollcommand=scrollbar.set)
+
+        button_frame = ctk.CTkFrame(self)
+        button_frame.grid(row=2, column=0, padx=10, pady=(0, 10), sticky="ew")
+        for column in range(4):
+            button_frame.columnconfigure(column, weight=1)
+
+        btn_replay = ctk.CTkButton(button_frame, text="Reenviar agora", command=self.handle_replay)
+        btn_replay.grid(row=0, column=0, padx=10, pady=10, sticky="nsew")
+
+        btn_retry = ctk.CTkButton(button_frame, text="Tentar de novo", command=self.handle_retry_selected)
+        btn_retry.grid(row=0, column=1, padx=10, pady=10, sticky="nsew")
+
+        btn_discard = ctk.CTkButton(button_frame, text="Descartar", command=self.handle_discard_selected,
+                                    fg_color="#A51F1F", hover_color="#701414")
+        btn_discard.grid(row=0, column=2, padx=10, pady=10, sticky="nsew")
+
+        btn_close = ctk.CTkButton(button_frame, text="Close", command=self.on_close)
+        btn_close.grid(row=0, column=3, padx=10, pady=10, sticky="nsew")
+
+    def display_entries(self, lines, summary):
+        selected = self.selected_index()
+        self.entries_listbox.delete(0, tk.END)
+        for line in lines:
+            self.entries_listbox.insert(tk.END, line)
+        if selected is not None and selected < len(lines):
+            self.entries_listbox.selection_set(selected)
+        self.summary_label.configure(text=summary)
+
+    def selected_index(self):
+        selection = self.entries_listbox.curselection()
+        return selection[0] if selection else None
+
+    def on_close(self):
+        self.destroy()